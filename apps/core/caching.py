@@ -0,0 +1,25 @@
+"""Versioned cache namespaces
+
+Cached data is stored under keys that embed a version number. Bumping the
+version invalidates everything in the namespace at once without having to
+know or delete the individual keys.
+"""
+from django.core.cache import cache
+
+
+def get_cache_version(version_key):
+    """Return the current version stored under version_key"""
+    version = cache.get(version_key)
+    if version is None:
+        version = 1
+        cache.add(version_key, version, None)
+    return version
+
+
+def bump_cache_version(version_key):
+    """Invalidate every cached value in the namespace of version_key"""
+    try:
+        return cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, 2, None)
+        return 2
@@ -0,0 +1,147 @@
+"""Catalog query engine shared by the shop and category listing pages"""
+import hashlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.text import slugify
+
+from apps.shop.models import Product, Category
+from apps.shop.search import search_products
+from .caching import get_cache_version, bump_cache_version
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_CACHE_TIMEOUT = getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 10)
+PRODUCTS_PER_PAGE = 9
+
+# Declarative filter spec: (query parameter, queryset lookup, value cast).
+# Values that fail to cast are ignored instead of raising a server error.
+FILTER_SPEC = (
+    ('category', 'category_id', int),
+    ('min_price', 'price__gte', Decimal),
+    ('max_price', 'price__lte', Decimal),
+    ('in_stock', 'stock__gt', lambda value: 0),
+    ('on_sale', 'discount_percent__gt', lambda value: 0),
+)
+
+# Sort keys read the precomputed rating columns on Product, so no sort needs
+# to join or aggregate reviews. A trailing 'id' keeps the order stable.
+SORT_SPEC = {
+    'name': ('name', 'id'),
+    'price_low': ('price', 'id'),
+    'price_high': ('-price', 'id'),
+    'newest': ('-created_at', 'id'),
+    'popularity': ('-avg_rating', '-review_count', '-is_featured', 'id'),
+    'rating': ('-avg_rating', '-review_count', 'id'),
+    # Search results are reordered by rank after the query runs
+    'relevance': ('id',),
+}
+DEFAULT_SORT = 'name'
+
+
+def get_catalog_version():
+    """Return the current catalog version used to namespace cached results"""
+    return get_cache_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog result"""
+    bump_cache_version(CATALOG_VERSION_KEY)
+
+
+def get_category_slugs():
+    """Map the slugified name of each active category to its pk, cached per catalog version"""
+    cache_key = f'catalog:category_slugs:{get_catalog_version()}'
+    slugs = cache.get(cache_key)
+    if slugs is None:
+        slugs = {}
+        for pk, name in Category.objects.filter(is_active=True).values_list('pk', 'name'):
+            # Like the scan this replaces, the first category with a slug wins
+            slugs.setdefault(slugify(name), pk)
+        cache.set(cache_key, slugs, CATALOG_CACHE_TIMEOUT)
+    return slugs
+
+
+def get_category_by_slug(slug):
+    """Resolve an active category from the slugified form of its name"""
+    pk = get_category_slugs().get(slug)
+    if pk is None:
+        return None
+    return Category.objects.filter(pk=pk, is_active=True).first()
+
+
+class CatalogQuery:
+    """A normalized product listing query built from request parameters"""
+
+    def __init__(self, params, category=None):
+        self.category = category
+        self.search = params.get('search', '').strip()
+
+        self.sort = params.get('sort') or ('relevance' if self.search else DEFAULT_SORT)
+        if self.sort not in SORT_SPEC or (self.sort == 'relevance' and not self.search):
+            self.sort = DEFAULT_SORT
+        self._search_ids = None
+
+        self.filters = {}
+        for param, lookup, cast in FILTER_SPEC:
+            if param == 'category' and category is not None:
+                continue
+            raw_value = params.get(param, '').strip()
+            if not raw_value:
+                continue
+            try:
+                self.filters[lookup] = cast(raw_value)
+            except (ValueError, TypeError, ArithmeticError):
+                continue
+
+    def normalized(self):
+        """Canonical string form of the query, independent of parameter order"""
+        parts = [f'sort={self.sort}']
+        if self.category is not None:
+            parts.append(f'category={self.category.pk}')
+        if self.search:
+            parts.append(f'search={self.search.lower()}')
+        parts.extend(f'{lookup}={value}' for lookup, value in sorted(self.filters.items()))
+        return '&'.join(parts)
+
+    def cache_key(self):
+        digest = hashlib.md5(self.normalized().encode('utf-8')).hexdigest()
+        return f'catalog:ids:{get_catalog_version()}:{digest}'
+
+    def get_queryset(self):
+        products = Product.objects.filter(is_active=True)
+        if self.category is not None:
+            products = products.filter(category=self.category)
+        if self.filters:
+            products = products.filter(**self.filters)
+        if self.search:
+            products = products.filter(id__in=self.get_search_ids())
+        return products.order_by(*SORT_SPEC[self.sort])
+
+    def get_search_ids(self):
+        """Product IDs matching the search text, most relevant first"""
+        if self._search_ids is None:
+            self._search_ids = search_products(self.search)
+        return self._search_ids
+
+    def get_product_ids(self):
+        """Return the ordered list of matching product IDs, cached per query"""
+        cache_key = self.cache_key()
+        product_ids = cache.get(cache_key)
+        if product_ids is None:
+            product_ids = list(self.get_queryset().values_list('id', flat=True))
+            if self.sort == 'relevance':
+                rank = {pk: position for position, pk in enumerate(self.get_search_ids())}
+                product_ids.sort(key=rank.get)
+            cache.set(cache_key, product_ids, CATALOG_CACHE_TIMEOUT)
+        return product_ids
+
+    def get_page(self, page_number, per_page=PRODUCTS_PER_PAGE):
+        """Paginate the cached ID list and load only the products on the page"""
+        paginator = Paginator(self.get_product_ids(), per_page)
+        page = paginator.get_page(page_number)
+
+        products = Product.objects.select_related('category').in_bulk(page.object_list)
+        page.object_list = [products[pk] for pk in page.object_list if pk in products]
+        return page
@@ -1,23 +1,15 @@
-from apps.cms.models import FooterContent, ContactInfo
+from django.utils.functional import SimpleLazyObject
+from .site_settings import get_footer_content, get_contact_info
 
 def footer_content(request):
     """Context processor to add footer content to all templates"""
-    try:
-        footer = FooterContent.objects.get(is_active=True)
-    except FooterContent.DoesNotExist:
-        footer = None
-    
+    # Loaded from the cached site settings on first use only
     return {
-        'footer_content': footer
+        'footer_content': SimpleLazyObject(get_footer_content)
     }
 
 def contact_info(request):
     """Context processor to add contact information to all templates"""
-    try:
-        contact = ContactInfo.objects.get(id=1)
-    except ContactInfo.DoesNotExist:
-        contact = None
-    
     return {
-        'contact_info': contact
-    }
\ No newline at end of file
+        'contact_info': SimpleLazyObject(get_contact_info)
+    }
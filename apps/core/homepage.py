@@ -0,0 +1,95 @@
+"""Cached, user-independent homepage content
+
+Everything on the homepage except the personalized recommendations is the
+same for every visitor. It is built once, stored in the cache under the
+homepage version and rendered through {% cache %} fragments keyed on the
+same version. Signals in apps.core.signals bump the version whenever a
+model shown on the homepage changes.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from apps.shop.models import Product, Category
+from apps.cms.models import Banner, Testimonial, HomePageHero, HomePageFeature
+from .caching import get_cache_version, bump_cache_version
+from .queries import top_n_per_group
+
+HOMEPAGE_VERSION_KEY = 'homepage:version'
+HOMEPAGE_CACHE_TIMEOUT = getattr(settings, 'HOMEPAGE_CACHE_TIMEOUT', 60 * 10)
+
+HOMEPAGE_CONTEXT_KEYS = [
+    'featured_products',
+    'categories',
+    'banners',
+    'testimonials',
+    'homepage_heroes',
+    'homepage_features',
+    'gift_box_products',
+    'category_featured_products',
+    'category_ids',
+]
+
+
+def get_homepage_version():
+    return get_cache_version(HOMEPAGE_VERSION_KEY)
+
+
+def bump_homepage_version():
+    bump_cache_version(HOMEPAGE_VERSION_KEY)
+
+
+def build_homepage_context():
+    """Query everything the anonymous part of the homepage shows"""
+    products = Product.objects.filter(is_active=True).prefetch_related('variants')
+    categories = list(Category.objects.filter(is_active=True)[:6])
+
+    gift_box_products = list(products.filter(category__name='Gift Boxes')[:4])
+
+    featured_by_category = top_n_per_group(
+        products.filter(category__in=categories, is_featured=True),
+        'category_id',
+        4
+    )
+    category_featured_products = {
+        category.name: featured_by_category.get(category.id, []) for category in categories
+    }
+    category_ids = {category.name: category.id for category in categories}
+
+    return {
+        'featured_products': list(products.filter(is_featured=True)[:4]),
+        'categories': categories,
+        'banners': list(Banner.objects.filter(is_active=True)[:3]),
+        'testimonials': list(Testimonial.objects.filter(is_active=True)[:6]),
+        'homepage_heroes': list(HomePageHero.objects.filter(is_active=True).order_by('order')),
+        'homepage_features': list(HomePageFeature.objects.filter(is_active=True).order_by('order')),
+        'gift_box_products': gift_box_products,
+        'category_featured_products': category_featured_products,
+        'category_ids': category_ids,
+    }
+
+
+def get_homepage_context(version=None):
+    """Return the homepage context from the cache, building it on a miss"""
+    if version is None:
+        version = get_homepage_version()
+    cache_key = f'homepage:context:{version}'
+    context = cache.get(cache_key)
+    if context is None:
+        context = build_homepage_context()
+        cache.set(cache_key, context, HOMEPAGE_CACHE_TIMEOUT)
+    return context
+
+
+def lazy_homepage_context(version):
+    """Template context whose values load only if a fragment cache misses"""
+    loaded = SimpleLazyObject(lambda: get_homepage_context(version))
+    context = {
+        key: SimpleLazyObject(lambda key=key: loaded[key])
+        for key in HOMEPAGE_CONTEXT_KEYS
+    }
+    context.update({
+        'homepage_version': version,
+        'homepage_cache_timeout': HOMEPAGE_CACHE_TIMEOUT,
+    })
+    return context
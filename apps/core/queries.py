@@ -0,0 +1,42 @@
+"""Reusable query helpers"""
+from django.db import connections
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+def top_n_per_group(queryset, group_field, limit, order_by=None):
+    """Return the first `limit` rows of each group in a single query
+
+    Rows are grouped by `group_field` (a concrete column such as
+    'category_id') and ordered within each group by `order_by`, which
+    defaults to the queryset's own ordering. The result maps each group
+    value to a list of model instances; groups without rows are absent.
+
+    Backends that support window functions rank rows with
+    ROW_NUMBER() OVER (PARTITION BY group_field) and only return the top
+    rows. Other backends fetch the rows in group order and keep the first
+    `limit` of each group in Python.
+    """
+    order_by = list(order_by or queryset.query.order_by or queryset.model._meta.ordering or ['pk'])
+    if 'pk' not in order_by and 'id' not in order_by:
+        # Make the ranking deterministic when the ordering has ties
+        order_by.append('pk')
+
+    groups = {}
+    if connections[queryset.db].features.supports_over_clause:
+        rows = queryset.annotate(
+            group_rank=Window(
+                expression=RowNumber(),
+                partition_by=F(group_field),
+                order_by=order_by
+            )
+        ).filter(group_rank__lte=limit).order_by(group_field, *order_by)
+        for row in rows:
+            groups.setdefault(getattr(row, group_field), []).append(row)
+        return groups
+
+    for row in queryset.order_by(group_field, *order_by):
+        group = groups.setdefault(getattr(row, group_field), [])
+        if len(group) < limit:
+            group.append(row)
+    return groups
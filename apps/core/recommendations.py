@@ -0,0 +1,69 @@
+"""Personalized product recommendations
+
+A customer's recommendations are computed from their most recently bought
+products and the precomputed "frequently bought together" neighbours of
+those products (see apps.shop.copurchase), topped up from the same
+categories. Both steps are aggregated in SQL, so the work does not grow
+with the number of orders.
+
+The recommended product IDs are cached per customer. The cache entry is
+dropped when the customer places an order and otherwise expires after
+RECOMMENDATION_CACHE_TIMEOUT, so a cached render costs one cache lookup
+and one query for the products themselves.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from apps.shop.models import Product
+from apps.orders.models import OrderItem
+from .utils import get_related_product_ids
+
+RECOMMENDATION_CACHE_TIMEOUT = getattr(settings, 'RECOMMENDATION_CACHE_TIMEOUT', 60 * 60)
+RECOMMENDATION_LIMIT = 4
+SEED_PRODUCTS = 5
+
+
+def recommendation_cache_key(user_id):
+    return f'recommendations:user:{user_id}'
+
+
+def invalidate_recommendations(user_id):
+    cache.delete(recommendation_cache_key(user_id))
+
+
+def compute_recommended_ids(user, limit=RECOMMENDATION_LIMIT):
+    """Return recommended product IDs for a user, best first"""
+    seed_ids = list(
+        OrderItem.objects.filter(
+            order__customer=user
+        ).values('product_id').annotate(
+            last_ordered=Max('order__created_at')
+        ).order_by('-last_ordered').values_list('product_id', flat=True)[:SEED_PRODUCTS]
+    )
+
+    if not seed_ids:
+        # For new users, show popular products
+        return list(
+            Product.objects.filter(
+                is_active=True,
+                is_featured=True
+            ).order_by('-created_at').values_list('id', flat=True)[:limit]
+        )
+
+    # Products frequently bought together with what the user bought,
+    # scored by their summed affinity to all seed products
+    return get_related_product_ids(seed_ids, limit=limit)
+
+
+def get_recommended_products(user, limit=RECOMMENDATION_LIMIT):
+    """Get personalized product recommendations for a user"""
+    cache_key = recommendation_cache_key(user.pk)
+    recommended_ids = cache.get(cache_key)
+    if recommended_ids is None:
+        recommended_ids = compute_recommended_ids(user, limit)
+        cache.set(cache_key, recommended_ids, RECOMMENDATION_CACHE_TIMEOUT)
+
+    # Products deactivated since the list was cached are skipped
+    products = Product.objects.filter(is_active=True).in_bulk(recommended_ids[:limit])
+    return [products[product_id] for product_id in recommended_ids[:limit] if product_id in products]
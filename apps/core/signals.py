@@ -0,0 +1,51 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.shop.models import Product, Category, ProductReview, ProductVariant
+from apps.cms.models import Banner, Testimonial, HomePageHero, HomePageFeature, FooterContent, ContactInfo
+from apps.orders.models import Order
+from .catalog import bump_catalog_version
+from .homepage import bump_homepage_version
+from .recommendations import invalidate_recommendations
+from .site_settings import bump_site_settings_version
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def invalidate_catalog_cache(sender, **kwargs):
+    """Drop cached catalog listings whenever products, categories or ratings change"""
+    bump_catalog_version()
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+@receiver(post_save, sender=Testimonial)
+@receiver(post_delete, sender=Testimonial)
+@receiver(post_save, sender=HomePageHero)
+@receiver(post_delete, sender=HomePageHero)
+@receiver(post_save, sender=HomePageFeature)
+@receiver(post_delete, sender=HomePageFeature)
+def invalidate_homepage_cache(sender, **kwargs):
+    """Drop the cached homepage whenever anything it shows changes"""
+    bump_homepage_version()
+
+@receiver(post_save, sender=Order)
+def invalidate_customer_recommendations(sender, instance, created, **kwargs):
+    """A new order changes what the customer should be recommended"""
+    if created:
+        invalidate_recommendations(instance.customer_id)
+
+@receiver(post_save, sender=FooterContent)
+@receiver(post_delete, sender=FooterContent)
+@receiver(post_save, sender=ContactInfo)
+@receiver(post_delete, sender=ContactInfo)
+def invalidate_site_settings_cache(sender, **kwargs):
+    """Drop the cached footer and contact details whenever they change"""
+    bump_site_settings_version()
@@ -0,0 +1,46 @@
+"""Cached site-wide settings shown on every page
+
+The active FooterContent and the ContactInfo record are loaded together
+into one snapshot cached under the site settings version. Signals in
+apps.core.signals bump the version whenever either model is saved or
+deleted, which covers footer_content_management and contact_management.
+The context processors expose the snapshot lazily, so a render that never
+touches the footer or contact details does not even read the cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.cms.models import FooterContent, ContactInfo
+from .caching import get_cache_version, bump_cache_version
+
+SITE_SETTINGS_VERSION_KEY = 'site_settings:version'
+SITE_SETTINGS_CACHE_TIMEOUT = getattr(settings, 'SITE_SETTINGS_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def bump_site_settings_version():
+    bump_cache_version(SITE_SETTINGS_VERSION_KEY)
+
+
+def load_site_settings():
+    return {
+        'footer_content': FooterContent.objects.filter(is_active=True).first(),
+        'contact_info': ContactInfo.objects.filter(id=1).first(),
+    }
+
+
+def get_site_settings():
+    """Return the footer content and contact info, either of which may be None"""
+    cache_key = f'site_settings:{get_cache_version(SITE_SETTINGS_VERSION_KEY)}'
+    snapshot = cache.get(cache_key)
+    if snapshot is None:
+        snapshot = load_site_settings()
+        cache.set(cache_key, snapshot, SITE_SETTINGS_CACHE_TIMEOUT)
+    return snapshot
+
+
+def get_footer_content():
+    return get_site_settings()['footer_content']
+
+
+def get_contact_info():
+    return get_site_settings()['contact_info']
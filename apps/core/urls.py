@@ -11,6 +11,7 @@ urlpatterns = [
     path('shop/', views.shop, name='shop'),
     path('chocolates/', views.chocolates_category, name='chocolates_category'),
     path('spices/', views.spices_category, name='spices_category'),
+    path('category/<slug:category_slug>/', views.category_products, name='category_products'),
     path('product/<int:product_id>/', views.product_detail, name='product_detail'),
     path('cart/', views.cart, name='cart'),
     path('checkout/', views.checkout, name='checkout'),
@@ -19,6 +20,7 @@ urlpatterns = [
     path('admin-panel/enhanced/', views_enhanced.enhanced_admin_panel, name='enhanced_admin_panel'),
     path('admin-panel/coupons/', views.admin_coupon_management, name='admin_coupon_management'),
     path('admin-panel/analytics/', views.product_analytics, name='product_analytics'),
+    path('admin-panel/analytics/export/<str:dataset>/', views.product_analytics_export, name='product_analytics_export'),
     path('admin-panel/update-order-status/', views_enhanced.update_order_status, name='update_order_status'),
     path('login/', views.login_view, name='login'),
     path('register/', views.register_view, name='register'),
@@ -1,21 +1,69 @@
-from django.db.models import Avg, Count, Q, Sum
-from apps.shop.models import Product, ProductReview
+import hashlib
+from django.core.cache import cache
+from django.db.models import Q
+from apps.shop.models import Product
 from apps.orders.models import OrderItem
+from apps.shop.copurchase import get_frequently_bought_together, get_bought_together_ids
+from .catalog import get_catalog_version, CATALOG_CACHE_TIMEOUT
 
 def get_related_products(product, limit=4):
-    """Get related products based on category, tags, and purchase history"""
+    """Get related products based on purchase history and category"""
     try:
-        # Start with products from the same category
-        related_products = Product.objects.filter(
-            category=product.category,
-            is_active=True
-        ).exclude(id=product.id)[:limit]
+        # Start with products frequently bought together with this one
+        related_products = get_frequently_bought_together(product, limit=limit)
+        
+        # Fill up with products from the same category
+        if len(related_products) < limit:
+            related_products.extend(Product.objects.filter(
+                category_id=product.category_id,
+                is_active=True
+            ).exclude(
+                id__in=[product.id] + [related.id for related in related_products]
+            )[:limit - len(related_products)])
         
-        return list(related_products)
+        return related_products
     except Exception:
         # If there's any issue, return an empty list
         return []
 
+def get_related_product_ids(product_ids, limit=6):
+    """IDs of products related to a set of products, best first
+    
+    Products frequently bought together with the set come first, topped up
+    with the best-rated products from the same categories. The given
+    products are never included.
+    """
+    product_ids = list(product_ids)
+    related_ids = get_bought_together_ids(product_ids, limit=limit)
+    if len(related_ids) < limit:
+        related_ids.extend(Product.objects.filter(
+            category__products__id__in=product_ids,
+            is_active=True
+        ).exclude(
+            id__in=product_ids + related_ids
+        ).distinct().order_by('-avg_rating', '-review_count', 'id').values_list('id', flat=True)[:limit - len(related_ids)])
+    return related_ids
+
+def get_related_products_for(product_ids, limit=6):
+    """Get related products for a set of products, e.g. a cart or an order
+    
+    Results are cached per set of products until the catalog changes.
+    """
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return []
+    
+    digest = hashlib.md5(','.join(map(str, product_ids)).encode('utf-8')).hexdigest()
+    cache_key = f'related:{get_catalog_version()}:{limit}:{digest}'
+    related_products = cache.get(cache_key)
+    if related_products is None:
+        related_ids = get_related_product_ids(product_ids, limit=limit)
+        products = Product.objects.in_bulk(related_ids)
+        related_products = [products[product_id] for product_id in related_ids if product_id in products]
+        cache.set(cache_key, related_products, CATALOG_CACHE_TIMEOUT)
+    
+    return related_products
+
 def get_upsell_products(product, limit=4):
     """Get upsell products (higher priced or premium versions)"""
     # Get products from the same category with higher price or marked as premium
@@ -29,12 +77,9 @@ def get_upsell_products(product, limit=4):
     return list(upsell_products)
 
 def get_product_rating_stats(product):
-    """Get rating statistics for a product"""
-    reviews = ProductReview.objects.filter(product=product)
-    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
-    review_count = reviews.count()
-    
+    """Get rating statistics for a product from its stored aggregates"""
     return {
-        'avg_rating': avg_rating,
-        'review_count': review_count
+        'avg_rating': product.avg_rating,
+        'review_count': product.review_count,
+        'rating_histogram': product.rating_histogram,
     }
\ No newline at end of file
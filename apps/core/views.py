@@ -2,180 +2,58 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db.models import Q, Avg, Sum, Count, F
+from django.http import JsonResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.db import transaction
+from django.core.paginator import Paginator
+from django.db.models import Avg, Count
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_protect
 from datetime import timedelta
 from apps.shop.models import Product, Category, ProductReview
-from apps.orders.models import Order, CartItem, OrderItem
+from apps.orders.models import Order, CartItem
 from apps.users.models import User, Customer
-from apps.cms.models import Banner, Testimonial, HomePageHero, FooterContent, HomePageFeature
-from .utils import get_related_products, get_upsell_products, get_product_rating_stats
+from .utils import get_related_products, get_related_products_for, get_upsell_products, get_product_rating_stats
+from .catalog import CatalogQuery, PRODUCTS_PER_PAGE, get_category_by_slug
+from .homepage import lazy_homepage_context, get_homepage_version
+from .recommendations import get_recommended_products
+from apps.orders.checkout import place_order, CheckoutError
+from apps.jobs.queue import enqueue
+from apps.metrics.queries import get_order_totals, get_order_status_counts, get_top_products, get_category_performance
+from apps.metrics.series import get_series, parse_days, default_period, PERIODS
+from apps.metrics.exports import DATASETS, FORMATS, available_formats, streaming_content
 
 def home(request):
     """Home page with featured products and banners"""
-    featured_products = Product.objects.filter(is_active=True, is_featured=True)[:4]  # Changed from 8 to 4
-    categories = Category.objects.filter(is_active=True)[:6]
-    banners = Banner.objects.filter(is_active=True)[:3]
-    testimonials = Testimonial.objects.filter(is_active=True)[:6]
-    
-    # Get dynamic homepage hero content
-    homepage_heroes = HomePageHero.objects.filter(is_active=True).order_by('order')
-    
-    # Get dynamic homepage features
-    homepage_features = HomePageFeature.objects.filter(is_active=True).order_by('order')
-    
-    # Get gift box products for the carousel
-    try:
-        gift_box_category = Category.objects.get(name='Gift Boxes')
-        gift_box_products = Product.objects.filter(
-            category=gift_box_category, 
-            is_active=True
-        )[:4]  # Changed from 8 to 4
-    except Category.DoesNotExist:
-        gift_box_products = Product.objects.none()
-    
-    # Get featured products for each category
-    category_featured_products = {}
-    category_ids = {}
-    for category in categories:
-        category_featured_products[category.name] = Product.objects.filter(
-            category=category,
-            is_active=True,
-            is_featured=True
-        )[:4]  # Already limited to 4 featured products per category
-        category_ids[category.name] = category.id
+    # Everything except the recommendations is shared by all visitors and
+    # served from the cache (see apps.core.homepage)
+    context = lazy_homepage_context(get_homepage_version())
     
     # Get personalized recommendations for authenticated users
     recommended_products = []
     if request.user.is_authenticated:
         recommended_products = get_recommended_products(request.user)
     
-    context = {
-        'featured_products': featured_products,
-        'categories': categories,
-        'banners': banners,
-        'testimonials': testimonials,
-        'homepage_heroes': homepage_heroes,
-        'homepage_features': homepage_features,
-        'gift_box_products': gift_box_products,
-        'category_featured_products': category_featured_products,
-        'category_ids': category_ids,
-        'recommended_products': recommended_products,
-    }
+    context['recommended_products'] = recommended_products
     return render(request, 'core/home.html', context)
 
-def get_recommended_products(user):
-    """Get personalized product recommendations for a user"""
-    recommended_products = []
-    
-    # Get user's order history
-    user_orders = Order.objects.filter(customer=user).prefetch_related('items__product')
-    
-    if user_orders.exists():
-        # Get products from user's order history
-        ordered_product_ids = []
-        for order in user_orders:
-            for item in order.items.all():
-                ordered_product_ids.append(item.product.id)
-        
-        # Get related products to those ordered
-        ordered_products = Product.objects.filter(id__in=ordered_product_ids[:5])  # Limit to 5 products
-        for product in ordered_products:
-            related = get_related_products(product, limit=2)
-            recommended_products.extend(related)
-    else:
-        # For new users, show popular products
-        recommended_products = list(Product.objects.filter(
-            is_active=True, 
-            is_featured=True
-        ).order_by('-created_at')[:4])  # Changed from 8 to 4
-    
-    # Remove duplicates and limit to 4 products
-    seen_ids = set()
-    unique_recommended = []
-    for product in recommended_products:
-        if product.id not in seen_ids and product.is_active:
-            seen_ids.add(product.id)
-            unique_recommended.append(product)
-            if len(unique_recommended) >= 4:  # Changed from 8 to 4
-                break
-    
-    return unique_recommended
-
 def shop(request):
     """Shop page with products, filters, and search"""
-    products = Product.objects.filter(is_active=True).select_related('category')
     categories = Category.objects.filter(is_active=True)
     
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) | 
-            Q(description__icontains=search_query) |
-            Q(tags__icontains=search_query)
-        )
-    
-    # Category filter
-    category_filter = request.GET.get('category', '')
-    if category_filter:
-        products = products.filter(category_id=category_filter)
-    
-    # Price filter
-    min_price = request.GET.get('min_price', '')
-    max_price = request.GET.get('max_price', '')
-    if min_price:
-        products = products.filter(price__gte=min_price)
-    if max_price:
-        products = products.filter(price__lte=max_price)
-    
-    # Stock filter
-    in_stock_filter = request.GET.get('in_stock', '')
-    if in_stock_filter:
-        products = products.filter(stock__gt=0)
-    
-    # Sale filter
-    on_sale_filter = request.GET.get('on_sale', '')
-    if on_sale_filter:
-        products = products.filter(discount_percent__gt=0)
-    
-    # Sort functionality
-    sort_by = request.GET.get('sort', 'name')
-    if sort_by == 'price_low':
-        products = products.order_by('price')
-    elif sort_by == 'price_high':
-        products = products.order_by('-price')
-    elif sort_by == 'newest':
-        products = products.order_by('-created_at')
-    elif sort_by == 'popularity':
-        # Order by number of reviews or featured status
-        products = products.annotate(
-            avg_rating=Avg('reviews__rating'),
-            review_count=Count('reviews')
-        ).order_by('-avg_rating', '-review_count', '-is_featured')
-    elif sort_by == 'rating':
-        products = products.annotate(avg_rating=Avg('reviews__rating')).order_by('-avg_rating')
-    else:
-        products = products.order_by('name')
-    
-    # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(products, 9)  # Show 9 products per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    query = CatalogQuery(request.GET)
+    page_obj = query.get_page(request.GET.get('page'))
     
     context = {
         'products': page_obj,
         'categories': categories,
-        'search_query': search_query,
-        'selected_category': category_filter,
-        'min_price': min_price,
-        'max_price': max_price,
-        'in_stock_filter': in_stock_filter,
-        'on_sale_filter': on_sale_filter,
-        'sort_by': sort_by,
+        'search_query': request.GET.get('search', ''),
+        'selected_category': request.GET.get('category', ''),
+        'min_price': request.GET.get('min_price', ''),
+        'max_price': request.GET.get('max_price', ''),
+        'in_stock_filter': request.GET.get('in_stock', ''),
+        'on_sale_filter': request.GET.get('on_sale', ''),
+        'sort_by': query.sort,
     }
     return render(request, 'core/shop.html', context)
 
@@ -334,33 +212,7 @@ def cart(request):
             pass
     
     # Get related products based on items in cart
-    related_products = []
-    if cart_items.exists():
-        # Get all products in cart
-        cart_product_ids = [item.product.id for item in cart_items]
-        # Use the Product model imported at the top of the file
-        cart_products = Product.objects.filter(id__in=cart_product_ids)
-        
-        # For each product in cart, get related products
-        for cart_product in cart_products:
-            try:
-                related_for_item = get_related_products(cart_product, limit=2)
-                related_products.extend(related_for_item)
-            except Exception:
-                # If there's an error getting related products, continue without them
-                pass
-        
-        # Remove duplicates and limit to 6 products
-        seen_ids = set()
-        unique_related = []
-        for product in related_products:
-            if product.id not in seen_ids and product.id not in cart_product_ids:
-                seen_ids.add(product.id)
-                unique_related.append(product)
-                if len(unique_related) >= 6:
-                    break
-        
-        related_products = unique_related
+    related_products = get_related_products_for([item.product_id for item in cart_items])
     
     context = {
         'cart_items': cart_items,
@@ -378,12 +230,6 @@ def cart(request):
 def checkout(request):
     """Checkout page"""
     if request.method == 'POST':
-        # Handle order creation
-        cart_items = CartItem.objects.filter(user=request.user).select_related('product', 'gift_wrap')
-        if not cart_items.exists():
-            messages.error(request, 'Your cart is empty.')
-            return redirect('core:cart')
-        
         # Get form data
         first_name = request.POST.get('first_name')
         last_name = request.POST.get('last_name')
@@ -396,127 +242,43 @@ def checkout(request):
         country = request.POST.get('country')
         payment_method = request.POST.get('payment_method')
         
-        # Calculate total amount
-        total_amount = sum(item.get_total_price() for item in cart_items)
-        
-        # Apply coupon discount if available
-        if 'coupon_code' in request.session:
-            from apps.marketing.models import Coupon
-            try:
-                coupon = Coupon.objects.get(code=request.session['coupon_code'])
-                if coupon.is_valid() and coupon.can_be_used_by_user(request.user):
-                    # Calculate discount
-                    if coupon.coupon_type == 'percentage':
-                        discount = total_amount * (coupon.discount_value / 100)
-                    elif coupon.coupon_type == 'fixed':
-                        discount = min(coupon.discount_value, total_amount)
-                    else:
-                        discount = 0
-                    
-                    total_amount = total_amount - discount
-                    
-                    # Record coupon usage
-                    from apps.marketing.models import CouponUsage
-                    CouponUsage.objects.create(
-                        coupon=coupon,
-                        user=request.user
-                    )
-                    
-                    # Update coupon usage count
-                    coupon.used_count += 1
-                    coupon.save()
-            except Coupon.DoesNotExist:
-                pass
-        
-        # Create order
-        order = Order.objects.create(
-            customer=request.user,
-            total_amount=total_amount,
-            payment_mode=payment_method,
-            shipping_name=f"{first_name} {last_name}",
-            shipping_email=email,
-            shipping_mobile=phone,
-            shipping_address=address,
-            shipping_city=city,
-            shipping_pincode=zip_code
-        )
-        
-        # Create order items with gift wrap options
-        for item in cart_items:
-            from apps.orders.models import OrderItem
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price=item.product.price,
-                gift_wrap=item.gift_wrap  # Transfer gift wrap selection
-            )
-        
-        # Clear cart
-        cart_items.delete()
+        try:
+            # The notification job commits together with the order
+            with transaction.atomic():
+                order = place_order(
+                    request.user,
+                    {
+                        'name': f"{first_name} {last_name}",
+                        'email': email,
+                        'mobile': phone,
+                        'address': address,
+                        'city': city,
+                        'pincode': zip_code,
+                    },
+                    payment_method,
+                    coupon_code=request.session.get('coupon_code')
+                )
+                
+                # Emails and notifications are sent by the job queue worker
+                enqueue(
+                    'orders.notify_order_placed',
+                    idempotency_key=f'order:{order.pk}:placed',
+                    order_id=order.pk,
+                    order_url=request.build_absolute_uri(reverse('core:dashboard')),
+                    admin_order_url=request.build_absolute_uri(reverse('orders:order_detail', args=[order.id]))
+                )
+        except CheckoutError as e:
+            if e.code == 'coupon_unavailable':
+                del request.session['coupon_code']
+            messages.error(request, e.message)
+            for item in e.items:
+                messages.error(request, f"{item['name']}: {item['available']} left, {item['requested']} requested.")
+            return redirect('core:cart')
         
         # Remove coupon from session
         if 'coupon_code' in request.session:
             del request.session['coupon_code']
         
-        # Send notification for new order
-        from apps.notifications.services import EmailService
-        from apps.notifications.models import Notification
-        from django.urls import reverse
-        
-        # Notify customer
-        if request.user.email:
-            context = {
-                'order_number': order.order_number,
-                'customer_name': request.user.full_name,
-                'order_total': order.total_amount,
-                'order_date': order.created_at.strftime('%B %d, %Y'),
-                'order_items': [
-                    {
-                        'name': item.product.name,
-                        'quantity': item.quantity,
-                        'price': item.price,
-                        'total': item.get_total_price()
-                    }
-                    for item in order.items.all()
-                ],
-                'shipping_address': f"{order.shipping_address}, {order.shipping_city}, {order.shipping_pincode}",
-                'order_url': request.build_absolute_uri(reverse('core:dashboard'))
-            }
-            EmailService.send_email('order_confirmation', request.user.email, context)
-        
-        # Create in-app notification for customer
-        Notification.objects.get_or_create(
-            user=request.user,
-            title=f'Order #{order.order_number} Confirmed',
-            message=f'Your order #{order.order_number} for ₹{order.total_amount} has been confirmed and is being processed.',
-            notification_type='success'
-        )
-        
-        # Notify admins
-        from apps.users.models import User
-        admin_users = [user for user in User.objects.filter(is_active=True) if user.is_admin]
-        admin_context = {
-            'order_number': order.order_number,
-            'customer_name': request.user.full_name,
-            'order_total': order.total_amount,
-            'order_date': order.created_at.strftime('%B %d, %Y'),
-            'order_url': request.build_absolute_uri(reverse('orders:order_detail', args=[order.id]))
-        }
-        
-        for admin in admin_users:
-            # Create in-app notification for admins
-            Notification.objects.get_or_create(
-                user=admin,
-                title=f'New Order #{order.order_number}',
-                message=f'New order from {request.user.full_name} for ₹{order.total_amount}',
-                notification_type='info'
-            )
-            
-            # Send email notification to admins
-            if admin.email:
-                EmailService.send_email('order_confirmation', admin.email, admin_context)
-        
         # Redirect to payment page based on selected method
         if payment_method == 'card':
             return redirect('payments:stripe_payment', order_id=order.id)
@@ -573,6 +335,7 @@ def checkout(request):
         'coupon': coupon,
         'discount': discount,
         'total_with_discount': total_with_discount,
+        'related_products': get_related_products_for([item.product_id for item in cart_items], limit=3),
     }
     return render(request, 'core/checkout.html', context)
 
@@ -599,51 +362,34 @@ def admin_panel(request):
     # Dashboard statistics
     total_products = Product.objects.count()
     total_customers = User.objects.filter(role__name='customer').count()
-    total_orders = Order.objects.count()
-    total_revenue = Order.objects.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
+    order_totals = get_order_totals()
+    total_orders = order_totals['total_orders']
+    total_revenue = order_totals['total_revenue']
     
     # Recent orders
     recent_orders = Order.objects.order_by('-created_at')[:5]
     
     # Sales analytics (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    sales_data = Order.objects.filter(
-        created_at__gte=thirty_days_ago
-    ).extra(select={
-        'day': 'date(created_at)'
-    }).values('day').annotate(
-        total_sales=Sum('total_amount'),
-        order_count=Count('id')
-    ).order_by('day')
+    sales_data = get_series('sales', timezone.localdate() - timedelta(days=29))
     
     # Top selling products
-    top_products = Product.objects.annotate(
-        order_count=Count('orderitem')
-    ).filter(order_count__gt=0).order_by('-order_count')[:5]
+    top_products = get_top_products(5)
     
     # Order status distribution
-    order_status_data = Order.objects.values('order_status').annotate(
-        count=Count('id')
-    )
+    order_status_data = get_order_status_counts()
     
     # Enhanced product analytics
     # Low stock products
     low_stock_products = Product.objects.filter(stock__lte=10, is_active=True).order_by('stock')[:5]
     
     # Best rated products (with at least 3 reviews)
-    best_rated_products = Product.objects.annotate(
-        avg_rating=Avg('reviews__rating'),
-        review_count=Count('reviews')
-    ).filter(
+    best_rated_products = Product.objects.filter(
         review_count__gte=3,
         is_active=True
     ).order_by('-avg_rating')[:5]
     
     # Worst rated products (with at least 3 reviews)
-    worst_rated_products = Product.objects.annotate(
-        avg_rating=Avg('reviews__rating'),
-        review_count=Count('reviews')
-    ).filter(
+    worst_rated_products = Product.objects.filter(
         review_count__gte=3,
         is_active=True
     ).order_by('avg_rating')[:5]
@@ -655,11 +401,7 @@ def admin_panel(request):
     ).order_by('name')[:5]
     
     # Category performance
-    category_performance = Category.objects.annotate(
-        product_count=Count('products'),
-        total_sales=Sum('products__orderitem__quantity'),
-        avg_rating=Avg('products__reviews__rating')
-    ).filter(product_count__gt=0).order_by('-total_sales')
+    category_performance = get_category_performance()
     
     # Recent product reviews
     recent_reviews = ProductReview.objects.select_related('product', 'user').order_by('-created_at')[:5]
@@ -872,31 +614,19 @@ def product_analytics(request):
         return redirect('core:dashboard')
     
     # Get date range filter
-    days = int(request.GET.get('days', 30))
-    start_date = timezone.now() - timedelta(days=days)
+    days = parse_days(request.GET.get('days'))
+    period = request.GET.get('period')
+    if period not in PERIODS:
+        period = default_period(days)
     
     # Product sales over time
-    sales_over_time = OrderItem.objects.filter(
-        order__created_at__gte=start_date
-    ).extra(select={
-        'day': 'date(orders_order.created_at)'
-    }).values('day').annotate(
-        total_quantity=Sum('quantity'),
-        total_revenue=Sum(F('quantity') * F('price'))
-    ).order_by('day')
+    sales_over_time = get_series('product_sales', timezone.localdate() - timedelta(days=days - 1), period=period)
     
     # Top selling products
-    top_selling_products = Product.objects.annotate(
-        total_sold=Sum('orderitem__quantity'),
-        total_revenue=Sum(F('orderitem__quantity') * F('orderitem__price'))
-    ).filter(total_sold__gt=0).order_by('-total_sold')[:10]
+    top_selling_products = get_top_products(10, order_by='total_sold')
     
     # Product performance by category
-    category_performance = Category.objects.annotate(
-        total_products=Count('products'),
-        total_sold=Sum('products__orderitem__quantity'),
-        total_revenue=Sum(F('products__orderitem__quantity') * F('products__orderitem__price'))
-    ).filter(total_products__gt=0).order_by('-total_sold')
+    category_performance = get_category_performance()
     
     # Inventory analytics
     inventory_stats = {
@@ -927,9 +657,40 @@ def product_analytics(request):
         'review_stats': review_stats,
         'rating_distribution': list(rating_distribution),
         'days': days,
+        'period': period,
+        'periods': PERIODS,
+        'export_links': [(name, label) for name, (label, _) in DATASETS.items()],
+        'export_formats': available_formats(),
     }
     return render(request, 'core/product_analytics.html', context)
 
+@login_required
+def product_analytics_export(request, dataset):
+    """Stream an analytics dataset as CSV or Parquet"""
+    if request.user.role.name != 'admin':
+        messages.error(request, 'Access denied. Admin privileges required.')
+        return redirect('core:dashboard')
+    
+    export_format = request.GET.get('format', 'csv')
+    if dataset not in DATASETS or export_format not in available_formats():
+        raise Http404("Export not available")
+    
+    # Without ?days= the whole history is exported
+    days = parse_days(request.GET['days']) if request.GET.get('days') else None
+    period = request.GET.get('period')
+    if period not in PERIODS:
+        period = default_period(days or 30)
+    
+    content_type, extension, stream = FORMATS[export_format]
+    _, export = DATASETS[dataset]
+    columns, rows = export(days=days, period=period)
+    response = StreamingHttpResponse(
+        streaming_content(request, stream(columns, rows)),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = f'attachment; filename="{dataset}_{timezone.localdate().isoformat()}.{extension}"'
+    return response
+
 @csrf_protect
 def login_view(request):
     """User login"""
@@ -996,164 +757,40 @@ def logout_view(request):
     messages.success(request, 'You have been logged out successfully.')
     return redirect('core:home')
 
-def get_footer_content():
-    """Get the active footer content"""
-    try:
-        return FooterContent.objects.get(is_active=True)
-    except FooterContent.DoesNotExist:
-        # Return a default footer content if none is active
-        return None
-
-def chocolates_category(request):
-    """Chocolates category page"""
-    try:
-        chocolates_category = Category.objects.get(name='Chocolates')
-        products = Product.objects.filter(
-            category=chocolates_category, 
-            is_active=True
-        ).select_related('category')
-    except Category.DoesNotExist:
-        products = Product.objects.none()
-        chocolates_category = None
-    
-    # Apply the same filters as the general shop view
-    search_query = request.GET.get('search', '')
-    if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) | 
-            Q(description__icontains=search_query) |
-            Q(tags__icontains=search_query)
-        )
-    
-    # Price filter
-    min_price = request.GET.get('min_price', '')
-    max_price = request.GET.get('max_price', '')
-    if min_price:
-        products = products.filter(price__gte=min_price)
-    if max_price:
-        products = products.filter(price__lte=max_price)
-    
-    # Stock filter
-    in_stock_filter = request.GET.get('in_stock', '')
-    if in_stock_filter:
-        products = products.filter(stock__gt=0)
-    
-    # Sale filter
-    on_sale_filter = request.GET.get('on_sale', '')
-    if on_sale_filter:
-        products = products.filter(discount_percent__gt=0)
-    
-    # Sort functionality
-    sort_by = request.GET.get('sort', 'name')
-    if sort_by == 'price_low':
-        products = products.order_by('price')
-    elif sort_by == 'price_high':
-        products = products.order_by('-price')
-    elif sort_by == 'newest':
-        products = products.order_by('-created_at')
-    elif sort_by == 'popularity':
-        # Order by number of reviews or featured status
-        products = products.annotate(
-            avg_rating=Avg('reviews__rating'),
-            review_count=Count('reviews')
-        ).order_by('-avg_rating', '-review_count', '-is_featured')
-    elif sort_by == 'rating':
-        products = products.annotate(avg_rating=Avg('reviews__rating')).order_by('-avg_rating')
+def render_category_page(request, category, category_name):
+    """Render a category listing page through the shared catalog query engine"""
+    if category is not None:
+        query = CatalogQuery(request.GET, category=category)
+        page_obj = query.get_page(request.GET.get('page'))
+        sort_by = query.sort
     else:
-        products = products.order_by('name')
-    
-    # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(products, 9)  # Show 9 products per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+        page_obj = Paginator([], PRODUCTS_PER_PAGE).get_page(1)
+        sort_by = request.GET.get('sort', 'name')
     
     context = {
         'products': page_obj,
-        'category': chocolates_category,
-        'search_query': search_query,
-        'min_price': min_price,
-        'max_price': max_price,
-        'in_stock_filter': in_stock_filter,
-        'on_sale_filter': on_sale_filter,
+        'category': category,
+        'search_query': request.GET.get('search', ''),
+        'min_price': request.GET.get('min_price', ''),
+        'max_price': request.GET.get('max_price', ''),
+        'in_stock_filter': request.GET.get('in_stock', ''),
+        'on_sale_filter': request.GET.get('on_sale', ''),
         'sort_by': sort_by,
-        'category_name': 'Chocolates'
+        'category_name': category_name
     }
     return render(request, 'core/category.html', context)
 
+def category_products(request, category_slug):
+    """Listing page for any active category, addressed by its slug"""
+    category = get_category_by_slug(category_slug)
+    if category is None:
+        raise Http404('Category not found')
+    return render_category_page(request, category, category.name)
+
+def chocolates_category(request):
+    """Chocolates category page"""
+    return render_category_page(request, get_category_by_slug('chocolates'), 'Chocolates')
+
 def spices_category(request):
     """Spices category page"""
-    try:
-        spices_category = Category.objects.get(name='Spices')
-        products = Product.objects.filter(
-            category=spices_category, 
-            is_active=True
-        ).select_related('category')
-    except Category.DoesNotExist:
-        products = Product.objects.none()
-        spices_category = None
-    
-    # Apply the same filters as the general shop view
-    search_query = request.GET.get('search', '')
-    if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) | 
-            Q(description__icontains=search_query) |
-            Q(tags__icontains=search_query)
-        )
-    
-    # Price filter
-    min_price = request.GET.get('min_price', '')
-    max_price = request.GET.get('max_price', '')
-    if min_price:
-        products = products.filter(price__gte=min_price)
-    if max_price:
-        products = products.filter(price__lte=max_price)
-    
-    # Stock filter
-    in_stock_filter = request.GET.get('in_stock', '')
-    if in_stock_filter:
-        products = products.filter(stock__gt=0)
-    
-    # Sale filter
-    on_sale_filter = request.GET.get('on_sale', '')
-    if on_sale_filter:
-        products = products.filter(discount_percent__gt=0)
-    
-    # Sort functionality
-    sort_by = request.GET.get('sort', 'name')
-    if sort_by == 'price_low':
-        products = products.order_by('price')
-    elif sort_by == 'price_high':
-        products = products.order_by('-price')
-    elif sort_by == 'newest':
-        products = products.order_by('-created_at')
-    elif sort_by == 'popularity':
-        # Order by number of reviews or featured status
-        products = products.annotate(
-            avg_rating=Avg('reviews__rating'),
-            review_count=Count('reviews')
-        ).order_by('-avg_rating', '-review_count', '-is_featured')
-    elif sort_by == 'rating':
-        products = products.annotate(avg_rating=Avg('reviews__rating')).order_by('-avg_rating')
-    else:
-        products = products.order_by('name')
-    
-    # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(products, 9)  # Show 9 products per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    context = {
-        'products': page_obj,
-        'category': spices_category,
-        'search_query': search_query,
-        'min_price': min_price,
-        'max_price': max_price,
-        'in_stock_filter': in_stock_filter,
-        'on_sale_filter': on_sale_filter,
-        'sort_by': sort_by,
-        'category_name': 'Spices'
-    }
-    return render(request, 'core/category.html', context)
+    return render_category_page(request, get_category_by_slug('spices'), 'Spices')
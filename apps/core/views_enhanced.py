@@ -1,17 +1,18 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Avg, Sum, Count, F
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_protect
 from django.http import JsonResponse
 from datetime import timedelta
-from apps.shop.models import Product, Category, ProductReview
+from apps.shop.models import Product, ProductReview
 from apps.orders.models import Order, CartItem, OrderItem
 from apps.users.models import User, Customer
 from apps.cms.models import Banner, Testimonial, HomePageHero, FooterContent, HomePageFeature
 from apps.blog.models import Comment
 from apps.marketing.models import Coupon
+from apps.metrics.queries import get_order_totals, get_order_status_counts, get_top_products, get_category_performance
+from apps.metrics.series import get_series
 
 @login_required
 def enhanced_admin_panel(request):
@@ -23,52 +24,34 @@ def enhanced_admin_panel(request):
     # Dashboard statistics
     total_products = Product.objects.count()
     total_customers = User.objects.filter(role__name='customer').count()
-    total_orders = Order.objects.count()
-    total_revenue = Order.objects.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
+    order_totals = get_order_totals()
+    total_orders = order_totals['total_orders']
+    total_revenue = order_totals['total_revenue']
     
     # Recent orders
     recent_orders = Order.objects.order_by('-created_at')[:5]
     
     # Sales analytics (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    sales_data = Order.objects.filter(
-        created_at__gte=thirty_days_ago
-    ).extra(select={
-        'day': 'date(created_at)'
-    }).values('day').annotate(
-        total_sales=Sum('total_amount'),
-        order_count=Count('id')
-    ).order_by('day')
+    sales_data = get_series('sales', timezone.localdate() - timedelta(days=29))
     
     # Top selling products
-    top_products = Product.objects.annotate(
-        order_count=Count('orderitem')
-    ).filter(order_count__gt=0).order_by('-order_count')[:5]
+    top_products = get_top_products(5)
     
     # Order status distribution
-    order_status_data = Order.objects.values('order_status').annotate(
-        count=Count('id')
-    )
+    order_status_data = get_order_status_counts()
     
     # Enhanced product analytics
     # Low stock products
     low_stock_products = Product.objects.filter(stock__lte=10, is_active=True).order_by('stock')[:5]
     
     # Best rated products (with at least 3 reviews)
-    best_rated_products = Product.objects.annotate(
-        avg_rating=Avg('reviews__rating'),
-        review_count=Count('reviews')
-    ).filter(
+    best_rated_products = Product.objects.filter(
         review_count__gte=3,
         is_active=True
     ).order_by('-avg_rating')[:5]
     
     # Category performance
-    category_performance = Category.objects.annotate(
-        product_count=Count('products'),
-        total_sales=Sum('products__orderitem__quantity'),
-        avg_rating=Avg('products__reviews__rating')
-    ).filter(product_count__gt=0).order_by('-total_sales')
+    category_performance = get_category_performance()
     
     # Recent product reviews
     recent_reviews = ProductReview.objects.select_related('product', 'user').order_by('-created_at')[:5]
@@ -0,0 +1,63 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.jobs.queue import run_due_jobs, purge_succeeded_jobs
+
+# Seconds between deletions of old succeeded jobs
+PURGE_INTERVAL = 60 * 60
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (emails, notifications) until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run jobs until none are due, then exit'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Maximum number of jobs fetched per poll (default: 100)'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Seconds to wait when no jobs are due (default: 2)'
+        )
+
+    def handle(self, *args, **options):
+        totals = {'succeeded': 0, 'pending': 0, 'failed': 0}
+        last_purge = None
+        try:
+            while True:
+                results = run_due_jobs(options['batch_size'])
+                for status, count in results.items():
+                    totals[status] += count
+                
+                ran = sum(results.values())
+                if ran and options['verbosity'] > 1:
+                    self.stdout.write(
+                        f"Ran {ran} jobs: {results['succeeded']} succeeded, "
+                        f"{results['pending']} will be retried, {results['failed']} failed"
+                    )
+                
+                if not ran:
+                    if last_purge is None or time.monotonic() - last_purge >= PURGE_INTERVAL:
+                        purged = purge_succeeded_jobs()
+                        last_purge = time.monotonic()
+                        if purged and options['verbosity'] > 1:
+                            self.stdout.write(f"Deleted {purged} old succeeded jobs")
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully ran {sum(totals.values())} jobs: {totals['succeeded']} succeeded, "
+                f"{totals['pending']} will be retried, {totals['failed']} failed"
+            )
+        )
@@ -0,0 +1,177 @@
+"""Database-backed job queue
+
+Work that does not need to happen inside a request (emails, fan-out
+notifications) is enqueued as a Job row and executed by the run_jobs
+worker command. Because the row is written in the caller's transaction, a
+job only becomes visible once the work that produced it has committed.
+
+Handlers are plain functions registered with @job('app.name') in an app's
+tasks module; their keyword arguments are stored as the JSON payload. A
+handler that raises is retried with exponential backoff until it runs out
+of attempts. Passing an idempotency_key makes enqueueing the same work
+twice a no-op. With coalesce=True the key only merges work into a job
+that has not started yet: once it is running a new job takes over the
+key, so refreshes that recompute from the database are queued at most
+once without missing changes made while one runs.
+
+With settings.JOB_QUEUE_SYNC = True jobs run as soon as they are
+enqueued (after the surrounding transaction commits), which is what
+tests and local development without a worker want.
+
+Succeeded jobs are deleted by the worker once they are older than
+JOB_RETENTION_DAYS. Their idempotency keys go with them, so the same key
+can only be enqueued again after that; failed jobs are kept for
+inspection.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = getattr(settings, 'JOB_MAX_ATTEMPTS', 5)
+BACKOFF_BASE_SECONDS = getattr(settings, 'JOB_BACKOFF_BASE_SECONDS', 30)
+BACKOFF_MAX_SECONDS = getattr(settings, 'JOB_BACKOFF_MAX_SECONDS', 60 * 60)
+# A running job whose worker has not finished it within this time is
+# assumed to have died and is picked up again
+LOCK_TIMEOUT = timedelta(seconds=getattr(settings, 'JOB_LOCK_TIMEOUT_SECONDS', 10 * 60))
+RETENTION = timedelta(days=getattr(settings, 'JOB_RETENTION_DAYS', 7))
+PURGE_BATCH_SIZE = 1000
+
+_handlers = {}
+
+
+def job(name):
+    """Register a function as the handler for jobs called `name`"""
+    def register(func):
+        _handlers[name] = func
+        return func
+    return register
+
+
+def is_sync():
+    return getattr(settings, 'JOB_QUEUE_SYNC', False)
+
+
+def enqueue(name, idempotency_key=None, run_at=None, max_attempts=DEFAULT_MAX_ATTEMPTS, coalesce=False, **payload):
+    """Queue a call of the handler `name` with `payload` as keyword arguments"""
+    if name not in _handlers:
+        raise ValueError(f"No job handler registered for '{name}'")
+
+    fields = {
+        'name': name,
+        'payload': payload,
+        'run_at': run_at or timezone.now(),
+        'max_attempts': max_attempts,
+    }
+    if idempotency_key is None:
+        queued_job = Job.objects.create(**fields)
+    else:
+        try:
+            with transaction.atomic():
+                queued_job = Job.objects.create(idempotency_key=idempotency_key, **fields)
+        except IntegrityError:
+            existing = Job.objects.get(idempotency_key=idempotency_key)
+            # Touching a pending job locks its row until this transaction
+            # commits, so a worker cannot start it before the change is visible
+            if not coalesce or Job.objects.filter(pk=existing.pk, status='pending').update(updated_at=timezone.now()):
+                return existing
+            # The job has started and may not see this change: hand the
+            # key over to a new one
+            Job.objects.filter(pk=existing.pk).update(idempotency_key=None)
+            try:
+                with transaction.atomic():
+                    queued_job = Job.objects.create(idempotency_key=idempotency_key, **fields)
+            except IntegrityError:
+                return Job.objects.get(idempotency_key=idempotency_key)
+
+    if is_sync():
+        transaction.on_commit(lambda: run_job(queued_job.pk))
+    return queued_job
+
+
+def backoff(attempts):
+    """Delay before retrying a job that has failed `attempts` times"""
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def claim(job_id):
+    """Mark a due job as running; False if another worker got it first"""
+    now = timezone.now()
+    return bool(Job.objects.filter(
+        Q(status='pending', run_at__lte=now) | Q(status='running', locked_at__lt=now - LOCK_TIMEOUT),
+        pk=job_id
+    ).update(status='running', locked_at=now))
+
+
+def run_job(job_id):
+    """Claim and execute one job
+
+    Returns the job with its new status (pending again if it will be
+    retried), or None if the job was not due or already claimed.
+    """
+    if not claim(job_id):
+        return None
+
+    queued_job = Job.objects.get(pk=job_id)
+    queued_job.attempts += 1
+    try:
+        handler = _handlers[queued_job.name]
+        handler(**queued_job.payload)
+    except Exception as e:
+        logger.error(f"Job {queued_job} failed (attempt {queued_job.attempts}/{queued_job.max_attempts}): {str(e)}")
+        queued_job.last_error = traceback.format_exc()
+        if queued_job.attempts < queued_job.max_attempts:
+            queued_job.status = 'pending'
+            queued_job.run_at = timezone.now() + backoff(queued_job.attempts)
+        else:
+            queued_job.status = 'failed'
+            queued_job.finished_at = timezone.now()
+        queued_job.locked_at = None
+        queued_job.save()
+        return queued_job
+
+    queued_job.status = 'succeeded'
+    queued_job.locked_at = None
+    queued_job.finished_at = timezone.now()
+    queued_job.save()
+    return queued_job
+
+
+def due_job_ids(limit):
+    now = timezone.now()
+    return list(
+        Job.objects.filter(
+            Q(status='pending', run_at__lte=now) | Q(status='running', locked_at__lt=now - LOCK_TIMEOUT)
+        ).order_by('run_at').values_list('id', flat=True)[:limit]
+    )
+
+
+def run_due_jobs(limit=100):
+    """Run up to `limit` due jobs and return how many ended in each status"""
+    results = {'succeeded': 0, 'pending': 0, 'failed': 0}
+    for job_id in due_job_ids(limit):
+        finished_job = run_job(job_id)
+        if finished_job is not None:
+            results[finished_job.status] += 1
+    return results
+
+
+def purge_succeeded_jobs(older_than=RETENTION):
+    """Delete jobs that succeeded more than `older_than` ago and return how many"""
+    cutoff = timezone.now() - older_than
+    deleted = 0
+    while True:
+        job_ids = list(
+            Job.objects.filter(status='succeeded', finished_at__lt=cutoff).values_list('id', flat=True)[:PURGE_BATCH_SIZE]
+        )
+        if not job_ids:
+            return deleted
+        deleted += Job.objects.filter(id__in=job_ids).delete()[0]
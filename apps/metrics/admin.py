@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import DailyOrderMetrics, DailyProductMetrics, DailyCategoryMetrics
+
+@admin.register(DailyOrderMetrics)
+class DailyOrderMetricsAdmin(admin.ModelAdmin):
+    list_display = ['date', 'order_status', 'order_count', 'revenue']
+    list_filter = ['order_status', 'date']
+
+@admin.register(DailyProductMetrics)
+class DailyProductMetricsAdmin(admin.ModelAdmin):
+    list_display = ['date', 'product', 'quantity_sold', 'revenue', 'order_count', 'review_count']
+    list_filter = ['date']
+    search_fields = ['product__name']
+
+@admin.register(DailyCategoryMetrics)
+class DailyCategoryMetricsAdmin(admin.ModelAdmin):
+    list_display = ['date', 'category', 'quantity_sold', 'revenue', 'order_count', 'review_count']
+    list_filter = ['date', 'category']
@@ -0,0 +1,216 @@
+"""Streamed exports of the product analytics datasets
+
+Each dataset is a list of (column, type) pairs plus an iterator of row
+tuples. Large datasets read the database with iterator(chunk_size=...),
+which uses a server-side cursor where the backend supports one, and rows
+are encoded and sent a chunk at a time, so a full-history export runs in
+constant memory however many order lines there are.
+
+CSV is always available. Parquet is offered when pyarrow is installed;
+each chunk of rows becomes one row group that is flushed to the client as
+soon as it is written.
+
+Every dataset covers the last `days` days, today included, or the whole
+history when days is None.
+
+Under ASGI a synchronous iterator given to StreamingHttpResponse is read
+into a list before anything is sent, so for ASGI requests the chunks are
+pulled one at a time through sync_to_async instead.
+"""
+import csv
+from datetime import timedelta
+from importlib.util import find_spec
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.orders.models import OrderItem
+from apps.shop.models import Product
+from .queries import get_category_performance
+from .rollups import day_bounds, first_activity_date
+from .series import get_series
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'METRICS_EXPORT_CHUNK_SIZE', 2000)
+
+
+def first_day(days):
+    """The first day of the last `days` days, or None for the whole history"""
+    return timezone.localdate() - timedelta(days=days - 1) if days else None
+
+
+def sales_over_time(days=None, period='day'):
+    start = first_day(days) or first_activity_date() or timezone.localdate()
+    columns = [('day', 'date'), ('total_quantity', 'int'), ('total_revenue', 'decimal')]
+    rows = (
+        (row['day'], row['total_quantity'], row['total_revenue'])
+        for row in get_series('product_sales', start, period=period)
+    )
+    return columns, rows
+
+
+def top_sellers(days=None, period=None):
+    columns = [
+        ('product_id', 'int'), ('product', 'str'), ('category', 'str'),
+        ('total_sold', 'int'), ('total_revenue', 'decimal'), ('order_count', 'int'),
+    ]
+    products = Product.objects.all()
+    if days:
+        products = products.filter(daily_metrics__date__gte=first_day(days))
+    rows = products.annotate(
+        total_sold=Sum('daily_metrics__quantity_sold'),
+        total_revenue=Sum('daily_metrics__revenue'),
+        order_count=Sum('daily_metrics__order_count')
+    ).filter(total_sold__gt=0).order_by('-total_sold', 'pk').values_list(
+        'pk', 'name', 'category__name', 'total_sold', 'total_revenue', 'order_count'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return columns, rows
+
+
+def category_performance(days=None, period=None):
+    columns = [
+        ('category_id', 'int'), ('category', 'str'), ('total_products', 'int'),
+        ('total_sold', 'int'), ('total_revenue', 'decimal'), ('avg_rating', 'float'),
+    ]
+    rows = (
+        (
+            category.pk, category.name, category.total_products, category.total_sold,
+            category.total_revenue, category.avg_rating
+        )
+        for category in get_category_performance(since=first_day(days))
+    )
+    return columns, rows
+
+
+def order_lines(days=None, period=None):
+    columns = [
+        ('order_number', 'str'), ('ordered_at', 'datetime'), ('order_status', 'str'),
+        ('payment_status', 'str'), ('product_id', 'int'), ('product', 'str'), ('category', 'str'),
+        ('quantity', 'int'), ('price', 'decimal'),
+    ]
+    items = OrderItem.objects.all()
+    if days:
+        items = items.filter(order__created_at__gte=day_bounds(first_day(days), timezone.localdate())[0])
+    rows = items.order_by('pk').values_list(
+        'order__order_number', 'order__created_at', 'order__order_status', 'order__payment_status',
+        'product_id', 'product__name', 'product__category__name', 'quantity', 'price'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return columns, rows
+
+
+DATASETS = {
+    # name: (label, rows function)
+    'sales_over_time': ('Sales over time', sales_over_time),
+    'top_sellers': ('Top sellers', top_sellers),
+    'category_performance': ('Category performance', category_performance),
+    'order_lines': ('Order lines', order_lines),
+}
+
+
+def chunked(rows, size=EXPORT_CHUNK_SIZE):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+class Echo:
+    """A file-like object that hands back what is written to it"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for chunk in chunked(rows):
+        yield ''.join(writer.writerow(row) for row in chunk)
+
+
+class ChunkSink:
+    """A write-only file that keeps what was written until it is drained"""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def parquet_available():
+    return find_spec('pyarrow') is not None
+
+
+def stream_parquet(columns, rows):
+    import pyarrow
+    import pyarrow.parquet
+
+    types = {
+        'str': pyarrow.string(),
+        'int': pyarrow.int64(),
+        'float': pyarrow.float64(),
+        'decimal': pyarrow.decimal128(18, 2),
+        'date': pyarrow.date32(),
+        'datetime': pyarrow.timestamp('us', tz='UTC'),
+    }
+    schema = pyarrow.schema([(name, types[kind]) for name, kind in columns])
+    sink = ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    try:
+        for chunk in chunked(rows):
+            writer.write_table(pyarrow.Table.from_pylist(
+                [dict(zip(schema.names, row)) for row in chunk],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+FORMATS = {
+    # format: (content type, file extension, streamer)
+    'csv': ('text/csv', 'csv', stream_csv),
+    'parquet': ('application/vnd.apache.parquet', 'parquet', stream_parquet),
+}
+
+
+def available_formats():
+    return [name for name in FORMATS if name != 'parquet' or parquet_available()]
+
+
+async def iterate_async(chunks):
+    chunks = iter(chunks)
+    # thread_sensitive keeps every read on the thread holding the connection
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield chunk
+
+
+def streaming_content(request, chunks):
+    """Chunks in the form StreamingHttpResponse can stream for this request"""
+    if isinstance(request, ASGIRequest):
+        return iterate_async(chunks)
+    return chunks
@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.metrics.rollups import refresh_range, first_activity_date
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily order, product and category metrics from orders and reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Rebuild only the last N days (default: everything since the first order or review)'
+        )
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            help='First day to rebuild (YYYY-MM-DD)'
+        )
+        parser.add_argument(
+            '--end',
+            type=date.fromisoformat,
+            help='Last day to rebuild (YYYY-MM-DD, default: today)'
+        )
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=31,
+            help='Days rebuilt per transaction (default: 31)'
+        )
+
+    def handle(self, *args, **options):
+        end = options['end'] or timezone.localdate()
+        if options['days'] is not None:
+            start = end - timedelta(days=options['days'] - 1)
+        else:
+            start = options['start'] or first_activity_date()
+        if start is None:
+            self.stdout.write(self.style.SUCCESS('No orders or reviews to roll up.'))
+            return
+        if start > end:
+            raise CommandError('The start date is after the end date.')
+
+        def progress(chunk_start, chunk_end):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"Rebuilt {chunk_start} to {chunk_end - timedelta(days=1)}")
+
+        refresh_range(start, end + timedelta(days=1), chunk_days=options['chunk_days'], progress=progress)
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt metrics from {start} to {end}.')
+        )
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('shop', '0008_product_co_purchases'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOrderMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('order_status', models.CharField(max_length=15)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name_plural': 'daily order metrics',
+                'ordering': ['date'],
+                'unique_together': {('date', 'order_status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCategoryMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity_sold', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='shop.category')),
+            ],
+            options={
+                'verbose_name_plural': 'daily category metrics',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['category', 'date'], name='metrics_dai_categor_69e90e_idx')],
+                'unique_together': {('date', 'category')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity_sold', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('order_count', models.PositiveIntegerField(default=0, help_text='Order lines containing the product')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='shop.product')),
+            ],
+            options={
+                'verbose_name_plural': 'daily product metrics',
+                'ordering': ['date'],
+                'indexes': [models.Index(fields=['product', 'date'], name='metrics_dai_product_26e856_idx')],
+                'unique_together': {('date', 'product')},
+            },
+        ),
+    ]
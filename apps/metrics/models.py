@@ -0,0 +1,59 @@
+from django.db import models
+from apps.shop.models import Product, Category
+
+class DailyOrderMetrics(models.Model):
+    """Orders and revenue per day and order status"""
+    date = models.DateField()
+    order_status = models.CharField(max_length=15)
+    order_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ['date', 'order_status']
+        verbose_name_plural = 'daily order metrics'
+    
+    def __str__(self):
+        return f"{self.date} {self.order_status}: {self.order_count} orders"
+
+class DailyProductMetrics(models.Model):
+    """Sales and review facts per day and product"""
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_metrics')
+    quantity_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0, help_text="Order lines containing the product")
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ['date', 'product']
+        indexes = [
+            models.Index(fields=['product', 'date']),
+        ]
+        verbose_name_plural = 'daily product metrics'
+    
+    def __str__(self):
+        return f"{self.date} {self.product.name}: {self.quantity_sold} sold"
+
+class DailyCategoryMetrics(models.Model):
+    """Sales and review facts per day and category, summed from product facts"""
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_metrics')
+    quantity_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ['date', 'category']
+        indexes = [
+            models.Index(fields=['category', 'date']),
+        ]
+        verbose_name_plural = 'daily category metrics'
+    
+    def __str__(self):
+        return f"{self.date} {self.category.name}: {self.quantity_sold} sold"
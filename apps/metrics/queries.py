@@ -0,0 +1,60 @@
+"""Dashboard figures read from the daily rollup tables"""
+from django.db.models import Count, Sum
+
+from apps.shop.models import Product, Category
+from .models import DailyOrderMetrics, DailyCategoryMetrics
+
+
+def get_order_totals():
+    """Number of orders and revenue over all time"""
+    totals = DailyOrderMetrics.objects.aggregate(orders=Sum('order_count'), revenue=Sum('revenue'))
+    return {'total_orders': totals['orders'] or 0, 'total_revenue': totals['revenue'] or 0}
+
+
+def get_order_status_counts():
+    """[{'order_status', 'count'}] over all time"""
+    return list(
+        DailyOrderMetrics.objects.values('order_status').annotate(
+            count=Sum('order_count')
+        ).order_by('order_status')
+    )
+
+
+def get_top_products(limit, order_by='order_count'):
+    """Best selling products annotated with order_count, total_sold and total_revenue"""
+    return Product.objects.annotate(
+        order_count=Sum('daily_metrics__order_count'),
+        total_sold=Sum('daily_metrics__quantity_sold'),
+        total_revenue=Sum('daily_metrics__revenue')
+    ).filter(**{f'{order_by}__gt': 0}).select_related('category').order_by(f'-{order_by}')[:limit]
+
+
+def get_category_performance(since=None):
+    """Categories with products, annotated with their sales and ratings
+
+    Each category gets product_count (also as total_products),
+    total_sales (also as total_sold), total_revenue and avg_rating, and
+    the list is ordered by units sold. Sales and ratings are counted from
+    the day `since` onwards, or over all time.
+    """
+    metrics = DailyCategoryMetrics.objects.all()
+    if since is not None:
+        metrics = metrics.filter(date__gte=since)
+    facts = {
+        row['category_id']: row
+        for row in metrics.values('category_id').annotate(
+            sold=Sum('quantity_sold'),
+            revenue=Sum('revenue'),
+            reviews=Sum('review_count'),
+            ratings=Sum('rating_sum')
+        ).order_by()
+    }
+    categories = list(Category.objects.annotate(product_count=Count('products')).filter(product_count__gt=0))
+    for category in categories:
+        row = facts.get(category.pk, {})
+        category.total_products = category.product_count
+        category.total_sales = category.total_sold = row.get('sold') or 0
+        category.total_revenue = row.get('revenue') or 0
+        category.avg_rating = row['ratings'] / row['reviews'] if row.get('reviews') else None
+    categories.sort(key=lambda category: category.total_sales, reverse=True)
+    return categories
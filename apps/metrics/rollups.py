@@ -0,0 +1,253 @@
+"""Daily rollups of orders, sales and reviews
+
+The dashboards read DailyOrderMetrics, DailyProductMetrics and
+DailyCategoryMetrics instead of aggregating orders, order items and
+reviews on every page view. Rows are keyed by the local date in the
+store's time zone.
+
+Every refresh recomputes its rows from the source tables for a range of
+days, optionally narrowed to some products, so running one twice or
+after a retry gives the same result. The signals in apps.metrics.signals
+queue a refresh of just the day and products touched when an order is
+placed, changes status or a review is written; the backfill_metrics
+command rebuilds any range in full. Only approved reviews count towards
+the rating facts, as on the product pages.
+
+The tables start empty: after deploying them, run backfill_metrics once
+to roll up the existing history.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderItem
+from apps.shop.models import Product, ProductReview
+from .models import DailyOrderMetrics, DailyProductMetrics, DailyCategoryMetrics
+from .series import bump_metrics_version
+
+ORDER_FIELDS = ['order_count', 'revenue']
+SALES_FIELDS = ['quantity_sold', 'revenue', 'order_count']
+RATING_FIELDS = ['review_count', 'rating_sum']
+FACT_FIELDS = SALES_FIELDS + RATING_FIELDS
+BATCH_SIZE = 500
+
+
+def local_date(value):
+    """The store's calendar day for a datetime"""
+    return timezone.localdate(value)
+
+
+def day_bounds(start, end):
+    """Aware datetimes spanning the local days [start, end)"""
+    return (
+        timezone.make_aware(datetime.combine(start, time.min)),
+        timezone.make_aware(datetime.combine(end, time.min)),
+    )
+
+
+def past_totals(keys, update_fields, rows):
+    """{row key: facts} of the rows dated before today that have any facts"""
+    today = timezone.localdate()
+    totals = {}
+    for row in rows:
+        facts = tuple(row.get(field) or 0 for field in update_fields)
+        if row['date'] < today and any(facts):
+            totals[tuple(row[key] for key in keys)] = facts
+    return totals
+
+
+def replace_rows(model, scope, start, unique_fields, update_fields, rows):
+    """Make the rows in scope, which begins on `start`, match freshly aggregated rows
+
+    Rows that got no new values are zeroed and then removed once none of
+    their facts are left. Changing the totals of a day before today
+    invalidates the cached closed buckets of the sales series; rewriting
+    them with the same values does not.
+    """
+    zero_fields = FACT_FIELDS if model is not DailyOrderMetrics else ORDER_FIELDS
+    rows = list(rows)
+    keys = [model._meta.get_field(field).attname for field in unique_fields]
+    with transaction.atomic():
+        before = None
+        if start < timezone.localdate():
+            before = past_totals(keys, update_fields, scope.values(*keys, *update_fields))
+        scope.update(**{field: 0 for field in update_fields})
+        model.objects.bulk_create(
+            [model(**row) for row in rows],
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+            batch_size=BATCH_SIZE
+        )
+        scope.filter(**{field: 0 for field in zero_fields}).delete()
+    if before is not None and before != past_totals(keys, update_fields, rows):
+        transaction.on_commit(bump_metrics_version)
+
+
+def refresh_order_metrics(start, end):
+    """Recompute order counts and revenue per status for [start, end)"""
+    low, high = day_bounds(start, end)
+    rows = Order.objects.filter(
+        created_at__gte=low,
+        created_at__lt=high
+    ).annotate(
+        day=TruncDate('created_at', tzinfo=timezone.get_current_timezone())
+    ).values('day', 'order_status').annotate(
+        count=Count('id'),
+        total=Sum('total_amount')
+    ).order_by()
+
+    replace_rows(
+        DailyOrderMetrics,
+        DailyOrderMetrics.objects.filter(date__gte=start, date__lt=end),
+        start,
+        ['date', 'order_status'],
+        ORDER_FIELDS,
+        [
+            {'date': row['day'], 'order_status': row['order_status'], 'order_count': row['count'], 'revenue': row['total']}
+            for row in rows
+        ]
+    )
+
+
+def refresh_product_sales(start, end, product_ids=None):
+    """Recompute units sold and revenue per product for [start, end)"""
+    low, high = day_bounds(start, end)
+    items = OrderItem.objects.filter(order__created_at__gte=low, order__created_at__lt=high)
+    scope = DailyProductMetrics.objects.filter(date__gte=start, date__lt=end)
+    if product_ids is not None:
+        items = items.filter(product_id__in=product_ids)
+        scope = scope.filter(product_id__in=product_ids)
+
+    rows = items.annotate(
+        day=TruncDate('order__created_at', tzinfo=timezone.get_current_timezone())
+    ).values('day', 'product_id').annotate(
+        units=Sum('quantity'),
+        total=Sum(F('quantity') * F('price')),
+        lines=Count('id')
+    ).order_by()
+
+    replace_rows(
+        DailyProductMetrics,
+        scope,
+        start,
+        ['date', 'product'],
+        SALES_FIELDS,
+        [
+            {
+                'date': row['day'],
+                'product_id': row['product_id'],
+                'quantity_sold': row['units'],
+                'revenue': row['total'],
+                'order_count': row['lines'],
+            }
+            for row in rows
+        ]
+    )
+
+
+def refresh_product_ratings(start, end, product_ids=None):
+    """Recompute review counts and rating sums of approved reviews per product for [start, end)"""
+    low, high = day_bounds(start, end)
+    reviews = ProductReview.objects.filter(is_approved=True, created_at__gte=low, created_at__lt=high)
+    scope = DailyProductMetrics.objects.filter(date__gte=start, date__lt=end)
+    if product_ids is not None:
+        reviews = reviews.filter(product_id__in=product_ids)
+        scope = scope.filter(product_id__in=product_ids)
+
+    rows = reviews.annotate(
+        day=TruncDate('created_at', tzinfo=timezone.get_current_timezone())
+    ).values('day', 'product_id').annotate(
+        count=Count('id'),
+        total=Sum('rating')
+    ).order_by()
+
+    replace_rows(
+        DailyProductMetrics,
+        scope,
+        start,
+        ['date', 'product'],
+        RATING_FIELDS,
+        [
+            {'date': row['day'], 'product_id': row['product_id'], 'review_count': row['count'], 'rating_sum': row['total']}
+            for row in rows
+        ]
+    )
+
+
+def refresh_category_metrics(start, end, category_ids=None):
+    """Recompute category facts for [start, end) from the product rows"""
+    products = DailyProductMetrics.objects.filter(date__gte=start, date__lt=end)
+    scope = DailyCategoryMetrics.objects.filter(date__gte=start, date__lt=end)
+    if category_ids is not None:
+        products = products.filter(product__category_id__in=category_ids)
+        scope = scope.filter(category_id__in=category_ids)
+
+    rows = products.values('date', 'product__category_id').annotate(
+        **{f'total_{field}': Sum(field) for field in FACT_FIELDS}
+    ).order_by()
+
+    replace_rows(
+        DailyCategoryMetrics,
+        scope,
+        start,
+        ['date', 'category'],
+        FACT_FIELDS,
+        [
+            dict(
+                date=row['date'],
+                category_id=row['product__category_id'],
+                **{field: row[f'total_{field}'] for field in FACT_FIELDS}
+            )
+            for row in rows
+        ]
+    )
+
+
+def category_ids_for(product_ids):
+    return list(Product.objects.filter(pk__in=product_ids).values_list('category_id', flat=True).distinct())
+
+
+def refresh_day(day, product_ids=None, orders=True, sales=True, ratings=True):
+    """Refresh the rollups of one day, for some products or all of them"""
+    end = day + timedelta(days=1)
+    if orders:
+        refresh_order_metrics(day, end)
+    if sales:
+        refresh_product_sales(day, end, product_ids)
+    if ratings:
+        refresh_product_ratings(day, end, product_ids)
+    if sales or ratings:
+        refresh_category_metrics(day, end, None if product_ids is None else category_ids_for(product_ids))
+
+
+def refresh_range(start, end, chunk_days=31, progress=None):
+    """Rebuild every rollup for [start, end), a chunk of days at a time
+
+    progress(chunk_start, chunk_end) is called after each chunk.
+    """
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days), end)
+        refresh_order_metrics(chunk_start, chunk_end)
+        refresh_product_sales(chunk_start, chunk_end)
+        refresh_product_ratings(chunk_start, chunk_end)
+        refresh_category_metrics(chunk_start, chunk_end)
+        if progress is not None:
+            progress(chunk_start, chunk_end)
+        chunk_start = chunk_end
+
+
+def first_activity_date():
+    """The earliest local day with an order or a review, or None"""
+    dates = [
+        value for value in (
+            Order.objects.order_by('created_at').values_list('created_at', flat=True).first(),
+            ProductReview.objects.order_by('created_at').values_list('created_at', flat=True).first(),
+        )
+        if value is not None
+    ]
+    return local_date(min(dates)) if dates else None
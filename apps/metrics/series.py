@@ -0,0 +1,140 @@
+"""Sales time series bucketed by day, week or month
+
+Series are read from the daily rollups, whose dates are already local to
+the store's time zone, so a bucket is a plain calendar day, an ISO week
+starting on Monday or a calendar month. Every bucket in the requested
+range is returned, with zeros for buckets without sales, so charts get an
+evenly spaced axis.
+
+Buckets that ended before today can only change when a refresh changes
+the totals of past days (an old order changing or a backfill), which
+bumps METRICS_VERSION_KEY. They are therefore cached under that version
+for SERIES_CACHE_TIMEOUT, which only bounds how long the keys of old
+versions linger, and only the bucket containing today is queried on
+every call.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import DateField, F, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from apps.core.caching import get_cache_version, bump_cache_version
+from .models import DailyOrderMetrics, DailyProductMetrics
+
+METRICS_VERSION_KEY = 'metrics:version'
+SERIES_CACHE_TIMEOUT = getattr(settings, 'METRICS_SERIES_CACHE_TIMEOUT', 60 * 60 * 24)
+PERIODS = ['day', 'week', 'month']
+# Longest range the dashboards accept through ?days=
+MAX_DAYS = 5 * 366
+
+SERIES = {
+    # name: (model, filters, {value: aggregate})
+    'sales': (DailyOrderMetrics, {}, {'total_sales': Sum('revenue'), 'order_count': Sum('order_count')}),
+    'product_sales': (
+        DailyProductMetrics,
+        {'quantity_sold__gt': 0},
+        {'total_quantity': Sum('quantity_sold'), 'total_revenue': Sum('revenue')}
+    ),
+}
+
+
+def get_metrics_version():
+    return get_cache_version(METRICS_VERSION_KEY)
+
+
+def bump_metrics_version():
+    return bump_cache_version(METRICS_VERSION_KEY)
+
+
+def parse_days(value, default=30):
+    """A ?days= value as a day count between 1 and MAX_DAYS"""
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        return default
+    return min(max(days, 1), MAX_DAYS)
+
+
+def default_period(days):
+    """The coarsest bucket that still gives a readable chart for a range"""
+    if days <= 92:
+        return 'day'
+    if days <= 366:
+        return 'week'
+    return 'month'
+
+
+def bucket_start(day, period):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, period):
+    if period == 'week':
+        return start + timedelta(days=7)
+    if period == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def buckets(start, end, period):
+    """Start dates of the buckets covering the days start to end"""
+    current = bucket_start(start, period)
+    result = []
+    while current <= end:
+        result.append(current)
+        current = next_bucket(current, period)
+    return result
+
+
+def bucket_cache_key(name, period, start, version):
+    return f'metrics:{version}:series:{name}:{period}:{start.isoformat()}'
+
+
+def query_buckets(name, period, start, end):
+    """Aggregate the rollups of [start, end) by bucket"""
+    model, filters, values = SERIES[name]
+    rows = model.objects.filter(date__gte=start, date__lt=end, **filters)
+    if period == 'day':
+        rows = rows.values(bucket=F('date'))
+    else:
+        rows = rows.values(bucket=Trunc('date', period, output_field=DateField()))
+    return {row.pop('bucket'): row for row in rows.annotate(**values).order_by()}
+
+
+def get_series(name, start, end=None, period='day'):
+    """[{'day': first day of the bucket, <values>}] for the days start to end
+
+    Buckets are whole, so a week or month series starts with the bucket
+    containing `start`.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period '{period}'")
+    today = timezone.localdate()
+    end = end or today
+    _, _, values = SERIES[name]
+    empty = {value: 0 for value in values}
+
+    version = get_metrics_version()
+    starts = buckets(start, end, period)
+    keys = {bucket: bucket_cache_key(name, period, bucket, version) for bucket in starts}
+    cached = cache.get_many(keys.values())
+
+    missing = [bucket for bucket in starts if keys[bucket] not in cached or next_bucket(bucket, period) > today]
+    if missing:
+        fresh = query_buckets(name, period, missing[0], next_bucket(missing[-1], period))
+        closed = {}
+        for bucket in missing:
+            cached[keys[bucket]] = fresh.get(bucket, empty)
+            if next_bucket(bucket, period) <= today:
+                closed[keys[bucket]] = cached[keys[bucket]]
+        if closed:
+            cache.set_many(closed, SERIES_CACHE_TIMEOUT)
+
+    return [dict(cached[keys[bucket]], day=bucket) for bucket in starts]
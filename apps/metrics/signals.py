@@ -0,0 +1,60 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.jobs.queue import enqueue
+from apps.orders.models import Order
+from apps.shop.models import ProductReview
+from .rollups import local_date
+
+@receiver(post_save, sender=Order)
+def refresh_order_metrics(sender, instance, created, raw=False, **kwargs):
+    """Roll up a new order, or a changed status or total, for the day it was placed"""
+    if raw:
+        return
+    old_state = getattr(instance, '_rollup_state', None)
+    new_state = tuple(getattr(instance, field) for field in Order.ROLLUP_FIELDS)
+    instance._rollup_state = new_state
+    if created:
+        # The order items are written after the order, but the job only runs
+        # once the checkout transaction has committed
+        enqueue(
+            'metrics.refresh_order',
+            day=local_date(instance.created_at).isoformat(),
+            order_id=instance.pk,
+            sales=True
+        )
+        return
+    if old_state == new_state:
+        return
+    days = {local_date(instance.created_at)}
+    if old_state is not None:
+        # A moved order also has to leave the day it was on
+        days.add(local_date(old_state[0]))
+    for day in days:
+        enqueue_day_refresh(day)
+
+def enqueue_day_refresh(day):
+    """Queue a refresh of a day's order rows, merged with one not yet started"""
+    enqueue(
+        'metrics.refresh_order',
+        idempotency_key=f'metrics:orders:{day.isoformat()}',
+        coalesce=True,
+        day=day.isoformat(),
+        sales=False
+    )
+
+@receiver(post_delete, sender=Order)
+def refresh_deleted_order_metrics(sender, instance, **kwargs):
+    """Drop a deleted order and its items from the day's rollups"""
+    enqueue('metrics.refresh_order', day=local_date(instance.created_at).isoformat())
+
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def refresh_review_metrics(sender, instance, raw=False, **kwargs):
+    """Roll up a written, edited or deleted review"""
+    if raw:
+        return
+    enqueue(
+        'metrics.refresh_reviews',
+        day=local_date(instance.created_at).isoformat(),
+        product_id=instance.product_id
+    )
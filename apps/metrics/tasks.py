@@ -0,0 +1,26 @@
+from datetime import date
+
+from apps.jobs.queue import job
+from apps.orders.models import OrderItem
+from .rollups import refresh_day
+
+
+@job('metrics.refresh_order')
+def refresh_order(day, order_id=None, sales=True):
+    """Refresh the rollups of the day an order was placed on
+
+    With sales the product and category rows of the order's products are
+    refreshed too; a status change only affects the order rows.
+    """
+    product_ids = None
+    if sales and order_id is not None:
+        product_ids = list(OrderItem.objects.filter(order_id=order_id).values_list('product_id', flat=True).distinct())
+        if not product_ids:
+            sales = False
+    refresh_day(date.fromisoformat(day), product_ids=product_ids, sales=sales, ratings=False)
+
+
+@job('metrics.refresh_reviews')
+def refresh_reviews(day, product_id):
+    """Refresh the rating rollups of one product for one day"""
+    refresh_day(date.fromisoformat(day), product_ids=[product_id], orders=False, sales=False)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EmailTemplate, EmailLog, SMSTemplate, SMSLog, Notification, SystemNotification
+from .models import EmailTemplate, EmailLog, SMSTemplate, SMSLog, Notification, SystemNotification, LowStockAlert
 
 @admin.register(EmailTemplate)
 class EmailTemplateAdmin(admin.ModelAdmin):
@@ -37,4 +37,10 @@ class SystemNotificationAdmin(admin.ModelAdmin):
     list_display = ['title', 'notification_type', 'is_active', 'show_to_users', 'show_to_guests', 'created_at', 'valid_until']
     list_filter = ['notification_type', 'is_active', 'show_to_users', 'show_to_guests', 'created_at']
     search_fields = ['title', 'message']
-    list_editable = ['is_active', 'show_to_users', 'show_to_guests']
\ No newline at end of file
+    list_editable = ['is_active', 'show_to_users', 'show_to_guests']
+
+@admin.register(LowStockAlert)
+class LowStockAlertAdmin(admin.ModelAdmin):
+    list_display = ['product', 'stock', 'threshold', 'alerted_at']
+    search_fields = ['product__name']
+    readonly_fields = ['alerted_at']
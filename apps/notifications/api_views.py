@@ -2,7 +2,8 @@ from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import Notification
+from rest_framework.exceptions import NotFound
+from .feed import get_notifications, get_unread_count, parse_system_id, mark_system_read, dismiss_system, mark_all_read
 from .serializers import NotificationSerializer
 
 class NotificationViewSet(viewsets.ModelViewSet):
@@ -13,23 +14,35 @@ class NotificationViewSet(viewsets.ModelViewSet):
         return self.request.user.notifications.all()
     
     def list(self, request, *args, **kwargs):
-        """Override list to return notifications in the expected format"""
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
+        """Override list to return personal and system notifications in the expected format"""
+        notifications = get_notifications(request.user)
         return Response({
             'success': True,
-            'notifications': serializer.data
+            'notifications': [
+                {field: notification[field] for field in NotificationSerializer.Meta.fields}
+                for notification in notifications
+            ],
+            'unread_count': get_unread_count(request.user)
         })
     
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Number of unread notifications, for the header badge"""
+        return Response({'success': True, 'unread_count': get_unread_count(request.user)})
+    
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
         """Mark all notifications as read"""
-        self.get_queryset().filter(is_read=False).update(is_read=True)
+        mark_all_read(request.user)
         return Response({'message': 'All notifications marked as read'})
     
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         """Mark specific notification as read"""
+        if parse_system_id(pk) is not None:
+            if not mark_system_read(request.user, pk):
+                raise NotFound()
+            return Response({'message': 'Notification marked as read'})
         notification = self.get_object()
         notification.is_read = True
         notification.save()
@@ -38,6 +51,11 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['delete'])
     def delete_notification(self, request, pk=None):
         """Delete a specific notification"""
+        if parse_system_id(pk) is not None:
+            # System notifications are shared, so they are only hidden for this user
+            if not dismiss_system(request.user, pk):
+                raise NotFound()
+            return Response({'message': 'Notification deleted successfully'})
         notification = self.get_object()
         notification.delete()
         return Response({'message': 'Notification deleted successfully'})
\ No newline at end of file
@@ -0,0 +1,320 @@
+"""A user's notifications: personal ones merged with system notifications
+
+System notifications are stored once rather than copied into a
+Notification row for every user. A user's notifications are assembled
+when they are read: their own Notification rows merged with the active
+system notifications posted since they joined, minus the ones they have
+dismissed. Read and dismissed state for a system notification lives in
+SystemNotificationState and is only written when the user acts on it, so
+posting a system notification costs one row however many users there are.
+
+Entries are dicts. System notifications get IDs of the form 'system-<pk>'
+so both kinds can be addressed through the same endpoints.
+
+Each user's notifications and the set of system notifications carry a
+cached version number that is bumped whenever they change, so polling
+endpoints can answer "nothing changed" from the cache alone.
+
+Unread counts are kept as a per-user counter in the cache that is
+adjusted as notifications are created and read rather than recounted.
+Posting a system notification increments a single shared counter, and a
+user's count adds what was posted since their counter was computed, so
+posting stays one write however many users there are. Edits and
+deletions of system notifications, which can change anyone's count,
+bump SYSTEM_COUNT_VERSION_KEY, and a missing counter is recounted.
+"""
+import heapq
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from apps.core.caching import get_cache_version, bump_cache_version
+from .models import Notification, SystemNotification, SystemNotificationState
+from .pubsub import publish_user_event
+
+SYSTEM_ID_PREFIX = 'system-'
+SYSTEM_VERSION_KEY = 'notifications:system:version'
+SYSTEM_COUNT_VERSION_KEY = 'notifications:system:count_version'
+SYSTEM_POSTED_KEY = 'notifications:system:posted'
+# System notifications can expire without a save, so unread counters are
+# also recounted on this schedule
+UNREAD_COUNT_CACHE_TIMEOUT = getattr(settings, 'NOTIFICATION_UNREAD_COUNT_CACHE_TIMEOUT', 15 * 60)
+
+NOTIFICATION_FIELDS = ['id', 'title', 'message', 'notification_type', 'is_read', 'created_at']
+PERSONAL_TYPES = dict(Notification.NOTIFICATION_TYPES)
+SYSTEM_TYPES = dict(SystemNotification.NOTIFICATION_TYPES)
+
+
+def user_version_key(user_id):
+    return f'notifications:user:{user_id}:version'
+
+
+def get_user_version(user_id):
+    return get_cache_version(user_version_key(user_id))
+
+
+def bump_user_version(user_id):
+    return bump_cache_version(user_version_key(user_id))
+
+
+def get_system_version():
+    return get_cache_version(SYSTEM_VERSION_KEY)
+
+
+def bump_system_version():
+    return bump_cache_version(SYSTEM_VERSION_KEY)
+
+
+def parse_system_id(notification_id):
+    """Return the SystemNotification pk for a 'system-<pk>' ID, else None"""
+    notification_id = str(notification_id)
+    if notification_id.startswith(SYSTEM_ID_PREFIX) and notification_id[len(SYSTEM_ID_PREFIX):].isdigit():
+        return int(notification_id[len(SYSTEM_ID_PREFIX):])
+    return None
+
+
+def system_notifications_for(user):
+    """System notifications shown to a user, annotated with is_read"""
+    states = SystemNotificationState.objects.filter(user=user, system_notification=OuterRef('pk'))
+    now = timezone.now()
+    return SystemNotification.objects.filter(
+        Q(valid_until__isnull=True) | Q(valid_until__gte=now),
+        is_active=True,
+        show_to_users=True,
+        created_at__gte=user.date_joined,
+        created_at__lte=now
+    ).exclude(
+        Exists(states.filter(is_dismissed=True))
+    ).annotate(
+        is_read=Exists(states.filter(is_read=True))
+    )
+
+
+def personal_entry(row):
+    return dict(
+        row,
+        type_display=PERSONAL_TYPES.get(row['notification_type'], row['notification_type']),
+        is_system=False,
+        sort_key=(row['created_at'], 0, row['id'])
+    )
+
+
+def system_entry(row):
+    return dict(
+        row,
+        id=f"{SYSTEM_ID_PREFIX}{row['id']}",
+        type_display=SYSTEM_TYPES.get(row['notification_type'], row['notification_type']),
+        is_system=True,
+        sort_key=(row['created_at'], 1, row['id'])
+    )
+
+
+def make_cursor(entry):
+    """Position just after an entry, for fetching the next page"""
+    return f"{entry['created_at'].isoformat()}|{entry['id']}"
+
+
+def parse_cursor(cursor):
+    """Return the sort key encoded in a cursor, or None if it is invalid"""
+    try:
+        created_at, notification_id = cursor.split('|', 1)
+        created_at = datetime.fromisoformat(created_at)
+    except (AttributeError, ValueError):
+        return None
+    system_id = parse_system_id(notification_id)
+    if system_id is not None:
+        return (created_at, 1, system_id)
+    if notification_id.isdigit():
+        return (created_at, 0, int(notification_id))
+    return None
+
+
+def after_cursor(queryset, key, is_system):
+    """Restrict a queryset to entries that sort after the cursor key
+
+    Entries are ordered newest first by (created_at, is_system, id), the
+    same order get_notifications merges in.
+    """
+    created_at, cursor_is_system, cursor_id = key
+    older = Q(created_at__lt=created_at)
+    if is_system == cursor_is_system:
+        return queryset.filter(older | Q(created_at=created_at, id__lt=cursor_id))
+    if is_system < cursor_is_system:
+        # Personal entries sort after system entries with the same time
+        return queryset.filter(created_at__lte=created_at)
+    return queryset.filter(older)
+
+
+def get_notifications(user, limit=None, before=None):
+    """Return a user's notifications, newest first
+
+    `before` is a cursor from make_cursor(); only entries after it are
+    returned, so pages are fetched by seeking rather than by offset.
+    """
+    personal = Notification.objects.filter(user=user)
+    system = system_notifications_for(user)
+    key = parse_cursor(before) if before else None
+    if key is not None:
+        personal = after_cursor(personal, key, 0)
+        system = after_cursor(system, key, 1)
+
+    personal = personal.order_by('-created_at', '-id').values(*NOTIFICATION_FIELDS)
+    system = system.order_by('-created_at', '-id').values(*NOTIFICATION_FIELDS)
+    if limit is not None:
+        personal = personal[:limit]
+        system = system[:limit]
+
+    merged = heapq.merge(
+        (personal_entry(row) for row in personal),
+        (system_entry(row) for row in system),
+        key=lambda entry: entry['sort_key'],
+        reverse=True
+    )
+    return list(islice(merged, limit))
+
+
+def unread_counter_keys(user_id):
+    """Cache keys of a user's unread counter and of the posted count it started from"""
+    prefix = f'notifications:user:{user_id}:unread:{get_cache_version(SYSTEM_COUNT_VERSION_KEY)}'
+    return prefix, f'{prefix}:posted'
+
+
+def count_unread(user):
+    return (
+        Notification.objects.filter(user=user, is_read=False).count() +
+        system_notifications_for(user).filter(is_read=False).count()
+    )
+
+
+def get_unread_count(user):
+    """Number of unread personal and system notifications for a user"""
+    count_key, posted_key = unread_counter_keys(user.pk)
+    posted = cache.get(SYSTEM_POSTED_KEY, 0)
+    counter = cache.get_many([count_key, posted_key])
+    if len(counter) == 2 and posted >= counter[posted_key]:
+        return max(counter[count_key] + posted - counter[posted_key], 0)
+    count = count_unread(user)
+    cache.set_many({count_key: count, posted_key: posted}, UNREAD_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    """Add delta to a user's unread counter, if there is one"""
+    if not delta:
+        return
+    count_key, _ = unread_counter_keys(user_id)
+    try:
+        cache.incr(count_key, delta)
+    except ValueError:
+        # No counter yet: the next read counts from the database
+        pass
+
+
+def forget_unread_count(user_id):
+    """Drop a user's unread counter after a change whose effect is unknown"""
+    cache.delete(unread_counter_keys(user_id)[0])
+
+
+def record_system_posted():
+    """Count a newly posted system notification into every user's unread count"""
+    try:
+        cache.incr(SYSTEM_POSTED_KEY)
+    except ValueError:
+        # Counters based on the lost posted count can no longer be adjusted
+        cache.set(SYSTEM_POSTED_KEY, 0, None)
+        bump_system_counts()
+
+
+def bump_system_counts():
+    """Invalidate every user's unread counter"""
+    return bump_cache_version(SYSTEM_COUNT_VERSION_KEY)
+
+
+def set_system_state(user, notification_id, **state):
+    """Update a user's state for a visible system notification
+
+    Returns False if the notification is not shown to the user.
+    """
+    system_id = parse_system_id(notification_id)
+    if system_id is None:
+        return False
+    was_read = system_notifications_for(user).filter(pk=system_id).values_list('is_read', flat=True).first()
+    if was_read is None:
+        return False
+    # Written without signals, like mark_read(), so the unread counter is
+    # adjusted here instead of being dropped
+    SystemNotificationState.objects.bulk_create(
+        [SystemNotificationState(user=user, system_notification_id=system_id)],
+        ignore_conflicts=True
+    )
+    SystemNotificationState.objects.filter(
+        user=user,
+        system_notification_id=system_id
+    ).update(updated_at=timezone.now(), **state)
+    if not was_read and (state.get('is_read') or state.get('is_dismissed')):
+        adjust_unread_count(user.pk, -1)
+    bump_user_version(user.pk)
+    publish_user_event(user.pk, 'changed')
+    return True
+
+
+def mark_system_read(user, notification_id):
+    return set_system_state(user, notification_id, is_read=True)
+
+
+def dismiss_system(user, notification_id):
+    return set_system_state(user, notification_id, is_dismissed=True)
+
+
+def mark_read(user, personal_ids=None, system_ids=None):
+    """Mark personal notifications and system notifications as read
+
+    With no IDs given, everything the user can see is marked read.
+    """
+    personal = Notification.objects.filter(user=user, is_read=False)
+    if personal_ids is not None:
+        personal = personal.filter(id__in=personal_ids)
+    updated = personal.update(is_read=True)
+
+    system = system_notifications_for(user).filter(is_read=False)
+    if system_ids is not None:
+        system = system.filter(id__in=system_ids)
+    unread_ids = list(system.values_list('id', flat=True))
+    if unread_ids:
+        SystemNotificationState.objects.filter(
+            user=user,
+            system_notification_id__in=unread_ids
+        ).update(is_read=True, updated_at=timezone.now())
+        SystemNotificationState.objects.bulk_create(
+            [
+                SystemNotificationState(user=user, system_notification_id=system_id, is_read=True)
+                for system_id in unread_ids
+            ],
+            ignore_conflicts=True
+        )
+
+    # update() and bulk_create() send no signals
+    if updated or unread_ids:
+        adjust_unread_count(user.pk, -(updated + len(unread_ids)))
+        bump_user_version(user.pk)
+        publish_user_event(user.pk, 'changed')
+
+
+def mark_entries_read(user, entries):
+    """Mark the notifications in a list from get_notifications as read"""
+    unread = [entry for entry in entries if not entry['is_read']]
+    if unread:
+        mark_read(
+            user,
+            personal_ids=[entry['id'] for entry in unread if not entry['is_system']],
+            system_ids=[parse_system_id(entry['id']) for entry in unread if entry['is_system']]
+        )
+
+
+def mark_all_read(user):
+    """Mark all of a user's personal and system notifications as read"""
+    mark_read(user)
@@ -0,0 +1,139 @@
+"""Low-stock alerting
+
+A product alerts once when its stock drops to LOW_STOCK_THRESHOLD or
+below. LowStockAlert rows remember which products have been reported and
+are cleared when a product is restocked above the threshold, so the next
+drop alerts again. Each check sends every admin one digest listing all
+products that newly crossed the threshold, instead of one notification
+and one email per product.
+
+check_low_stock runs periodically from the check_low_stock command and
+incrementally, for just the products involved, from a job queued by
+checkouts that take stock to the threshold.
+"""
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.jobs.queue import enqueue
+from apps.shop.models import Product
+from apps.users.models import User
+from .models import LowStockAlert, Notification
+from .feed import bump_user_version, adjust_unread_count
+from .pubsub import publish_user_event
+
+logger = logging.getLogger(__name__)
+
+LOW_STOCK_THRESHOLD = getattr(settings, 'LOW_STOCK_THRESHOLD', 10)
+# Products named in the in-app notification; the email lists them all
+NOTIFICATION_PRODUCT_NAMES = 5
+
+
+def get_admin_users():
+    return list(User.objects.filter(is_active=True, role__name='admin'))
+
+
+def check_low_stock(threshold=None, product_ids=None):
+    """Alert admins about products that have newly dropped to the threshold
+
+    With product_ids only those products are checked. Returns a dict with
+    the products alerted, the number of alerts cleared by restocking and
+    the number of admins notified.
+    """
+    threshold = LOW_STOCK_THRESHOLD if threshold is None else threshold
+    products = Product.objects.all()
+    alerts = LowStockAlert.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+        alerts = alerts.filter(product_id__in=product_ids)
+
+    with transaction.atomic():
+        # Restocked or withdrawn products can alert again next time
+        cleared, _ = alerts.filter(
+            Q(product__stock__gt=threshold) | Q(product__is_active=False)
+        ).delete()
+
+        crossed = list(
+            products.filter(
+                is_active=True,
+                stock__lte=threshold,
+                low_stock_alert__isnull=True
+            ).order_by('stock', 'name').values('id', 'name', 'stock')
+        )
+        if not crossed:
+            return {'alerted': [], 'cleared': cleared, 'admins': 0}
+
+        # A concurrent check may claim some of the same products; only the
+        # rows written with this run's timestamp are reported here
+        alerted_at = timezone.now()
+        LowStockAlert.objects.bulk_create(
+            [
+                LowStockAlert(product_id=product['id'], stock=product['stock'], threshold=threshold, alerted_at=alerted_at)
+                for product in crossed
+            ],
+            ignore_conflicts=True
+        )
+        claimed = set(
+            LowStockAlert.objects.filter(
+                product_id__in=[product['id'] for product in crossed],
+                alerted_at=alerted_at
+            ).values_list('product_id', flat=True)
+        )
+        crossed = [product for product in crossed if product['id'] in claimed]
+        if not crossed:
+            return {'alerted': [], 'cleared': cleared, 'admins': 0}
+
+        admins = get_admin_users()
+        notify_admins(admins, crossed, threshold, alerted_at)
+
+    logger.info(f"Low stock alert for {len(crossed)} products sent to {len(admins)} admins")
+    return {'alerted': crossed, 'cleared': cleared, 'admins': len(admins)}
+
+
+def notify_admins(admins, products, threshold, alerted_at):
+    """Send every admin one in-app notification and one digest email"""
+    names = ', '.join(product['name'] for product in products[:NOTIFICATION_PRODUCT_NAMES])
+    if len(products) > NOTIFICATION_PRODUCT_NAMES:
+        names += f' and {len(products) - NOTIFICATION_PRODUCT_NAMES} more'
+    Notification.objects.bulk_create([
+        Notification(
+            user=admin,
+            title=f'Low Stock Alert: {len(products)} product{"s" if len(products) != 1 else ""}',
+            message=f'Stock is at or below {threshold} units for: {names}.',
+            notification_type='warning'
+        )
+        for admin in admins
+    ])
+    # bulk_create() sends no signals
+    for admin in admins:
+        adjust_unread_count(admin.pk, 1)
+        bump_user_version(admin.pk)
+        publish_user_event(admin.pk, 'changed')
+
+    admin_emails = [admin.email for admin in admins if admin.email]
+    if admin_emails:
+        site_url = getattr(settings, 'SITE_URL', 'http://localhost:8000').rstrip('/')
+        run_key = f'low_stock:{alerted_at.isoformat()}'
+        enqueue(
+            'notifications.send_bulk_email',
+            idempotency_key=run_key,
+            template_type='low_stock_digest',
+            recipients=admin_emails,
+            context={
+                'threshold': threshold,
+                'product_count': len(products),
+                'products': [
+                    {
+                        'name': product['name'],
+                        'stock': product['stock'],
+                        'url': site_url + reverse('core:product_detail', args=[product['id']]),
+                    }
+                    for product in products
+                ],
+            },
+            idempotency_prefix=run_key
+        )
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_add_order_templates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='broadcast_key',
+            field=models.CharField(blank=True, help_text='Identifies the broadcast this copy belongs to', max_length=64, null=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='notification',
+            unique_together={('broadcast_key', 'user')},
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:37
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Copies made before broadcast keys existed were written by a post_save
+# signal straight after the system notification was saved; rows with the
+# same text outside this window may be genuine personal notifications
+LEGACY_FANOUT_WINDOW = timedelta(hours=1)
+
+
+def fold_system_notification_copies(apps, schema_editor):
+    """Replace per-user copies of system notifications with read state rows"""
+    Notification = apps.get_model('notifications', 'Notification')
+    SystemNotification = apps.get_model('notifications', 'SystemNotification')
+    SystemNotificationState = apps.get_model('notifications', 'SystemNotificationState')
+
+    for system_notification in SystemNotification.objects.all().iterator():
+        copies = Notification.objects.filter(
+            models.Q(broadcast_key=f'system:{system_notification.pk}') |
+            models.Q(
+                broadcast_key__isnull=True,
+                title=system_notification.title,
+                message=system_notification.message,
+                notification_type=system_notification.notification_type,
+                created_at__gte=system_notification.created_at,
+                created_at__lte=system_notification.created_at + LEGACY_FANOUT_WINDOW
+            )
+        )
+        read_user_ids = set(copies.filter(is_read=True).values_list('user_id', flat=True))
+        SystemNotificationState.objects.bulk_create(
+            [
+                SystemNotificationState(user_id=user_id, system_notification=system_notification, is_read=True)
+                for user_id in read_user_ids
+            ],
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+        copies.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_notification_broadcast_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SystemNotificationState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_read', models.BooleanField(default=False)),
+                ('is_dismissed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('system_notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='states', to='notifications.systemnotification')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='system_notification_states', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'system_notification')},
+            },
+        ),
+        migrations.RunPython(fold_system_notification_copies, migrations.RunPython.noop),
+    ]
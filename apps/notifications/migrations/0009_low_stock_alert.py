@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0008_notification_user_indexes'),
+        ('shop', '0008_product_co_purchases'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emailtemplate',
+            name='template_type',
+            field=models.CharField(choices=[('order_confirmation', 'Order Confirmation'), ('order_shipped', 'Order Shipped'), ('order_delivered', 'Order Delivered'), ('welcome', 'Welcome Email'), ('password_reset', 'Password Reset'), ('low_stock_alert', 'Low Stock Alert'), ('low_stock_digest', 'Low Stock Digest')], max_length=30, unique=True),
+        ),
+        migrations.CreateModel(
+            name='LowStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.PositiveIntegerField(help_text='Stock when the alert was sent')),
+                ('threshold', models.PositiveIntegerField()),
+                ('alerted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='low_stock_alert', to='shop.product')),
+            ],
+            options={
+                'ordering': ['-alerted_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations
+
+def add_low_stock_digest_template(apps, schema_editor):
+    EmailTemplate = apps.get_model('notifications', 'EmailTemplate')
+    
+    # Create low stock digest template
+    EmailTemplate.objects.get_or_create(
+        template_type='low_stock_digest',
+        defaults={
+            'subject': 'Low Stock Alert: {{product_count}} product{{product_count|pluralize}}',
+            'body_html': '''
+            <p>Hello Admin,</p>
+            <p>The following products have dropped to {{threshold}} units or fewer:</p>
+            <table border="1" cellpadding="5" cellspacing="0" style="border-collapse: collapse;">
+                <thead>
+                    <tr>
+                        <th>Product</th>
+                        <th>Current Stock</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    {% for product in products %}
+                    <tr>
+                        <td><a href="{{product.url}}">{{product.name}}</a></td>
+                        <td>{{product.stock}} units</td>
+                    </tr>
+                    {% endfor %}
+                </tbody>
+            </table>
+            <p>Please consider restocking these products soon.</p>
+            <p>Thank you,<br>Your E-commerce Team</p>
+            ''',
+            'body_text': '''
+            Hello Admin,
+            
+            The following products have dropped to {{threshold}} units or fewer:
+            {% for product in products %}
+            - {{product.name}}: {{product.stock}} units ({{product.url}}){% endfor %}
+            
+            Please consider restocking these products soon.
+            
+            Thank you,
+            Your E-commerce Team
+            ''',
+            'is_active': True
+        }
+    )
+
+def remove_low_stock_digest_template(apps, schema_editor):
+    EmailTemplate = apps.get_model('notifications', 'EmailTemplate')
+    EmailTemplate.objects.filter(template_type='low_stock_digest').delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0009_low_stock_alert'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_low_stock_digest_template, remove_low_stock_digest_template),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:22
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0010_add_low_stock_digest_template'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='notification',
+            unique_together=set(),
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='broadcast_key',
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from apps.users.models import User
+from apps.shop.models import Product
 
 class EmailTemplate(models.Model):
     TEMPLATE_TYPES = [
@@ -10,6 +11,7 @@ class EmailTemplate(models.Model):
         ('welcome', 'Welcome Email'),
         ('password_reset', 'Password Reset'),
         ('low_stock_alert', 'Low Stock Alert'),  # Add this line
+        ('low_stock_digest', 'Low Stock Digest'),
     ]
     
     template_type = models.CharField(max_length=30, choices=TEMPLATE_TYPES, unique=True)
@@ -129,10 +131,20 @@ class Notification(models.Model):
             models.Index(fields=['user']),
             models.Index(fields=['is_read']),
             models.Index(fields=['notification_type']),
+            models.Index(fields=['user', '-created_at', '-id']),
+            models.Index(fields=['user', 'is_read']),
         ]
     
     def __str__(self):
         return f"{self.user.username} - {self.title}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'is_read' in field_names:
+            # Remember the read state so saves can adjust the unread counter
+            instance._was_read = values[field_names.index('is_read')]
+        return instance
 
 
 class SystemNotification(models.Model):
@@ -172,4 +184,42 @@ class SystemNotification(models.Model):
         if self.valid_until and timezone.now() > self.valid_until:
             return False
             
-        return True
\ No newline at end of file
+        return True
+
+
+class SystemNotificationState(models.Model):
+    """A user's read/dismissed state for one system notification
+    
+    System notifications are stored once and merged into each user's
+    notifications when they are read; a state row only exists once the
+    user has read or dismissed the notification.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='system_notification_states')
+    system_notification = models.ForeignKey(SystemNotification, on_delete=models.CASCADE, related_name='states')
+    is_read = models.BooleanField(default=False)
+    is_dismissed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['user', 'system_notification']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.system_notification.title}"
+
+class LowStockAlert(models.Model):
+    """Marks a product whose low stock has already been reported
+    
+    The row is created when the product's stock first drops to the alert
+    threshold and removed once it is restocked above it, so each crossing
+    is reported once.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='low_stock_alert')
+    stock = models.PositiveIntegerField(help_text="Stock when the alert was sent")
+    threshold = models.PositiveIntegerField()
+    alerted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-alerted_at']
+    
+    def __str__(self):
+        return f"{self.product.name} ({self.stock} <= {self.threshold})"
@@ -0,0 +1,150 @@
+"""Publish/subscribe channel behind the notification event stream
+
+Notification changes are published as small JSON events on per-user
+channels ('user:<id>') and on the shared 'system' channel; the
+notification_stream view subscribes to the channels of the connected
+visitor and forwards the events as Server-Sent Events.
+
+The default InProcessBroker delivers events only to subscribers in the
+same process, which is enough for a single ASGI worker. With several
+workers set NOTIFICATION_PUBSUB_BACKEND to
+'apps.notifications.pubsub.RedisBroker', which relays events through
+NOTIFICATION_PUBSUB_REDIS_URL, so an event published by one worker
+reaches streams held open by the others. Any class with the same
+publish() and subscribe() methods can be plugged in.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_CHANNEL = 'system'
+# Events queued for a subscriber that is not reading are dropped beyond this
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+class InProcessBroker:
+    """Deliver events to subscribers in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, message):
+        # Publishers are usually sync code running outside the subscribers'
+        # event loops, so hand the message over thread-safely
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, channel, message)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                pass
+
+    @staticmethod
+    def _deliver(queue, channel, message):
+        try:
+            queue.put_nowait((channel, message))
+        except asyncio.QueueFull:
+            logger.warning(f"Dropped notification event on '{channel}' for a slow subscriber")
+
+    @asynccontextmanager
+    async def subscribe(self, channels):
+        """Yield an asyncio.Queue receiving (channel, message) pairs"""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                for channel in channels:
+                    self._subscribers[channel].discard(subscriber)
+                    if not self._subscribers[channel]:
+                        del self._subscribers[channel]
+
+
+class RedisBroker:
+    """Deliver events through Redis pub/sub to subscribers in every process"""
+
+    def __init__(self, url=None):
+        import redis
+
+        self.url = url or getattr(settings, 'NOTIFICATION_PUBSUB_REDIS_URL', 'redis://127.0.0.1:6379/1')
+        self.client = redis.Redis.from_url(self.url)
+
+    def publish(self, channel, message):
+        self.client.publish(f'notifications:{channel}', message)
+
+    @asynccontextmanager
+    async def subscribe(self, channels):
+        """Yield an asyncio.Queue receiving (channel, message) pairs"""
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*[f'notifications:{channel}' for channel in channels])
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+        async def read():
+            async for item in pubsub.listen():
+                if item['type'] != 'message':
+                    continue
+                channel = item['channel'].decode().split(':', 1)[1]
+                InProcessBroker._deliver(queue, channel, item['data'].decode())
+
+        reader = asyncio.create_task(read())
+        try:
+            yield queue
+        finally:
+            reader.cancel()
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        backend = getattr(settings, 'NOTIFICATION_PUBSUB_BACKEND', 'apps.notifications.pubsub.InProcessBroker')
+        _broker = import_string(backend)()
+    return _broker
+
+
+def publish(channel, event, data=None):
+    """Publish an event once the current transaction has committed"""
+    message = json.dumps({'event': event, 'data': data or {}}, cls=DjangoJSONEncoder)
+
+    def send():
+        try:
+            get_broker().publish(channel, message)
+        except Exception as e:
+            # Streams are an optimisation over polling; never fail a write
+            logger.error(f"Failed to publish notification event on '{channel}': {str(e)}")
+
+    transaction.on_commit(send)
+
+
+def publish_user_event(user_id, event, data=None):
+    publish(user_channel(user_id), event, data)
+
+
+def publish_system_event(event, data=None):
+    publish(SYSTEM_CHANNEL, event, data)
@@ -0,0 +1,159 @@
+"""Cached, precompiled email and SMS templates
+
+Template rows are cached under their template_type and dropped by the
+signals in apps.notifications.signals whenever a template is saved or
+deleted. Each process compiles a template once per (template_type,
+updated_at), so a send costs neither a query nor a re-parse.
+
+Email templates are compiled as Django templates, which also renders the
+{% for %} loops used by the order templates; the HTML body is
+autoescaped, the subject and text body are not. Template rows are edited
+in the admin, so they are compiled by a separate engine without loaders
+or tag libraries that only knows the built-in filters and the tags in
+EMAIL_TEMPLATE_TAGS: {% include %}, {% load %}, {% debug %} and the like
+do not parse there. As with any Django template, a variable missing
+from the context renders as an empty string. A template that does not
+parse falls back to plain {{key}} substitution. SMS templates use {key}
+placeholders and are compiled into a placeholder splitter.
+"""
+import logging
+import re
+
+from django.core.cache import cache
+from django.template import Context, Engine, Library, TemplateSyntaxError, defaultfilters, defaulttags
+from django.utils.html import strip_tags
+
+from .models import EmailTemplate, SMSTemplate
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_CACHE_TIMEOUT = 60 * 60 * 24
+EMAIL_PLACEHOLDER_RE = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+SMS_PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+EMAIL_TEMPLATE_TAGS = [
+    'autoescape', 'comment', 'cycle', 'filter', 'firstof', 'for', 'if', 'ifchanged',
+    'now', 'spaceless', 'templatetag', 'url', 'verbatim', 'with',
+]
+
+# (kind, template_type) -> (updated_at, compiled template)
+_compiled = {}
+
+
+class PlaceholderTemplate:
+    """A template split once into literal text and placeholders"""
+
+    def __init__(self, source, pattern):
+        self.parts = []
+        position = 0
+        for match in pattern.finditer(source):
+            self.parts.append((source[position:match.start()], match.group(1), match.group(0)))
+            position = match.end()
+        self.tail = source[position:]
+
+    def render(self, context):
+        output = []
+        for literal, name, placeholder in self.parts:
+            output.append(literal)
+            # Unknown placeholders are left as they were written
+            output.append(str(context[name]) if name in context else placeholder)
+        output.append(self.tail)
+        return ''.join(output)
+
+
+def make_email_engine():
+    """An engine limited to EMAIL_TEMPLATE_TAGS and the built-in filters"""
+    library = Library()
+    library.tags = {name: defaulttags.register.tags[name] for name in EMAIL_TEMPLATE_TAGS}
+    library.filters = dict(defaultfilters.register.filters)
+    engine = Engine(debug=False, loaders=[], libraries={})
+    # Replace the default builtins, which include loader_tags and {% load %}
+    engine.template_builtins = [library]
+    return engine
+
+
+email_engine = make_email_engine()
+
+
+class DjangoTemplate:
+    def __init__(self, source, autoescape):
+        if not autoescape:
+            source = '{% autoescape off %}' + source + '{% endautoescape %}'
+        self.template = email_engine.from_string(source)
+
+    def render(self, context):
+        return self.template.render(Context(context))
+
+
+def compile_email_part(source, autoescape=False):
+    try:
+        return DjangoTemplate(source, autoescape)
+    except TemplateSyntaxError as e:
+        logger.warning(f"Email template does not parse, using plain placeholders: {str(e)}")
+        return PlaceholderTemplate(source, EMAIL_PLACEHOLDER_RE)
+
+
+class CompiledEmailTemplate:
+    def __init__(self, row):
+        self.subject = compile_email_part(row['subject'])
+        self.body_html = compile_email_part(row['body_html'], autoescape=True)
+        self.body_text = compile_email_part(row['body_text'] or strip_tags(row['body_html']))
+
+    def render(self, context):
+        """Return the rendered (subject, html, text) for a context"""
+        return (
+            self.subject.render(context).strip(),
+            self.body_html.render(context),
+            self.body_text.render(context),
+        )
+
+
+class CompiledSMSTemplate:
+    def __init__(self, row):
+        self.message = PlaceholderTemplate(row['message'], SMS_PLACEHOLDER_RE)
+
+    def render(self, context):
+        return self.message.render(context)
+
+
+TEMPLATE_MODELS = {
+    'email': (EmailTemplate, ['subject', 'body_html', 'body_text'], CompiledEmailTemplate),
+    'sms': (SMSTemplate, ['message'], CompiledSMSTemplate),
+}
+
+
+def template_cache_key(kind, template_type):
+    return f'notification_template:{kind}:{template_type}'
+
+
+def invalidate_template(kind, template_type):
+    cache.delete(template_cache_key(kind, template_type))
+
+
+def get_compiled_template(kind, template_type):
+    """Return the compiled active template, or None if there is none"""
+    model, fields, compiled_class = TEMPLATE_MODELS[kind]
+    cache_key = template_cache_key(kind, template_type)
+
+    row = cache.get(cache_key)
+    if row is None:
+        row = model.objects.filter(
+            template_type=template_type,
+            is_active=True
+        ).values('updated_at', *fields).first()
+        if row is None:
+            return None
+        cache.set(cache_key, row, TEMPLATE_CACHE_TIMEOUT)
+
+    updated_at, compiled = _compiled.get((kind, template_type), (None, None))
+    if compiled is None or updated_at != row['updated_at']:
+        compiled = compiled_class(row)
+        _compiled[(kind, template_type)] = (row['updated_at'], compiled)
+    return compiled
+
+
+def get_email_template(template_type):
+    return get_compiled_template('email', template_type)
+
+
+def get_sms_template(template_type):
+    return get_compiled_template('sms', template_type)
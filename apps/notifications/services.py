@@ -1,12 +1,17 @@
-from django.core.mail import send_mail
+from django.core.mail import send_mail, get_connection, EmailMultiAlternatives
+from django.db import connection as db_connection
+from django.utils import timezone
 from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from django.conf import settings
 from .models import EmailTemplate, EmailLog, SMSTemplate, SMSLog
+from .rendering import get_email_template, get_sms_template
 import logging
 
 logger = logging.getLogger(__name__)
 
+EMAIL_BULK_BATCH_SIZE = getattr(settings, 'EMAIL_BULK_BATCH_SIZE', 100)
+BROADCAST_CHUNK_SIZE = getattr(settings, 'NOTIFICATION_BROADCAST_CHUNK_SIZE', 1000)
+
 class EmailService:
     """Service for handling email notifications"""
     
@@ -14,21 +19,15 @@ class EmailService:
     def send_email(template_type, recipient, context=None):
         """Send email using template"""
         try:
-            template = EmailTemplate.objects.get(template_type=template_type, is_active=True)
+            template = get_email_template(template_type)
+            if template is None:
+                raise EmailTemplate.DoesNotExist
             
             if context is None:
                 context = {}
             
             # Render email content
-            subject = template.subject
-            html_content = template.body_html
-            text_content = template.body_text or strip_tags(html_content)
-            
-            # Replace placeholders with context data
-            for key, value in context.items():
-                subject = subject.replace(f'{{{{{key}}}}}', str(value))
-                html_content = html_content.replace(f'{{{{{key}}}}}', str(value))
-                text_content = text_content.replace(f'{{{{{key}}}}}', str(value))
+            subject, html_content, text_content = template.render(context)
             
             # Create email log
             email_log = EmailLog.objects.create(
@@ -64,6 +63,127 @@ class EmailService:
                 email_log.save()
             return False
 
+    @staticmethod
+    def send_bulk(template_type, messages, batch_size=None):
+        """Send one template to many recipients over a single connection
+        
+        `messages` is an iterable of (recipient, context) pairs. Messages are
+        rendered and logged in batches of `batch_size`, and every message is
+        sent over the same mail connection. A recipient whose message fails
+        to render or send is recorded in a failed EmailLog and does not stop
+        the others; if the connection cannot be opened every recipient is.
+        Returns a dict with the number sent and a list of
+        {'recipient', 'error'} failures.
+        """
+        batch_size = batch_size or EMAIL_BULK_BATCH_SIZE
+        result = {'sent': 0, 'failed': []}
+        
+        template = get_email_template(template_type)
+        if template is None:
+            logger.error(f"Email template '{template_type}' not found")
+            result['failed'] = [
+                {'recipient': recipient, 'error': 'Email template not found'}
+                for recipient, context in messages
+            ]
+            return result
+        
+        # Logs are written before sending where the database returns the
+        # new primary keys, otherwise once the batch has been sent
+        log_before_sending = db_connection.features.can_return_rows_from_bulk_insert
+        
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            logger.error(f"Failed to open mail connection: {str(e)}")
+            EmailService._fail_all(template_type, messages, str(e), batch_size, result)
+            return result
+        
+        try:
+            batch = []
+            for message in messages:
+                batch.append(message)
+                if len(batch) >= batch_size:
+                    EmailService._send_batch(template_type, template, batch, connection, log_before_sending, result)
+                    batch = []
+            if batch:
+                EmailService._send_batch(template_type, template, batch, connection, log_before_sending, result)
+        finally:
+            connection.close()
+        
+        return result
+    
+    @staticmethod
+    def _failed_log(recipient, template_type, error):
+        return EmailLog(
+            recipient=recipient,
+            subject='',
+            template_type=template_type,
+            status='failed',
+            error_message=error
+        )
+    
+    @staticmethod
+    def _fail_all(template_type, messages, error, batch_size, result):
+        """Record every message as failed without trying to send it"""
+        logs = []
+        for recipient, context in messages:
+            result['failed'].append({'recipient': recipient, 'error': error})
+            logs.append(EmailService._failed_log(recipient, template_type, error))
+        EmailLog.objects.bulk_create(logs, batch_size=batch_size)
+    
+    @staticmethod
+    def _send_batch(template_type, template, batch, connection, log_before_sending, result):
+        logs = []
+        emails = []
+        failed_logs = []
+        for recipient, context in batch:
+            try:
+                subject, html_content, text_content = template.render(context or {})
+                email = EmailMultiAlternatives(
+                    subject=subject,
+                    body=text_content,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[recipient],
+                    connection=connection
+                )
+                email.attach_alternative(html_content, 'text/html')
+                logs.append(EmailLog(recipient=recipient, subject=subject, template_type=template_type))
+                emails.append(email)
+            except Exception as e:
+                logger.error(f"Failed to render email for {recipient}: {str(e)}")
+                result['failed'].append({'recipient': recipient, 'error': str(e)})
+                failed_logs.append(EmailService._failed_log(recipient, template_type, str(e)))
+        
+        if failed_logs:
+            EmailLog.objects.bulk_create(failed_logs)
+        if log_before_sending:
+            EmailLog.objects.bulk_create(logs)
+        
+        for email_log, email in zip(logs, emails):
+            try:
+                connection.send_messages([email])
+                email_log.status = 'sent'
+                email_log.sent_at = timezone.now()
+                result['sent'] += 1
+            except Exception as e:
+                logger.error(f"Failed to send email to {email_log.recipient}: {str(e)}")
+                email_log.status = 'failed'
+                email_log.error_message = str(e)
+                result['failed'].append({'recipient': email_log.recipient, 'error': str(e)})
+                # The connection may be broken; start a fresh one for the rest
+                connection.close()
+                try:
+                    connection.open()
+                except Exception:
+                    # Each following send will try to reconnect on its own
+                    pass
+        
+        if log_before_sending:
+            EmailLog.objects.bulk_update(logs, ['status', 'sent_at', 'error_message'])
+        else:
+            EmailLog.objects.bulk_create(logs)
+
 class SMSService:
     """Service for handling SMS notifications (placeholder implementation)"""
     
@@ -71,15 +191,15 @@ class SMSService:
     def send_sms(template_type, recipient, context=None):
         """Send SMS using template (placeholder)"""
         try:
-            template = SMSTemplate.objects.get(template_type=template_type, is_active=True)
+            template = get_sms_template(template_type)
+            if template is None:
+                raise SMSTemplate.DoesNotExist
             
             if context is None:
                 context = {}
             
             # Prepare message
-            message = template.message
-            for key, value in context.items():
-                message = message.replace(f'{{{key}}}', str(value))
+            message = template.render(context)
             
             # Create SMS log
             sms_log = SMSLog.objects.create(
@@ -127,65 +247,50 @@ class WhatsAppService:
 class NotificationService:
     """Service for handling notification conversions and management"""
     
-    @staticmethod
-    def convert_system_to_user_notifications(system_notification):
-        """Convert a SystemNotification to individual User Notifications for all users"""
-        from apps.users.models import User
-        from .models import Notification
-        
-        try:
-            # Get all active users
-            users = User.objects.filter(is_active=True)
-            
-            # Create individual notifications for each user
-            notifications_created = 0
-            for user in users:
-                # Check if user already has this notification
-                if not Notification.objects.filter(
-                    user=user,
-                    title=system_notification.title,
-                    message=system_notification.message,
-                    created_at=system_notification.created_at
-                ).exists():
-                    Notification.objects.create(
-                        user=user,
-                        title=system_notification.title,
-                        message=system_notification.message,
-                        notification_type=system_notification.notification_type
-                    )
-                    notifications_created += 1
-            
-            logger.info(f"Created {notifications_created} user notifications from system notification: {system_notification.title}")
-            return notifications_created
-            
-        except Exception as e:
-            logger.error(f"Failed to convert system notification to user notifications: {str(e)}")
-            return 0
-    
     @staticmethod
     def create_user_notifications_for_all_users(title, message, notification_type='info'):
-        """Create a notification for all active users"""
+        """Create a notification for all active users
+        
+        Users are processed in ID order, BROADCAST_CHUNK_SIZE at a time,
+        with one bulk insert per chunk.
+        """
         from apps.users.models import User
         from .models import Notification
+        from .feed import bump_system_version, bump_system_counts
+        from .pubsub import publish_system_event
         
         try:
-            # Get all active users
-            users = User.objects.filter(is_active=True)
-            
-            # Create individual notifications for each user
+            users = User.objects.filter(is_active=True).order_by('id')
             notifications_created = 0
-            for user in users:
-                Notification.objects.create(
-                    user=user,
-                    title=title,
-                    message=message,
-                    notification_type=notification_type
-                )
-                notifications_created += 1
+            last_user_id = 0
+            while True:
+                user_ids = list(users.filter(id__gt=last_user_id).values_list('id', flat=True)[:BROADCAST_CHUNK_SIZE])
+                if not user_ids:
+                    break
+                
+                Notification.objects.bulk_create([
+                    Notification(
+                        user_id=user_id,
+                        title=title,
+                        message=message,
+                        notification_type=notification_type
+                    )
+                    for user_id in user_ids
+                ])
+                
+                # bulk_create() sends no signals, so the copies are announced
+                # through the version and counters shared by all users
+                bump_system_version()
+                bump_system_counts()
+                
+                notifications_created += len(user_ids)
+                last_user_id = user_ids[-1]
             
+            if notifications_created:
+                publish_system_event('changed')
             logger.info(f"Created {notifications_created} user notifications: {title}")
             return notifications_created
             
         except Exception as e:
             logger.error(f"Failed to create user notifications: {str(e)}")
-            return 0
\ No newline at end of file
+            return 0
@@ -1,17 +1,91 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import SystemNotification
-from .services import NotificationService
+from django.utils import timezone
+from .models import EmailTemplate, SMSTemplate, Notification, SystemNotification, SystemNotificationState
+from .rendering import invalidate_template
+from .feed import (
+    bump_user_version, bump_system_version, adjust_unread_count, forget_unread_count,
+    record_system_posted, bump_system_counts
+)
+from .pubsub import publish_user_event, publish_system_event
 import logging
 
 logger = logging.getLogger(__name__)
 
+@receiver(post_save, sender=EmailTemplate)
+@receiver(post_delete, sender=EmailTemplate)
+def invalidate_email_template(sender, instance, **kwargs):
+    """Drop the cached copy of an email template when it changes"""
+    invalidate_template('email', instance.template_type)
+
+@receiver(post_save, sender=SMSTemplate)
+@receiver(post_delete, sender=SMSTemplate)
+def invalidate_sms_template(sender, instance, **kwargs):
+    """Drop the cached copy of an SMS template when it changes"""
+    invalidate_template('sms', instance.template_type)
+
+@receiver(post_save, sender=Notification)
+def count_unread_on_save(sender, instance, created, **kwargs):
+    """Keep the user's unread counter in step with a created or edited notification"""
+    if created:
+        was_unread = False
+    elif hasattr(instance, '_was_read'):
+        was_unread = not instance._was_read
+    else:
+        forget_unread_count(instance.user_id)
+        return
+    adjust_unread_count(instance.user_id, int(not instance.is_read) - int(was_unread))
+    instance._was_read = instance.is_read
+
+@receiver(post_delete, sender=Notification)
+def count_unread_on_delete(sender, instance, **kwargs):
+    """Take a deleted unread notification out of the user's unread counter"""
+    if not getattr(instance, '_was_read', instance.is_read):
+        adjust_unread_count(instance.user_id, -1)
+
+@receiver(post_save, sender=SystemNotificationState)
+@receiver(post_delete, sender=SystemNotificationState)
+def forget_unread_count_on_state_change(sender, instance, **kwargs):
+    """Drop the unread counter after a state edit made outside the feed functions"""
+    forget_unread_count(instance.user_id)
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+@receiver(post_save, sender=SystemNotificationState)
+@receiver(post_delete, sender=SystemNotificationState)
+def invalidate_user_notifications(sender, instance, created=False, **kwargs):
+    """Change the version of a user's notifications when one of them changes"""
+    bump_user_version(instance.user_id)
+    if sender is Notification and created:
+        publish_user_event(instance.user_id, 'notification', {
+            'id': instance.id,
+            'title': instance.title,
+            'message': instance.message,
+            'type': instance.notification_type,
+            'created_at': instance.created_at,
+        })
+    else:
+        publish_user_event(instance.user_id, 'changed')
+
 @receiver(post_save, sender=SystemNotification)
-def create_user_notifications_on_system_notification_save(sender, instance, created, **kwargs):
-    """Create individual user notifications when a SystemNotification is created"""
-    if created and instance.show_to_users:
-        try:
-            count = NotificationService.convert_system_to_user_notifications(instance)
-            logger.info(f"Created {count} user notifications for system notification '{instance.title}'")
-        except Exception as e:
-            logger.error(f"Failed to create user notifications for system notification '{instance.title}': {str(e)}")
\ No newline at end of file
+@receiver(post_delete, sender=SystemNotification)
+def invalidate_system_notifications(sender, instance, created=False, **kwargs):
+    """Change the version shared by all users when a system notification changes"""
+    bump_system_version()
+    if not created:
+        # Deactivating, editing or deleting one can change anyone's count
+        bump_system_counts()
+    elif instance.is_valid() and instance.show_to_users and instance.created_at <= timezone.now():
+        record_system_posted()
+    if created and instance.is_valid():
+        publish_system_event('system_notification', {
+            'id': instance.id,
+            'title': instance.title,
+            'message': instance.message,
+            'type': instance.notification_type,
+            'show_to_users': instance.show_to_users,
+            'show_to_guests': instance.show_to_guests,
+            'created_at': instance.created_at,
+        })
+    else:
+        publish_system_event('changed')
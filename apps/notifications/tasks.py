@@ -0,0 +1,34 @@
+from apps.jobs.queue import job, enqueue
+from .services import EmailService
+from .low_stock import check_low_stock
+
+
+@job('notifications.send_email')
+def send_email(template_type, recipient, context=None):
+    """Send one templated email, raising so the queue retries failures"""
+    if not EmailService.send_email(template_type, recipient, context):
+        raise RuntimeError(f"Sending '{template_type}' email to {recipient} failed")
+
+
+@job('notifications.send_bulk_email')
+def send_bulk_email(template_type, recipients, context=None, idempotency_prefix=None):
+    """Send one email to many recipients over a single connection
+
+    Recipients that fail are retried individually as send_email jobs.
+    """
+    result = EmailService.send_bulk(template_type, [(recipient, context) for recipient in recipients])
+    for failure in result['failed']:
+        enqueue(
+            'notifications.send_email',
+            idempotency_key=f"{idempotency_prefix}:{failure['recipient']}" if idempotency_prefix else None,
+            template_type=template_type,
+            recipient=failure['recipient'],
+            context=context
+        )
+
+
+
+@job('notifications.check_low_stock')
+def check_low_stock_job(product_ids=None, threshold=None):
+    """Alert admins about products that have dropped to the low-stock threshold"""
+    check_low_stock(threshold=threshold, product_ids=product_ids)
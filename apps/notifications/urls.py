@@ -12,8 +12,10 @@ urlpatterns = [
     path('', include(router.urls)),
     path('email-templates/', views.email_template_management, name='email_template_management'),
     path('system-notifications/', views.system_notification_management, name='system_notification_management'),
+    path('system-notifications/active/', views.get_system_notifications, name='get_system_notifications'),
     path('system-notifications/<int:notification_id>/delete/', views.delete_system_notification, name='delete_system_notification'),
     path('user-notifications/', views.get_user_notifications, name='get_user_notifications'),
+    path('stream/', views.notification_stream, name='notification_stream'),
     path('user-notifications/all/', views.all_user_notifications, name='all_user_notifications'),
     path('check-low-stock/', views.check_low_stock_view, name='check_low_stock'),
 ]
\ No newline at end of file
@@ -1,15 +1,35 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
-from django.views.decorators.http import require_GET, require_POST
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.views.decorators.http import require_GET, require_POST, condition
 from django.utils import timezone
 from django.db import models
-from .models import EmailTemplate, SMSTemplate, EmailLog, SMSLog, SystemNotification, Notification
+from .models import EmailTemplate, SMSTemplate, EmailLog, SMSLog, SystemNotification
+from .feed import (
+    get_notifications, get_unread_count, mark_entries_read, make_cursor,
+    get_user_version, get_system_version
+)
+from .pubsub import get_broker, user_channel, SYSTEM_CHANNEL
 from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.http import require_http_methods
 from .management.commands.check_low_stock import Command as CheckLowStockCommand
 from django.http import HttpResponseNotAllowed
+from django.conf import settings
+import asyncio
+import json
+import time
+
+# System notifications appear and expire on their own schedule without a
+# save; the ETag changes at least this often so polls pick that up
+SYSTEM_NOTIFICATION_ETAG_MAX_AGE = getattr(settings, 'SYSTEM_NOTIFICATION_ETAG_MAX_AGE', 15 * 60)
+# Event streams are closed after this long and the browser reconnects,
+# so no connection outlives a deploy or a logout for long
+NOTIFICATION_STREAM_MAX_SECONDS = getattr(settings, 'NOTIFICATION_STREAM_MAX_SECONDS', 10 * 60)
+NOTIFICATION_STREAM_KEEPALIVE_SECONDS = 25
+NOTIFICATION_STREAM_RETRY_MS = 5000
+NOTIFICATIONS_PER_PAGE = 20
 
 @login_required
 def email_template_management(request):
@@ -141,7 +161,22 @@ def system_notification_management(request):
     return render(request, 'notifications/system_notification_management.html', context)
 
 
+def system_notifications_etag(request):
+    """ETag of the system notifications shown to this kind of visitor"""
+    audience = 'users' if request.user.is_authenticated else 'guests'
+    window = int(time.time() // SYSTEM_NOTIFICATION_ETAG_MAX_AGE)
+    return f'system-{audience}-{get_system_version()}-{window}'
+
+
+def user_notifications_etag(request):
+    """ETag of a user's notifications; None for anonymous visitors"""
+    if not request.user.is_authenticated:
+        return None
+    return f'{system_notifications_etag(request)}-user-{request.user.pk}-{get_user_version(request.user.pk)}'
+
+
 @require_GET
+@condition(etag_func=system_notifications_etag)
 def get_system_notifications(request):
     """Get active system notifications for display"""
     # Get active notifications that are valid
@@ -177,6 +212,7 @@ def get_system_notifications(request):
 
 
 @require_GET
+@condition(etag_func=user_notifications_etag)
 def get_user_notifications(request):
     """Get user notifications"""
     if not request.user.is_authenticated:
@@ -185,30 +221,85 @@ def get_user_notifications(request):
             'message': 'Authentication required'
         }, status=401)
     
-    # Get user's 10 most recent notifications
-    notifications = Notification.objects.filter(
-        user=request.user
-    ).order_by('-created_at')[:10]
+    # Get user's 10 most recent personal and system notifications
+    notifications = get_notifications(request.user, limit=10)
     
     # Convert to JSON format
     notification_data = [
         {
-            'id': n.id,
-            'title': n.title,
-            'message': n.message,
-            'type': n.notification_type,
-            'is_read': n.is_read,
-            'created_at': n.created_at.isoformat(),
+            'id': n['id'],
+            'title': n['title'],
+            'message': n['message'],
+            'type': n['notification_type'],
+            'is_read': n['is_read'],
+            'created_at': n['created_at'].isoformat(),
         }
         for n in notifications
     ]
     
     return JsonResponse({
         'success': True,
-        'notifications': notification_data
+        'notifications': notification_data,
+        'unread_count': get_unread_count(request.user)
     })
 
 
+async def notification_events(channels, audience):
+    """Yield Server-Sent Events for the events published on channels"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + NOTIFICATION_STREAM_MAX_SECONDS
+    yield f'retry: {NOTIFICATION_STREAM_RETRY_MS}\n\n'
+    
+    async with get_broker().subscribe(channels) as queue:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                channel, message = await asyncio.wait_for(
+                    queue.get(),
+                    timeout=min(NOTIFICATION_STREAM_KEEPALIVE_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                # Comment lines keep proxies from closing an idle connection
+                yield ': keepalive\n\n'
+                continue
+            
+            event = json.loads(message)
+            if event['event'] == 'system_notification' and not event['data'].get(audience):
+                continue
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+@require_GET
+async def notification_stream(request):
+    """Push new notifications to the browser as Server-Sent Events
+    
+    Only served under ASGI: under WSGI an open stream would hold a worker
+    for its whole lifetime, so the browser is told to keep polling the JSON
+    endpoints instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({
+            'success': False,
+            'message': 'Notification streaming is not available'
+        }, status=503)
+    
+    user = await request.auser()
+    channels = [SYSTEM_CHANNEL]
+    if user.is_authenticated:
+        channels.append(user_channel(user.pk))
+    audience = 'show_to_users' if user.is_authenticated else 'show_to_guests'
+    
+    response = StreamingHttpResponse(
+        notification_events(channels, audience),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @staff_member_required
 @require_http_methods(["POST"])
 def check_low_stock_view(request):
@@ -232,14 +323,7 @@ def delete_system_notification(request, notification_id):
     
     notification = get_object_or_404(SystemNotification, id=notification_id)
     
-    # Delete related user notifications
-    Notification.objects.filter(
-        title=notification.title,
-        message=notification.message,
-        created_at=notification.created_at
-    ).delete()
-    
-    # Delete the system notification
+    # Delete the system notification along with users' read state for it
     notification.delete()
     
     messages.success(request, f'Notification "{notification.title}" deleted successfully!')
@@ -248,16 +332,21 @@ def delete_system_notification(request, notification_id):
 
 @login_required
 def all_user_notifications(request):
-    """Display all user notifications"""
-    # Get all user notifications ordered by creation date
-    notifications = Notification.objects.filter(
-        user=request.user
-    ).order_by('-created_at')
+    """Display a user's notifications, a page at a time"""
+    # Pages are fetched by seeking past the last notification shown, so
+    # deep pages cost the same as the first one
+    before = request.GET.get('before')
+    notifications = get_notifications(request.user, limit=NOTIFICATIONS_PER_PAGE + 1, before=before)
+    has_older = len(notifications) > NOTIFICATIONS_PER_PAGE
+    notifications = notifications[:NOTIFICATIONS_PER_PAGE]
     
-    # Mark all as read when viewing
-    notifications.filter(is_read=False).update(is_read=True)
+    # Mark the notifications on this page as read when viewing
+    mark_entries_read(request.user, notifications)
     
     context = {
-        'notifications': notifications
+        'notifications': notifications,
+        'unread_count': get_unread_count(request.user),
+        'is_first_page': not before,
+        'older_cursor': make_cursor(notifications[-1]) if has_older else None,
     }
     return render(request, 'notifications/all_user_notifications.html', context)
@@ -11,7 +11,7 @@ from io import BytesIO
 from xhtml2pdf import pisa
 from .models import Order, CartItem, Wishlist
 from .serializers import OrderSerializer, CartItemSerializer
-from apps.cms.models import ContactInfo
+from apps.core.site_settings import get_contact_info
 import json
 
 class OrderViewSet(viewsets.ModelViewSet):
@@ -31,11 +31,8 @@ class OrderViewSet(viewsets.ModelViewSet):
         if request.user.role.name != 'admin' and order.customer != request.user:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
-        # Get contact information
-        try:
-            contact_info = ContactInfo.objects.get(id=1)
-        except ContactInfo.DoesNotExist:
-            contact_info = None
+        # Get contact information from the cached site settings
+        contact_info = get_contact_info()
         
         # Check if PDF download is requested
         download_pdf = request.GET.get('download') == 'pdf'
@@ -0,0 +1,158 @@
+"""Atomic order placement
+
+place_order turns a customer's cart into an order in one transaction:
+stock is decremented with conditional UPDATEs, so two checkouts can never
+sell the same unit, the coupon's usage count is bumped the same way, and
+the order items are written with a single bulk insert. Any failure rolls
+the whole order back and is raised as a CheckoutError describing what
+went wrong. Products the order takes down to the low-stock threshold are
+handed to a queued low-stock check.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from apps.shop.models import Product
+from apps.marketing.models import Coupon, CouponUsage
+from apps.core.catalog import bump_catalog_version
+from apps.core.homepage import bump_homepage_version
+from apps.jobs.queue import enqueue
+from apps.notifications.low_stock import LOW_STOCK_THRESHOLD
+from .models import Order, OrderItem, CartItem
+
+
+class CheckoutError(Exception):
+    """Order placement failed; nothing was written"""
+
+    def __init__(self, code, message, items=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.items = items or []
+
+    def as_dict(self):
+        return {
+            'success': False,
+            'error': self.code,
+            'message': self.message,
+            'items': self.items,
+        }
+
+
+def reserve_stock(cart_items):
+    """Decrement stock for every cart item or raise if any is short
+
+    Products are updated in ID order so concurrent checkouts take row
+    locks in the same order.
+    """
+    shortages = []
+    for item in sorted(cart_items, key=lambda item: item.product_id):
+        reserved = Product.objects.filter(
+            pk=item.product_id,
+            is_active=True,
+            stock__gte=item.quantity
+        ).update(stock=F('stock') - item.quantity)
+        if not reserved:
+            shortages.append(item)
+
+    if shortages:
+        available = dict(Product.objects.filter(
+            pk__in=[item.product_id for item in shortages],
+            is_active=True
+        ).values_list('id', 'stock'))
+        raise CheckoutError(
+            'out_of_stock',
+            'Some items in your cart are no longer available in the requested quantity.',
+            [
+                {
+                    'product_id': item.product_id,
+                    'name': item.product.name,
+                    'requested': item.quantity,
+                    'available': available.get(item.product_id, 0),
+                }
+                for item in shortages
+            ]
+        )
+
+
+def redeem_coupon(code, user, cart_items, total):
+    """Lock and validate a coupon, count one use and return the discount"""
+    coupon = Coupon.objects.select_for_update().filter(code=code).first()
+    if coupon is None or not coupon.can_be_used_by_user(user):
+        raise CheckoutError('coupon_unavailable', 'The applied coupon is no longer valid.')
+
+    redeemed = Coupon.objects.filter(pk=coupon.pk).filter(
+        Q(max_uses__isnull=True) | Q(used_count__lt=F('max_uses'))
+    ).update(used_count=F('used_count') + 1)
+    if not redeemed:
+        raise CheckoutError('coupon_unavailable', 'The applied coupon has reached its usage limit.')
+
+    discount = Decimal(str(coupon.calculate_discount(cart_items, float(total)))).quantize(Decimal('0.01'))
+    return coupon, min(discount, total)
+
+
+def place_order(user, shipping, payment_mode, coupon_code=None):
+    """Create an order from the user's cart and return it
+
+    `shipping` holds the Order shipping_* fields without the prefix
+    (name, email, mobile, address, city, pincode). Raises CheckoutError
+    if the cart is empty, stock has run out or the coupon cannot be used.
+    """
+    with transaction.atomic():
+        # Locking the cart makes a double-submitted checkout wait for the
+        # first one and then find the cart empty
+        cart_items = list(
+            CartItem.objects.select_for_update().filter(user=user).select_related('product', 'gift_wrap')
+        )
+        if not cart_items:
+            raise CheckoutError('empty_cart', 'Your cart is empty.')
+
+        reserve_stock(cart_items)
+
+        total_amount = sum(item.get_total_price() for item in cart_items)
+        coupon = None
+        if coupon_code:
+            coupon, discount = redeem_coupon(coupon_code, user, cart_items, total_amount)
+            total_amount -= discount
+
+        order = Order.objects.create(
+            customer=user,
+            total_amount=total_amount,
+            payment_mode=payment_mode,
+            **{f'shipping_{field}': value for field, value in shipping.items()}
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=item.product,
+                quantity=item.quantity,
+                price=item.product.price,
+                gift_wrap=item.gift_wrap
+            )
+            for item in cart_items
+        ])
+
+        if coupon is not None:
+            CouponUsage.objects.create(coupon=coupon, user=user, order=order)
+
+        CartItem.objects.filter(pk__in=[item.pk for item in cart_items]).delete()
+
+        # Stock was changed with update(), which sends no signals; listings
+        # only filter on whether a product is in stock, so they only need
+        # refreshing when something sold out
+        low_stock = dict(Product.objects.filter(
+            pk__in=[item.product_id for item in cart_items],
+            stock__lte=LOW_STOCK_THRESHOLD
+        ).values_list('id', 'stock'))
+        if 0 in low_stock.values():
+            transaction.on_commit(invalidate_product_caches)
+        if low_stock:
+            enqueue('notifications.check_low_stock', product_ids=sorted(low_stock))
+
+    return order
+
+
+def invalidate_product_caches():
+    bump_catalog_version()
+    bump_homepage_version()
@@ -0,0 +1,111 @@
+"""Order listing for the order management page
+
+Pages are fetched by seeking on (created_at, id) from a cursor instead of
+with OFFSET, so a page deep into the history costs the same as the first
+one; the composite indexes on Order serve both the order and the seek.
+The total shown above the list is counted once per filter and cached for
+ORDER_COUNT_CACHE_TIMEOUT seconds, so it may trail recent orders briefly.
+"""
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from apps.users.search import filter_by_name
+from .models import Order
+
+ORDERS_PER_PAGE = 20
+ORDER_COUNT_CACHE_TIMEOUT = getattr(settings, 'ORDER_COUNT_CACHE_TIMEOUT', 60)
+
+
+def make_cursor(order):
+    return f'{order.created_at.isoformat()}|{order.pk}'
+
+
+def parse_cursor(cursor):
+    """Return the (created_at, id) encoded in a cursor, or None if it is invalid"""
+    try:
+        created_at, order_id = cursor.split('|', 1)
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def filter_orders(queryset, status=None, customer=None):
+    if status:
+        queryset = queryset.filter(order_status=status)
+    if customer:
+        queryset = filter_by_name(queryset, customer, user_field='customer_id')
+    return queryset
+
+
+def get_order_count(status=None, customer=None):
+    """Number of orders matching the filters, cached briefly"""
+    digest = hashlib.md5(f'{status}|{customer}'.encode()).hexdigest()
+    cache_key = f'orders:count:{digest}'
+    count = cache.get(cache_key)
+    if count is None:
+        count = filter_orders(Order.objects.all(), status, customer).count()
+        cache.set(cache_key, count, ORDER_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class OrderPage:
+    """One page of orders, newest first, with cursors for its neighbours"""
+
+    def __init__(self, orders, newer_cursor, older_cursor):
+        self.orders = orders
+        self.newer_cursor = newer_cursor
+        self.older_cursor = older_cursor
+
+    def __iter__(self):
+        return iter(self.orders)
+
+    def __len__(self):
+        return len(self.orders)
+
+    @property
+    def has_other_pages(self):
+        return bool(self.newer_cursor or self.older_cursor)
+
+
+def get_order_page(queryset, before=None, after=None, per_page=ORDERS_PER_PAGE):
+    """Return the page of orders older than `before` or newer than `after`
+
+    Without a cursor the newest orders are returned.
+    """
+    before = parse_cursor(before) if before else None
+    after = parse_cursor(after) if after else None
+
+    if after is not None:
+        created_at, order_id = after
+        rows = list(
+            queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=order_id)
+            ).order_by('created_at', 'id')[:per_page + 1]
+        )
+        if len(rows) <= per_page:
+            # Back at the newest orders: show a full first page
+            return get_order_page(queryset, per_page=per_page)
+        orders = rows[:per_page][::-1]
+        has_newer = has_older = True
+    else:
+        if before is not None:
+            created_at, order_id = before
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=order_id)
+            )
+        rows = list(queryset.order_by('-created_at', '-id')[:per_page + 1])
+        has_older = len(rows) > per_page
+        orders = rows[:per_page]
+        has_newer = before is not None
+
+    if not orders:
+        return OrderPage([], None, None)
+    return OrderPage(
+        orders,
+        make_cursor(orders[0]) if has_newer else None,
+        make_cursor(orders[-1]) if has_older else None
+    )
@@ -0,0 +1,169 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from apps.shop.models import Product, Category
+from apps.marketing.models import Coupon, CouponUsage
+from apps.users.models import User
+from apps.orders.models import Order, CartItem
+from apps.orders.checkout import place_order, CheckoutError
+
+class Command(BaseCommand):
+    help = 'Run many parallel checkouts against the same product and verify nothing is oversold'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--checkouts',
+            type=int,
+            default=50,
+            help='Number of customers checking out at once (default: 50)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=16,
+            help='Number of parallel threads (default: 16)'
+        )
+        parser.add_argument(
+            '--stock',
+            type=int,
+            default=10,
+            help='Starting stock of the test product (default: 10)'
+        )
+        parser.add_argument(
+            '--quantity',
+            type=int,
+            default=1,
+            help='Quantity each customer buys (default: 1)'
+        )
+        parser.add_argument(
+            '--coupon-uses',
+            type=int,
+            default=0,
+            help='Apply a coupon limited to this many uses to every checkout (default: no coupon)'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Keep the test product, customers and orders afterwards'
+        )
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        category, product, users, coupon = self.create_fixtures(run_id, options)
+        
+        try:
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                outcomes = list(executor.map(
+                    lambda user: self.checkout(user, coupon.code if coupon else None),
+                    users
+                ))
+            elapsed = time.monotonic() - started
+            
+            self.report(product, users, coupon, outcomes, elapsed, options)
+        finally:
+            if not options['keep']:
+                self.delete_fixtures(category, product, users, coupon)
+
+    def create_fixtures(self, run_id, options):
+        with transaction.atomic():
+            category = Category.objects.create(name=f'Load Test {run_id}')
+            product = Product.objects.create(
+                name=f'Load Test Product {run_id}',
+                slug=f'load-test-{run_id}',
+                category=category,
+                description='Created by checkout_load_test',
+                price=100,
+                stock=options['stock'],
+                is_active=True
+            )
+            
+            coupon = None
+            if options['coupon_uses']:
+                coupon = Coupon.objects.create(
+                    code=f'LOADTEST-{run_id}',
+                    coupon_type='fixed',
+                    discount_value=10,
+                    max_uses=options['coupon_uses']
+                )
+            
+            users = []
+            for number in range(options['checkouts']):
+                user = User.objects.create(
+                    username=f'loadtest_{run_id}_{number}',
+                    full_name=f'Load Test {number}',
+                    email=f'loadtest_{run_id}_{number}@example.com'
+                )
+                CartItem.objects.create(user=user, product=product, quantity=options['quantity'])
+                users.append(user)
+        
+        return category, product, users, coupon
+
+    def checkout(self, user, coupon_code):
+        try:
+            place_order(
+                user,
+                {
+                    'name': user.full_name,
+                    'email': user.email,
+                    'mobile': '0000000000',
+                    'address': 'Load test',
+                    'city': 'Load test',
+                    'pincode': '000000',
+                },
+                'cod',
+                coupon_code=coupon_code
+            )
+            return 'placed'
+        except CheckoutError as e:
+            return e.code
+        except Exception as e:
+            return f'error: {e}'
+        finally:
+            connection.close()
+
+    def report(self, product, users, coupon, outcomes, elapsed, options):
+        counts = {}
+        for outcome in outcomes:
+            counts[outcome] = counts.get(outcome, 0) + 1
+        
+        self.stdout.write(f'{len(outcomes)} checkouts in {elapsed:.2f}s ({len(outcomes) / elapsed:.1f}/s)')
+        for outcome, count in sorted(counts.items()):
+            self.stdout.write(f'  {outcome}: {count}')
+        
+        product.refresh_from_db()
+        placed = counts.get('placed', 0)
+        orders = Order.objects.filter(customer__in=users).count()
+        expected = min(options['checkouts'], options['stock'] // options['quantity'])
+        if coupon:
+            expected = min(expected, options['coupon_uses'])
+        
+        failures = []
+        if placed != orders:
+            failures.append(f'{placed} checkouts succeeded but {orders} orders exist')
+        if placed != expected:
+            failures.append(f'expected {expected} orders, got {placed}')
+        if product.stock != options['stock'] - placed * options['quantity']:
+            failures.append(f'stock is {product.stock} after selling {placed * options["quantity"]} of {options["stock"]}')
+        if coupon:
+            coupon.refresh_from_db()
+            usages = CouponUsage.objects.filter(coupon=coupon).count()
+            if not coupon.used_count == usages == placed:
+                failures.append(f'coupon used_count is {coupon.used_count} with {usages} usages for {placed} orders')
+        
+        if failures:
+            raise CommandError('Load test failed: ' + '; '.join(failures))
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Load test passed: {placed} orders placed, stock {options["stock"]} -> {product.stock}'
+            )
+        )
+
+    def delete_fixtures(self, category, product, users, coupon):
+        User.objects.filter(pk__in=[user.pk for user in users]).delete()
+        category.delete()
+        if coupon:
+            coupon.delete()
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_cartitem_gift_wrap'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='orders_orde_created_f0ce29_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='orders_orde_order_s_33197f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='orders_orde_created_f2fe3a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['order_status', '-created_at', '-id'], name='orders_orde_order_s_9e449c_idx'),
+        ),
+    ]
@@ -63,6 +63,9 @@ class Order(models.Model):
         ('failed', 'Failed'),
     ]
     
+    # Fields the daily metrics rollups read (see apps.metrics.signals)
+    ROLLUP_FIELDS = ['created_at', 'order_status', 'total_amount']
+    
     order_number = models.CharField(max_length=20, unique=True)
     customer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -85,8 +88,8 @@ class Order(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['-created_at']),
-            models.Index(fields=['order_status']),
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['order_status', '-created_at', '-id']),
             models.Index(fields=['payment_status']),
             models.Index(fields=['customer']),
             models.Index(fields=['order_number']),
@@ -95,6 +98,16 @@ class Order(models.Model):
     def __str__(self):
         return f"Order {self.order_number} - {self.customer.full_name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        if set(cls.ROLLUP_FIELDS) <= loaded.keys():
+            # Remember what the metrics rollups read so that saves which
+            # change none of it do not queue a refresh
+            instance._rollup_state = tuple(loaded[field] for field in cls.ROLLUP_FIELDS)
+        return instance
+    
     def save(self, *args, **kwargs):
         if not self.order_number:
             import random
@@ -0,0 +1,79 @@
+from apps.jobs.queue import job, enqueue
+from apps.notifications.models import Notification
+from apps.users.models import User
+from .models import Order
+
+
+@job('orders.notify_order_placed')
+def notify_order_placed(order_id, order_url, admin_order_url):
+    """Send the customer and the admins their new-order notifications
+
+    In-app notifications are created here. The customer email and the
+    admin emails are sent by their own jobs, so a failing send is retried
+    without repeating the rest.
+    """
+    order = Order.objects.select_related('customer').get(pk=order_id)
+    customer = order.customer
+    
+    # Notify customer
+    if customer.email:
+        context = {
+            'order_number': order.order_number,
+            'customer_name': customer.full_name,
+            'order_total': order.total_amount,
+            'order_date': order.created_at.strftime('%B %d, %Y'),
+            'order_items': [
+                {
+                    'name': item.product.name,
+                    'quantity': item.quantity,
+                    'price': item.price,
+                    'total': item.get_total_price()
+                }
+                for item in order.items.select_related('product', 'gift_wrap')
+            ],
+            'shipping_address': f"{order.shipping_address}, {order.shipping_city}, {order.shipping_pincode}",
+            'order_url': order_url
+        }
+        enqueue(
+            'notifications.send_email',
+            idempotency_key=f'order:{order.pk}:email:{customer.email}',
+            template_type='order_confirmation',
+            recipient=customer.email,
+            context=context
+        )
+    
+    # Create in-app notification for customer
+    Notification.objects.get_or_create(
+        user=customer,
+        title=f'Order #{order.order_number} Confirmed',
+        message=f'Your order #{order.order_number} for ₹{order.total_amount} has been confirmed and is being processed.',
+        notification_type='success'
+    )
+    
+    # Notify admins
+    admin_context = {
+        'order_number': order.order_number,
+        'customer_name': customer.full_name,
+        'order_total': order.total_amount,
+        'order_date': order.created_at.strftime('%B %d, %Y'),
+        'order_url': admin_order_url
+    }
+    admins = list(User.objects.filter(is_active=True, role__name='admin'))
+    for admin in admins:
+        Notification.objects.get_or_create(
+            user=admin,
+            title=f'New Order #{order.order_number}',
+            message=f'New order from {customer.full_name} for ₹{order.total_amount}',
+            notification_type='info'
+        )
+    
+    admin_emails = [admin.email for admin in admins if admin.email]
+    if admin_emails:
+        enqueue(
+            'notifications.send_bulk_email',
+            idempotency_key=f'order:{order.pk}:admin_emails',
+            template_type='order_confirmation',
+            recipients=admin_emails,
+            context=admin_context,
+            idempotency_prefix=f'order:{order.pk}:admin_email'
+        )
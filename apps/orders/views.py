@@ -3,8 +3,8 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
-from django.core.paginator import Paginator
 from .models import Order, OrderItem, CartItem, GiftWrap, Wishlist
+from .listing import filter_orders, get_order_page, get_order_count
 from apps.shop.models import Product
 import json
 
@@ -15,24 +15,20 @@ def order_management(request):
         messages.error(request, 'Access denied.')
         return redirect('core:dashboard')
     
-    orders = Order.objects.select_related('customer').prefetch_related('items__product', 'items__gift_wrap')
+    # The list only shows order columns; line items are loaded on the detail page
+    orders = Order.objects.select_related('customer')
     
     # Filters
     status_filter = request.GET.get('status')
-    if status_filter:
-        orders = orders.filter(order_status=status_filter)
-    
     customer_filter = request.GET.get('customer')
-    if customer_filter:
-        orders = orders.filter(customer__full_name__icontains=customer_filter)
+    orders = filter_orders(orders, status_filter, customer_filter)
     
     # Pagination
-    paginator = Paginator(orders, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page = get_order_page(orders, before=request.GET.get('before'), after=request.GET.get('after'))
     
     context = {
-        'orders': page_obj,
+        'orders': page,
+        'total_orders': get_order_count(status_filter, customer_filter),
         'status_choices': Order.STATUS_CHOICES,
         'selected_status': status_filter,
         'customer_filter': customer_filter,
@@ -44,7 +40,10 @@ def order_management(request):
 def order_detail(request, order_id):
     """Order detail and status update"""
     # Get the order
-    order = get_object_or_404(Order, id=order_id)
+    order = get_object_or_404(
+        Order.objects.select_related('customer').prefetch_related('items__product', 'items__gift_wrap'),
+        id=order_id
+    )
     
     # Allow customers to view their own orders, or staff with permission to view all orders
     if not (order.customer == request.user or request.user.has_permission('orders', 'view')):
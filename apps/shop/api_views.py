@@ -1,7 +1,44 @@
 from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Case, When, IntegerField
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
 from .models import Product, Category
 from .serializers import ProductSerializer, CategorySerializer
+from .search import search_products
+from .autocomplete import get_autocomplete_index, DEFAULT_LIMIT
+
+# Only the most relevant matches are ranked; the CASE ordering below gets one
+# branch per ID, so an unbounded list makes the query grow with the catalog
+MAX_SEARCH_RESULTS = 200
+
+class ProductSearchFilter(filters.SearchFilter):
+    """Search filter backed by the full-text product search index"""
+    
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+        
+        product_ids = search_products(' '.join(search_terms), limit=MAX_SEARCH_RESULTS)
+        if not product_ids:
+            return queryset.none()
+        
+        # Annotate each match with its position in the ranked results
+        return queryset.filter(id__in=product_ids).annotate(
+            search_rank=Case(
+                *[When(id=product_id, then=position) for position, product_id in enumerate(product_ids)],
+                output_field=IntegerField()
+            )
+        )
+
+class ProductOrderingFilter(filters.OrderingFilter):
+    """Order search results by relevance unless an explicit ordering is requested"""
+    
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and 'search_rank' in queryset.query.annotations:
+            return ['search_rank']
+        return super().get_ordering(request, queryset, view)
 
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.filter(is_active=True)
@@ -12,8 +49,23 @@ class CategoryViewSet(viewsets.ModelViewSet):
 class ProductViewSet(viewsets.ModelViewSet):
     queryset = Product.objects.filter(is_active=True)
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, ProductOrderingFilter]
     filterset_fields = ['category', 'is_featured']
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'price', 'created_at']
-    ordering = ['name']
\ No newline at end of file
+    ordering = ['name']
+
+@require_GET
+def autocomplete(request):
+    """Prefix suggestions for the search box, served from the in-memory index"""
+    query = request.GET.get('q', '')
+    try:
+        limit = max(1, min(int(request.GET.get('limit', DEFAULT_LIMIT)), 20))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    
+    return JsonResponse({
+        'success': True,
+        'query': query,
+        'suggestions': get_autocomplete_index().search(query, limit),
+    })
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class ShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.shop'
\ No newline at end of file
+    name = 'apps.shop'
+
+    def ready(self):
+        import apps.shop.signals
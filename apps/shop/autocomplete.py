@@ -0,0 +1,301 @@
+"""In-process prefix index for search-as-you-type suggestions
+
+Suggestions for active products, active categories and product tags are
+kept in a sorted array of (term, entry id) pairs, where the terms of an
+entry are its normalized label and every word-boundary suffix of it. A
+prefix lookup is a bisect into that array, so queries never touch the
+database.
+
+The index is built in a background thread when a process serves its
+first request (see apps.shop.signals), and then updated in place from
+model signals. Each update also bumps a version in the shared cache
+and stores the changed entries under that version, so a worker process
+that sees a newer version replays the updates it missed instead of
+reloading everything. Only when some of them have expired from the cache
+is the index rebuilt from the database, in a background thread while
+lookups keep being served from the current copy. Lookups compare their
+version with the shared one at most every VERSION_CHECK_INTERVAL
+seconds, so most keystrokes do not touch the cache at all.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.urls import reverse
+from django.utils.text import slugify
+
+from .models import Product, Category
+
+AUTOCOMPLETE_VERSION_KEY = 'autocomplete:version'
+# How long a published update stays available for other processes to replay
+UPDATE_TIMEOUT = 24 * 60 * 60
+# Further behind than this a process rebuilds rather than replays
+MAX_REPLAY = 1000
+# Seconds between checks for other processes' updates
+VERSION_CHECK_INTERVAL = getattr(settings, 'AUTOCOMPLETE_VERSION_CHECK_INTERVAL', 5)
+# Seconds a lookup waits for the warm-up build before building the index itself
+WARM_UP_WAIT = 10
+DEFAULT_LIMIT = 8
+MAX_SCAN = 200
+TYPE_ORDER = {'category': 0, 'product': 1, 'tag': 2}
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    return ' '.join(WORD_RE.findall((text or '').lower()))
+
+
+def index_terms(label):
+    """The normalized label and each suffix that starts at a word boundary"""
+    words = normalize(label).split()
+    return [' '.join(words[position:]) for position in range(len(words))]
+
+
+def product_entries(product):
+    entries = [(
+        ('product', product.pk),
+        {'type': 'product', 'label': product.name, 'url': reverse('core:product_detail', args=[product.pk])}
+    )]
+    for tag in (product.tags or '').split(','):
+        tag = tag.strip()
+        if tag:
+            entries.append((
+                ('tag', normalize(tag)),
+                {'type': 'tag', 'label': tag, 'url': f"{reverse('core:shop')}?{urlencode({'search': tag})}"}
+            ))
+    return entries
+
+
+def category_entries(category):
+    return [(
+        ('category', category.pk),
+        {'type': 'category', 'label': category.name, 'url': reverse('core:category_products', args=[slugify(category.name)])}
+    )]
+
+
+class AutocompleteIndex:
+    """Sorted-array prefix index with reference-counted entries"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.version = None
+        self.rebuilding = False
+        self.checked_at = None
+        self.built = threading.Event()
+
+    def _reset(self):
+        self._terms = []        # sorted (term, entry_id) pairs
+        self._entries = {}      # entry_id -> suggestion dict
+        self._labels = {}       # entry_id -> normalized label
+        self._refcounts = {}    # entry_id -> number of sources providing it
+        self._sources = {}      # source_id -> entry_ids it provides
+
+    def _acquire_entry(self, entry_id, entry):
+        if entry_id not in self._entries:
+            self._entries[entry_id] = entry
+            self._labels[entry_id] = normalize(entry['label'])
+            self._refcounts[entry_id] = 0
+            for term in index_terms(entry['label']):
+                insort(self._terms, (term, entry_id))
+        self._refcounts[entry_id] += 1
+
+    def _release_entry(self, entry_id):
+        self._refcounts[entry_id] -= 1
+        if self._refcounts[entry_id] > 0:
+            return
+        entry = self._entries.pop(entry_id)
+        del self._labels[entry_id]
+        del self._refcounts[entry_id]
+        for term in index_terms(entry['label']):
+            position = bisect_left(self._terms, (term, entry_id))
+            if position < len(self._terms) and self._terms[position] == (term, entry_id):
+                del self._terms[position]
+
+    def set_source(self, source_id, entries):
+        """Replace the entries provided by one product or category"""
+        with self._lock:
+            self.remove_source(source_id)
+            self._sources[source_id] = [entry_id for entry_id, entry in entries]
+            for entry_id, entry in entries:
+                self._acquire_entry(entry_id, entry)
+
+    def remove_source(self, source_id):
+        with self._lock:
+            for entry_id in self._sources.pop(source_id, []):
+                self._release_entry(entry_id)
+
+    def apply_update(self, source_id, entries):
+        """Set the entries of a source, or remove it when entries is None"""
+        if entries is None:
+            self.remove_source(source_id)
+        else:
+            self.set_source(source_id, entries)
+
+    def replace_with(self, other):
+        """Take over the contents of another index"""
+        with self._lock:
+            self._terms, self._entries, self._labels = other._terms, other._entries, other._labels
+            self._refcounts, self._sources = other._refcounts, other._sources
+
+    def build(self):
+        """Load every active product and category into a fresh index"""
+        with self._lock:
+            self._reset()
+            for product in Product.objects.filter(is_active=True).only('id', 'name', 'tags'):
+                self.set_source(('product', product.pk), product_entries(product))
+            for category in Category.objects.filter(is_active=True).only('id', 'name'):
+                self.set_source(('category', category.pk), category_entries(category))
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        with self._lock:
+            matches = {}
+            position = bisect_left(self._terms, (prefix,))
+            while position < len(self._terms) and len(matches) < MAX_SCAN:
+                term, entry_id = self._terms[position]
+                if not term.startswith(prefix):
+                    break
+                # Prefer entries whose whole label starts with the query
+                label_match = term == self._labels[entry_id]
+                matches[entry_id] = matches.get(entry_id, False) or label_match
+                position += 1
+            entries = [(self._entries[entry_id], label_match) for entry_id, label_match in matches.items()]
+
+        entries.sort(key=lambda item: (not item[1], TYPE_ORDER[item[0]['type']], len(item[0]['label']), item[0]['label']))
+        return [entry for entry, label_match in entries[:limit]]
+
+
+_index = AutocompleteIndex()
+
+
+def update_key(version):
+    return f'autocomplete:update:{version}'
+
+
+def get_autocomplete_index():
+    """Return the process-wide index, brought up to date with other processes' changes"""
+    if _index.version is None:
+        if _index.rebuilding:
+            _index.built.wait(WARM_UP_WAIT)
+        with _index._lock:
+            if _index.version is None:
+                shared_version = cache.get(AUTOCOMPLETE_VERSION_KEY)
+                _index.build()
+                _index.version = shared_version if shared_version is not None else bump_autocomplete_version()
+                _index.checked_at = time.monotonic()
+                _index.built.set()
+        return _index
+
+    now = time.monotonic()
+    if _index.checked_at is not None and now - _index.checked_at < VERSION_CHECK_INTERVAL:
+        return _index
+    _index.checked_at = now
+    shared_version = cache.get(AUTOCOMPLETE_VERSION_KEY)
+    if shared_version is not None and shared_version != _index.version:
+        with _index._lock:
+            if not _catch_up(shared_version):
+                rebuild_in_background()
+    return _index
+
+
+def warm_up():
+    """Start building the index in the background if it has not been built"""
+    if _index.version is None:
+        rebuild_in_background()
+
+
+def bump_autocomplete_version():
+    try:
+        return cache.incr(AUTOCOMPLETE_VERSION_KEY)
+    except ValueError:
+        cache.set(AUTOCOMPLETE_VERSION_KEY, 1, None)
+        return 1
+
+
+def _catch_up(shared_version):
+    """Replay the updates published since this process's version
+
+    Returns False if that is not possible: too many were missed, some
+    have expired, or the shared version went back after a cache flush.
+    """
+    if shared_version is None or not 0 <= shared_version - _index.version <= MAX_REPLAY:
+        return False
+    keys = [update_key(version) for version in range(_index.version + 1, shared_version + 1)]
+    updates = cache.get_many(keys)
+    for key in keys:
+        if key not in updates:
+            return False
+        _index.apply_update(*updates[key])
+        _index.version += 1
+    return True
+
+
+def rebuild_in_background():
+    """Reload the index from the database without blocking lookups"""
+    with _index._lock:
+        if _index.rebuilding:
+            return
+        _index.rebuilding = True
+    threading.Thread(target=_rebuild, daemon=True).start()
+
+
+def _rebuild():
+    try:
+        # Updates made while loading are newer than this and get replayed
+        version = cache.get(AUTOCOMPLETE_VERSION_KEY)
+        fresh = AutocompleteIndex()
+        fresh.build()
+        with _index._lock:
+            _index.replace_with(fresh)
+            _index.version = version if version is not None else bump_autocomplete_version()
+            _index.checked_at = time.monotonic()
+        _index.built.set()
+    finally:
+        _index.rebuilding = False
+        connection.close()
+
+
+def _apply(source_id, entries):
+    """Apply an update to this process's index and publish it to the others"""
+    with _index._lock:
+        shared_version = cache.get(AUTOCOMPLETE_VERSION_KEY)
+        in_sync = _index.version is not None and (shared_version == _index.version or _catch_up(shared_version))
+        if in_sync:
+            _index.apply_update(source_id, entries)
+        new_version = bump_autocomplete_version()
+        cache.set(update_key(new_version), (source_id, entries), UPDATE_TIMEOUT)
+        # If another process published in between, the next lookup
+        # replays both updates; applying this one twice is harmless
+        if in_sync and new_version == _index.version + 1:
+            _index.version = new_version
+
+
+def update_product(product):
+    if product.is_active:
+        _apply(('product', product.pk), product_entries(product))
+    else:
+        remove_product(product.pk)
+
+
+def remove_product(product_id):
+    _apply(('product', product_id), None)
+
+
+def update_category(category):
+    if category.is_active:
+        _apply(('category', category.pk), category_entries(category))
+    else:
+        remove_category(category.pk)
+
+
+def remove_category(category_id):
+    _apply(('category', category_id), None)
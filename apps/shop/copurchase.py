@@ -0,0 +1,243 @@
+"""Frequently bought together: co-purchase counts and top neighbours
+
+Order items are streamed in order ID order and grouped into baskets. For
+every pair of products in a basket the shared order count is added to
+ProductCoPurchase, which also keeps each product's own order count on the
+row pairing it with itself. From those counts each product's neighbours
+are scored by cosine similarity,
+
+    orders(a and b) / sqrt(orders(a) * orders(b))
+
+and the best TOP_K are stored in ProductAffinity, so pages read them with
+one indexed lookup.
+
+Updates are incremental: every batch of orders is merged and recorded as a
+CoPurchaseRun in one transaction, and the next update resumes after the
+last recorded order. Only products whose scores can have changed are
+rescored. Orders cancelled after they were counted stay counted until the
+next rebuild.
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderItem
+from .models import ProductCoPurchase, ProductAffinity, CoPurchaseRun
+
+TOP_K = getattr(settings, 'PRODUCT_AFFINITY_TOP_K', 10)
+MIN_CO_PURCHASES = getattr(settings, 'PRODUCT_AFFINITY_MIN_CO_PURCHASES', 1)
+ORDER_BATCH_SIZE = 500
+ITEM_CHUNK_SIZE = 2000
+WRITE_BATCH_SIZE = 1000
+SCORE_CHUNK_SIZE = 200
+EXCLUDED_ORDER_STATUSES = ['cancelled']
+# Orders newer than this are left for the next run, so an order whose
+# transaction commits after a later order ID was processed is not skipped
+ORDER_SETTLE_TIME = timedelta(seconds=getattr(settings, 'PRODUCT_AFFINITY_SETTLE_SECONDS', 300))
+
+
+def get_last_processed_order_id():
+    return CoPurchaseRun.objects.aggregate(last=Max('last_order_id'))['last'] or 0
+
+
+def iter_baskets(after_order_id, up_to_order_id):
+    """Yield (order_id, product IDs) for each order, streamed from OrderItem"""
+    items = OrderItem.objects.filter(
+        order_id__gt=after_order_id,
+        order_id__lte=up_to_order_id
+    ).exclude(
+        order__order_status__in=EXCLUDED_ORDER_STATUSES
+    ).order_by('order_id').values_list('order_id', 'product_id').iterator(chunk_size=ITEM_CHUNK_SIZE)
+
+    for order_id, rows in groupby(items, key=itemgetter(0)):
+        yield order_id, {product_id for order_id, product_id in rows}
+
+
+def iter_batches(baskets, batch_size):
+    """Group baskets into lists of at most batch_size"""
+    batch = []
+    for basket in baskets:
+        batch.append(basket)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def count_pairs(baskets):
+    """Sparse co-purchase counts for a batch of baskets, in both directions"""
+    counts = Counter()
+    for order_id, product_ids in baskets:
+        for product_id in product_ids:
+            counts[(product_id, product_id)] += 1
+        for first, second in combinations(sorted(product_ids), 2):
+            counts[(first, second)] += 1
+            counts[(second, first)] += 1
+    return counts
+
+
+def merge_counts(deltas):
+    """Add pair count deltas to the stored co-purchase counts"""
+    product_ids = {product_id for product_id, related_product_id in deltas}
+    existing = {
+        (row.product_id, row.related_product_id): row
+        for row in ProductCoPurchase.objects.filter(
+            product_id__in=product_ids,
+            related_product_id__in=product_ids
+        )
+    }
+
+    changed = []
+    created = []
+    for key, delta in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            created.append(ProductCoPurchase(product_id=key[0], related_product_id=key[1], order_count=delta))
+        else:
+            row.order_count += delta
+            changed.append(row)
+
+    ProductCoPurchase.objects.bulk_update(changed, ['order_count'], batch_size=WRITE_BATCH_SIZE)
+    ProductCoPurchase.objects.bulk_create(created, batch_size=WRITE_BATCH_SIZE)
+    return product_ids
+
+
+def affected_products(changed_product_ids):
+    """Products whose neighbour scores depend on the changed products' counts"""
+    return set(
+        ProductCoPurchase.objects.filter(
+            related_product_id__in=changed_product_ids
+        ).values_list('product_id', flat=True).distinct()
+    )
+
+
+def score_neighbours(product_ids, top_k=TOP_K):
+    """Recompute and store the top neighbours of the given products"""
+    product_ids = sorted(product_ids)
+    for start in range(0, len(product_ids), SCORE_CHUNK_SIZE):
+        chunk = product_ids[start:start + SCORE_CHUNK_SIZE]
+
+        order_counts = {}
+        pairs = defaultdict(list)
+        for product_id, related_product_id, order_count in ProductCoPurchase.objects.filter(
+            product_id__in=chunk
+        ).values_list('product_id', 'related_product_id', 'order_count'):
+            if product_id == related_product_id:
+                order_counts[product_id] = order_count
+            elif order_count >= MIN_CO_PURCHASES:
+                pairs[product_id].append((related_product_id, order_count))
+
+        neighbour_ids = {related_product_id for neighbours in pairs.values() for related_product_id, count in neighbours}
+        order_counts.update(
+            ProductCoPurchase.objects.filter(
+                product_id__in=neighbour_ids - order_counts.keys(),
+                related_product_id=F('product_id')
+            ).values_list('product_id', 'order_count')
+        )
+
+        affinities = []
+        for product_id, neighbours in pairs.items():
+            scored = [
+                (count / math.sqrt(order_counts[product_id] * order_counts[related_product_id]), count, related_product_id)
+                for related_product_id, count in neighbours
+            ]
+            for score, count, related_product_id in heapq.nlargest(top_k, scored):
+                affinities.append(ProductAffinity(
+                    product_id=product_id,
+                    related_product_id=related_product_id,
+                    score=score,
+                    co_purchase_count=count
+                ))
+
+        with transaction.atomic():
+            ProductAffinity.objects.filter(product_id__in=chunk).delete()
+            ProductAffinity.objects.bulk_create(affinities, batch_size=WRITE_BATCH_SIZE)
+
+
+def update_co_purchases(rebuild=False, batch_size=ORDER_BATCH_SIZE, top_k=TOP_K, progress=None):
+    """Fold new orders into the co-purchase counts and rescore affected products
+
+    With rebuild=True all counts are dropped and every order is processed
+    again. `progress`, if given, is called with the run recorded for each
+    batch. Returns a summary dict.
+    """
+    if rebuild:
+        with transaction.atomic():
+            ProductAffinity.objects.all().delete()
+            ProductCoPurchase.objects.all().delete()
+            CoPurchaseRun.objects.all().delete()
+
+    after_order_id = get_last_processed_order_id()
+    up_to_order_id = Order.objects.filter(
+        created_at__lte=timezone.now() - ORDER_SETTLE_TIME
+    ).aggregate(last=Max('id'))['last'] or 0
+
+    orders_processed = 0
+    products_updated = 0
+    changed_product_ids = set()
+    for batch in iter_batches(iter_baskets(after_order_id, up_to_order_id), batch_size):
+        with transaction.atomic():
+            batch_product_ids = merge_counts(count_pairs(batch))
+            # Rescoring is deferred to the end of a rebuild, which touches
+            # every product anyway
+            affected = set()
+            if not rebuild:
+                affected = affected_products(batch_product_ids)
+                score_neighbours(affected, top_k)
+            run = CoPurchaseRun.objects.create(
+                last_order_id=batch[-1][0],
+                orders_processed=len(batch),
+                products_updated=len(affected),
+                is_rebuild=rebuild
+            )
+        orders_processed += len(batch)
+        products_updated += len(affected)
+        changed_product_ids |= batch_product_ids
+        if progress is not None:
+            progress(run)
+
+    if rebuild:
+        score_neighbours(changed_product_ids, top_k)
+        products_updated = len(changed_product_ids)
+
+    return {
+        'orders_processed': orders_processed,
+        'products_updated': products_updated,
+        'last_order_id': max(after_order_id, get_last_processed_order_id()),
+    }
+
+
+def get_frequently_bought_together(product, limit=4):
+    """Active products most often bought together with the given product"""
+    affinities = ProductAffinity.objects.filter(
+        product=product,
+        related_product__is_active=True
+    ).select_related('related_product')[:limit]
+    return [affinity.related_product for affinity in affinities]
+
+
+def get_bought_together_ids(product_ids, limit=6):
+    """IDs of active products most often bought with any of the given products
+
+    Neighbours are ranked by their summed affinity to the whole set, and the
+    given products themselves are excluded.
+    """
+    return list(
+        ProductAffinity.objects.filter(
+            product_id__in=product_ids,
+            related_product__is_active=True
+        ).exclude(
+            related_product_id__in=product_ids
+        ).values('related_product_id').annotate(
+            total_score=Sum('score')
+        ).order_by('-total_score', 'related_product_id').values_list('related_product_id', flat=True)[:limit]
+    )
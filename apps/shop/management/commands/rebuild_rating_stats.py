@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from apps.shop.models import Product
+from apps.shop.ratings import rebuild_rating_stats
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored rating aggregates (average, count and histogram) for products'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product',
+            type=int,
+            action='append',
+            dest='product_ids',
+            help='Only rebuild the given product ID (can be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.all()
+        if options['product_ids']:
+            products = products.filter(id__in=options['product_ids'])
+        
+        updated_count = rebuild_rating_stats(products)
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully rebuilt rating stats for {updated_count} products'
+            )
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from apps.shop.search import get_search_backend
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text product search index'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        indexed_count = backend.rebuild()
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully rebuilt the {backend.__class__.__name__} index for {indexed_count} products'
+            )
+        )
@@ -1,38 +1,44 @@
 from django.core.management.base import BaseCommand
-from apps.shop.models import Product
-from apps.orders.models import OrderItem
-from django.db.models import Count
+from apps.shop.copurchase import update_co_purchases, ORDER_BATCH_SIZE, TOP_K
 
 class Command(BaseCommand):
-    help = 'Update product relationships based on purchase history'
+    help = 'Update "frequently bought together" relationships from new orders'
 
     def add_arguments(self, parser):
         parser.add_argument(
-            '--limit',
+            '--rebuild',
+            action='store_true',
+            help='Drop all co-purchase data and process every order again'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=ORDER_BATCH_SIZE,
+            help=f'Number of orders merged per transaction (default: {ORDER_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--top-k',
             type=int,
-            default=100,
-            help='Maximum number of products to process (default: 100)'
+            default=TOP_K,
+            help=f'Number of neighbours kept per product (default: {TOP_K})'
         )
 
     def handle(self, *args, **options):
-        limit = options['limit']
-        products = Product.objects.filter(is_active=True)[:limit]
+        def report(run):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Processed {run.orders_processed} orders up to order {run.last_order_id}')
         
-        updated_count = 0
-        for product in products:
-            # Update frequently bought together relationships
-            self.update_frequently_bought_together(product)
-            updated_count += 1
+        result = update_co_purchases(
+            rebuild=options['rebuild'],
+            batch_size=options['batch_size'],
+            top_k=options['top_k'],
+            progress=report
+        )
         
         self.stdout.write(
             self.style.SUCCESS(
-                f'Successfully updated relationships for {updated_count} products'
+                f"Successfully processed {result['orders_processed']} orders and updated "
+                f"relationships for {result['products_updated']} products "
+                f"(last order: {result['last_order_id']})"
             )
         )
-    
-    def update_frequently_bought_together(self, product):
-        """Update frequently bought together relationships for a product"""
-        # This would typically involve updating a many-to-many relationship
-        # or a separate model to store these relationships
-        # For now, we're just using the algorithm in the view
-        pass
\ No newline at end of file
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:18
+
+from django.db import migrations, models
+from django.db.models import Avg, Count
+
+def populate_rating_aggregates(apps, schema_editor):
+    Product = apps.get_model('shop', 'Product')
+    ProductReview = apps.get_model('shop', 'ProductReview')
+    
+    stats = ProductReview.objects.filter(is_approved=True).values('product_id').annotate(
+        avg=Avg('rating'),
+        count=Count('id')
+    )
+    for row in stats:
+        Product.objects.filter(pk=row['product_id']).update(
+            avg_rating=row['avg'],
+            review_count=row['count']
+        )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0004_productreview_is_approved'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='avg_rating',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['avg_rating', 'review_count'], name='shop_produc_avg_rat_49e480_idx'),
+        ),
+        migrations.RunPython(populate_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:20
+
+from django.db import migrations, models
+from django.db.models import Count
+
+def populate_rating_histogram(apps, schema_editor):
+    Product = apps.get_model('shop', 'Product')
+    ProductReview = apps.get_model('shop', 'ProductReview')
+    
+    histograms = {}
+    rows = ProductReview.objects.filter(is_approved=True).values('product_id', 'rating').annotate(
+        count=Count('id')
+    ).order_by()
+    for row in rows:
+        histogram = histograms.setdefault(row['product_id'], {str(rating): 0 for rating in range(1, 6)})
+        histogram[str(row['rating'])] = row['count']
+    
+    for product_id, histogram in histograms.items():
+        Product.objects.filter(pk=product_id).update(rating_histogram=histogram)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0005_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_histogram',
+            field=models.JSONField(blank=True, default=dict, help_text='Approved review count per star rating'),
+        ),
+        migrations.RunPython(populate_rating_histogram, migrations.RunPython.noop),
+    ]
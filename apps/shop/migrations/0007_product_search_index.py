@@ -0,0 +1,48 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    
+    if connection.vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE shop_product_search USING fts5("
+                "name, tags, keywords, description, category, "
+                "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE shop_product_search_vocab USING fts5vocab(shop_product_search, 'row')"
+            )
+        except OperationalError:
+            # SQLite was built without FTS5; product search falls back to the ORM
+            return
+        schema_editor.execute(
+            "INSERT INTO shop_product_search (rowid, name, tags, keywords, description, category) "
+            "SELECT p.id, p.name, p.tags, p.keywords, p.description, c.name "
+            "FROM shop_product p INNER JOIN shop_category c ON c.id = p.category_id"
+        )
+    elif connection.vendor == 'mysql':
+        schema_editor.execute(
+            "ALTER TABLE shop_product ADD FULLTEXT INDEX shop_product_fulltext_idx "
+            "(name, tags, keywords, description)"
+        )
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    
+    if connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS shop_product_search_vocab")
+        schema_editor.execute("DROP TABLE IF EXISTS shop_product_search")
+    elif connection.vendor == 'mysql':
+        schema_editor.execute("ALTER TABLE shop_product DROP INDEX shop_product_fulltext_idx")
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0006_product_rating_histogram'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
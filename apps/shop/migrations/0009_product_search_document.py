@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# The weighted document the PostgreSQL search backend matches against;
+# kept in step by PostgresSearchBackend.index_product and rebuild
+SEARCH_DOCUMENT_SQL = (
+    "UPDATE shop_product p SET search_document = "
+    "setweight(to_tsvector('simple', coalesce(p.name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(p.tags, '') || ' ' || coalesce(p.keywords, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(c.name, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(p.description, '')), 'D') "
+    "FROM shop_category c WHERE c.id = p.category_id"
+)
+
+def create_search_document(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("ALTER TABLE shop_product ADD COLUMN search_document tsvector")
+    schema_editor.execute(SEARCH_DOCUMENT_SQL)
+    schema_editor.execute(
+        "CREATE INDEX shop_product_search_document_idx ON shop_product USING gin (search_document)"
+    )
+
+def drop_search_document(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS shop_product_search_document_idx")
+    schema_editor.execute("ALTER TABLE shop_product DROP COLUMN IF EXISTS search_document")
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0008_product_co_purchases'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_document, drop_search_document),
+    ]
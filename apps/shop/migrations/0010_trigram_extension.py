@@ -0,0 +1,28 @@
+from django.db import migrations
+
+# PostgresSearchBackend falls back to trigram word similarity on the
+# product name. Done with RunPython rather than TrigramExtension so other
+# databases can migrate without psycopg installed
+
+
+def create_trigram_extension(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+
+def drop_trigram_extension(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP EXTENSION IF EXISTS pg_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0009_product_search_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_extension, drop_trigram_extension),
+    ]
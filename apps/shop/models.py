@@ -39,6 +39,11 @@ class Product(models.Model):
     discount_percent = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
     tags = models.CharField(max_length=255, blank=True, help_text="Comma-separated tags for marketing")
     
+    # Rating aggregates over approved reviews, kept in sync by apps.shop.signals
+    avg_rating = models.FloatField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_histogram = models.JSONField(default=dict, blank=True, help_text="Approved review count per star rating")
+    
     class Meta:
         ordering = ['name']
         indexes = [
@@ -48,6 +53,7 @@ class Product(models.Model):
             models.Index(fields=['is_featured']),
             models.Index(fields=['created_at']),
             models.Index(fields=['category', 'is_active']),
+            models.Index(fields=['avg_rating', 'review_count']),
         ]
     
     def __str__(self):
@@ -131,6 +137,16 @@ class ProductReview(models.Model):
     
     def __str__(self):
         return f"{self.product.name} - {self.rating} stars"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        if {'product_id', 'rating', 'is_approved'} <= loaded.keys():
+            # Remember what this review contributed to the product's rating
+            # aggregates so saves and deletes can apply just the difference
+            instance._rating_state = (loaded['product_id'], loaded['rating'] if loaded['is_approved'] else None)
+        return instance
 
 class GiftBoxCustomization(models.Model):
     """Model for gift box customizations"""
@@ -162,4 +178,54 @@ class GiftBoxItem(models.Model):
         ordering = ['created_at']
     
     def __str__(self):
-        return f"{self.product.name} includes {self.item.name}"
\ No newline at end of file
+        return f"{self.product.name} includes {self.item.name}"
+
+
+class ProductCoPurchase(models.Model):
+    """Number of orders that contain both products (maintained by apps.shop.copurchase)
+
+    Pairs are stored in both directions. The row pairing a product with
+    itself holds the number of orders containing that product.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='co_purchases')
+    related_product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    order_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['product', 'related_product']
+    
+    def __str__(self):
+        return f"{self.product_id} + {self.related_product_id}: {self.order_count}"
+
+class ProductAffinity(models.Model):
+    """Top "frequently bought together" neighbours of a product, best first"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='affinities')
+    related_product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(help_text="Cosine similarity of the two products' order sets")
+    co_purchase_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Product affinities'
+        unique_together = ['product', 'related_product']
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['product', '-score']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product.name} -> {self.related_product.name} ({self.score:.3f})"
+
+class CoPurchaseRun(models.Model):
+    """A co-purchase update; the latest run marks where the next one resumes"""
+    last_order_id = models.PositiveIntegerField(default=0)
+    orders_processed = models.PositiveIntegerField(default=0)
+    products_updated = models.PositiveIntegerField(default=0)
+    is_rebuild = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Co-purchase run up to order {self.last_order_id}"
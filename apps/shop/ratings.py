@@ -0,0 +1,98 @@
+"""Incremental maintenance of the denormalized rating aggregates on Product"""
+from django.db import transaction
+from django.db.models import Count
+
+from apps.core.catalog import bump_catalog_version
+from .models import Product, ProductReview
+
+RATING_VALUES = [value for value, label in ProductReview.RATING_CHOICES]
+REBUILD_BATCH_SIZE = 500
+
+
+def empty_histogram():
+    """Return a histogram with a zero count for every rating value"""
+    return {str(value): 0 for value in RATING_VALUES}
+
+
+def stats_from_histogram(histogram):
+    """Derive the stored rating fields from a rating histogram"""
+    review_count = sum(histogram.values())
+    rating_total = sum(int(rating) * count for rating, count in histogram.items())
+    return {
+        'avg_rating': rating_total / review_count if review_count else 0,
+        'review_count': review_count,
+        'rating_histogram': histogram,
+    }
+
+
+def review_contribution(product_id, rating, is_approved):
+    """The (product_id, rating) a review adds to the aggregates, if any"""
+    if product_id is None or not is_approved:
+        return (product_id, None)
+    return (product_id, int(rating))
+
+
+def apply_rating_change(product_id, removed=None, added=None):
+    """Remove one rating and/or add one rating to a product's aggregates"""
+    if removed == added:
+        return
+
+    with transaction.atomic():
+        product = Product.objects.select_for_update().filter(pk=product_id).only('id', 'rating_histogram').first()
+        if product is None:
+            return
+
+        histogram = empty_histogram()
+        histogram.update(product.rating_histogram or {})
+        if removed is not None:
+            histogram[str(removed)] = max(histogram[str(removed)] - 1, 0)
+        if added is not None:
+            histogram[str(added)] += 1
+
+        Product.objects.filter(pk=product_id).update(**stats_from_histogram(histogram))
+
+
+def apply_review_change(old, new):
+    """Apply the difference between two review contributions"""
+    old_product_id, old_rating = old
+    new_product_id, new_rating = new
+
+    if old_product_id == new_product_id:
+        apply_rating_change(new_product_id, removed=old_rating, added=new_rating)
+        return
+
+    if old_product_id is not None:
+        apply_rating_change(old_product_id, removed=old_rating)
+    if new_product_id is not None:
+        apply_rating_change(new_product_id, added=new_rating)
+
+
+def rebuild_rating_stats(products=None):
+    """Recompute rating aggregates from approved reviews for the given products"""
+    if products is None:
+        products = Product.objects.all()
+
+    histograms = {}
+    rows = ProductReview.objects.filter(
+        is_approved=True,
+        product__in=products
+    ).values('product_id', 'rating').annotate(count=Count('id')).order_by()
+    for row in rows:
+        histogram = histograms.setdefault(row['product_id'], empty_histogram())
+        histogram[str(row['rating'])] = row['count']
+
+    updated = []
+    for product in products.only('id').iterator(chunk_size=REBUILD_BATCH_SIZE):
+        stats = stats_from_histogram(histograms.get(product.id, empty_histogram()))
+        for field, value in stats.items():
+            setattr(product, field, value)
+        updated.append(product)
+
+    Product.objects.bulk_update(
+        updated,
+        ['avg_rating', 'review_count', 'rating_histogram'],
+        batch_size=REBUILD_BATCH_SIZE
+    )
+    # bulk_update sends no post_save, so the catalog cache is not dropped for us
+    bump_catalog_version()
+    return len(updated)
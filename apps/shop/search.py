@@ -0,0 +1,301 @@
+"""Full-text product search with pluggable database backends
+
+The index covers product name, tags, keywords, description and category
+name. Every backend returns product IDs ordered by relevance, so callers
+can filter a queryset with ``id__in`` and keep the ranking. All matches
+are returned unless a limit is passed: the catalog applies its filters
+and paging to the full ranked set, so capping it first would drop
+products from broad searches.
+
+The backend is chosen from ``settings.PRODUCT_SEARCH_BACKEND`` (a dotted
+path) or, by default, from the database vendor.
+"""
+import difflib
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection, DatabaseError
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+MAX_QUERY_TERMS = 8
+TOKEN_RE = re.compile(r'\w+')
+
+
+def limit_clause(limit):
+    """A SQL LIMIT clause and its parameters, empty when there is no limit"""
+    if limit is None:
+        return '', []
+    return ' LIMIT %s', [limit]
+
+
+def tokenize(query):
+    """Split a user query into lowercase search terms"""
+    return [term.lower() for term in TOKEN_RE.findall(query or '')][:MAX_QUERY_TERMS]
+
+
+class BaseSearchBackend:
+    """Interface implemented by every product search backend"""
+
+    def search(self, query, limit=None):
+        """Return matching product IDs ordered from most to least relevant"""
+        raise NotImplementedError
+
+    def index_product(self, product):
+        """Add or refresh a single product in the index"""
+
+    def remove_product(self, product_id):
+        """Drop a single product from the index"""
+
+    def rebuild(self):
+        """Rebuild the whole index and return the number of indexed products"""
+        return Product.objects.count()
+
+
+class ORMSearchBackend(BaseSearchBackend):
+    """Portable fallback that matches with icontains and ranks by field weight"""
+
+    FIELD_WEIGHTS = {
+        'name': 10,
+        'tags': 5,
+        'keywords': 5,
+        'category__name': 3,
+        'description': 1,
+    }
+
+    def search(self, query, limit=None):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        products = Product.objects.all()
+        for term in terms:
+            term_filter = Q()
+            for field in self.FIELD_WEIGHTS:
+                term_filter |= Q(**{f'{field}__icontains': term})
+            products = products.filter(term_filter)
+
+        scored = []
+        for row in products.values('id', *self.FIELD_WEIGHTS)[:limit]:
+            score = sum(
+                weight * (row[field] or '').lower().count(term)
+                for field, weight in self.FIELD_WEIGHTS.items()
+                for term in terms
+            )
+            scored.append((-score, row['id']))
+        return [product_id for score, product_id in sorted(scored)]
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """SQLite FTS5 index with BM25 ranking, prefix matching and typo tolerance
+
+    Terms are matched as prefixes. A term that is not the prefix of any
+    indexed word is widened to the closest indexed words, taken from the
+    fts5vocab table for the index.
+    """
+
+    table = 'shop_product_search'
+    vocab_table = 'shop_product_search_vocab'
+    # BM25 weights in column order: name, tags, keywords, description, category
+    column_weights = (10.0, 5.0, 5.0, 1.0, 3.0)
+    typo_candidates = 3
+    typo_cutoff = 0.75
+
+    def search(self, query, limit=None):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        weights = ', '.join(str(weight) for weight in self.column_weights)
+        limit_sql, limit_params = limit_clause(limit)
+        try:
+            with connection.cursor() as cursor:
+                match = ' AND '.join(self.term_expression(cursor, term) for term in terms)
+                cursor.execute(
+                    f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s '
+                    f'ORDER BY bm25({self.table}, {weights}){limit_sql}',
+                    [match, *limit_params]
+                )
+                return [row[0] for row in cursor.fetchall()]
+        except DatabaseError as e:
+            logger.error(f"FTS5 product search failed, falling back to ORM search: {str(e)}")
+            return ORMSearchBackend().search(query, limit)
+
+    def term_expression(self, cursor, term):
+        alternatives = [f'"{term}"*']
+        if not self.has_prefix(cursor, term):
+            alternatives.extend(f'"{word}"' for word in self.similar_words(cursor, term))
+        return f"({' OR '.join(alternatives)})"
+
+    def has_prefix(self, cursor, term):
+        cursor.execute(
+            f'SELECT 1 FROM {self.vocab_table} WHERE term >= %s AND term < %s LIMIT 1',
+            [term, term + '\U0010ffff']
+        )
+        return cursor.fetchone() is not None
+
+    def similar_words(self, cursor, term):
+        # Typos rarely hit the first letter, so only compare words sharing it
+        cursor.execute(
+            f'SELECT term FROM {self.vocab_table} WHERE term >= %s AND term < %s',
+            [term[0], term[0] + '\U0010ffff']
+        )
+        words = [row[0] for row in cursor.fetchall()]
+        return difflib.get_close_matches(term, words, n=self.typo_candidates, cutoff=self.typo_cutoff)
+
+    def index_product(self, product):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [product.pk])
+                cursor.execute(
+                    f'INSERT INTO {self.table} (rowid, name, tags, keywords, description, category) '
+                    f'VALUES (%s, %s, %s, %s, %s, %s)',
+                    [
+                        product.pk,
+                        product.name,
+                        product.tags,
+                        product.keywords,
+                        product.description,
+                        product.category.name,
+                    ]
+                )
+        except DatabaseError as e:
+            logger.error(f"Failed to index product {product.pk}: {str(e)}")
+
+    def remove_product(self, product_id):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [product_id])
+        except DatabaseError as e:
+            logger.error(f"Failed to remove product {product_id} from search index: {str(e)}")
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, name, tags, keywords, description, category) '
+                f'SELECT p.id, p.name, p.tags, p.keywords, p.description, c.name '
+                f'FROM shop_product p INNER JOIN shop_category c ON c.id = p.category_id'
+            )
+            return cursor.rowcount
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """PostgreSQL full-text search with weighted ts_rank
+
+    Matches against the search_document tsvector column added by migration
+    shop 0009, which has a GIN index, so a search is an index lookup rather
+    than building a vector for every product. Falls back to trigram word
+    similarity on the product name when the full-text query finds nothing,
+    using the pg_trgm extension created by migration shop 0010.
+    """
+
+    trigram_threshold = 0.3
+    document_sql = (
+        "UPDATE shop_product SET search_document = "
+        "setweight(to_tsvector('simple', coalesce(shop_product.name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(shop_product.tags, '') || ' ' || coalesce(shop_product.keywords, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(c.name, '')), 'C') || "
+        "setweight(to_tsvector('simple', coalesce(shop_product.description, '')), 'D') "
+        "FROM shop_category c WHERE c.id = shop_product.category_id"
+    )
+
+    def search(self, query, limit=None):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        ts_query = ' & '.join(f'{term}:*' for term in terms)
+        limit_sql, limit_params = limit_clause(limit)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT id FROM shop_product, to_tsquery('simple', %s) query "
+                "WHERE search_document @@ query "
+                "ORDER BY ts_rank(search_document, query) DESC, id" + limit_sql,
+                [ts_query, *limit_params]
+            )
+            product_ids = [row[0] for row in cursor.fetchall()]
+        if product_ids:
+            return product_ids
+
+        try:
+            return list(
+                Product.objects.annotate(
+                    similarity=TrigramWordSimilarity(' '.join(terms), 'name')
+                ).filter(similarity__gte=self.trigram_threshold).order_by('-similarity', 'id').values_list('id', flat=True)[:limit]
+            )
+        except DatabaseError as e:
+            logger.error(f"Trigram product search failed: {str(e)}")
+            return []
+
+    def index_product(self, product):
+        with connection.cursor() as cursor:
+            cursor.execute(self.document_sql + " AND shop_product.id = %s", [product.pk])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(self.document_sql)
+            return cursor.rowcount
+
+
+class MySQLSearchBackend(BaseSearchBackend):
+    """MySQL FULLTEXT search in boolean mode, ranked by MATCH relevance
+
+    MySQL has no built-in fuzzy matching, so this backend offers prefix
+    matching and ranking but no typo tolerance.
+    """
+
+    def search(self, query, limit=None):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        boolean_query = ' '.join(f'+{term}*' for term in terms)
+        limit_sql, limit_params = limit_clause(limit)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT id FROM shop_product '
+                    'WHERE MATCH (name, tags, keywords, description) AGAINST (%s IN BOOLEAN MODE) '
+                    'ORDER BY MATCH (name, tags, keywords, description) AGAINST (%s IN BOOLEAN MODE) DESC, id'
+                    + limit_sql,
+                    [boolean_query, boolean_query, *limit_params]
+                )
+                return [row[0] for row in cursor.fetchall()]
+        except DatabaseError as e:
+            logger.error(f"MySQL full-text search failed, falling back to ORM search: {str(e)}")
+            return ORMSearchBackend().search(query, limit)
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteFTS5Backend,
+    'postgresql': PostgresSearchBackend,
+    'mysql': MySQLSearchBackend,
+}
+
+_backend = None
+
+
+def get_search_backend():
+    """Return the configured product search backend"""
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None)
+        if backend_path:
+            backend_class = import_string(backend_path)
+        else:
+            backend_class = VENDOR_BACKENDS.get(connection.vendor, ORMSearchBackend)
+        _backend = backend_class()
+    return _backend
+
+
+def search_products(query, limit=None):
+    """Return product IDs matching a query, most relevant first"""
+    return get_search_backend().search(query, limit)
@@ -22,18 +22,14 @@ class ProductSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
     reviews = ProductReviewSerializer(many=True, read_only=True)
-    average_rating = serializers.SerializerMethodField()
+    average_rating = serializers.FloatField(source='avg_rating', read_only=True)
     
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'slug', 'category', 'description', 'nutritional_info',
             'price', 'stock', 'image', 'is_active', 'is_featured',
-            'created_at', 'images', 'reviews', 'average_rating', 'in_stock'
+            'created_at', 'images', 'reviews', 'average_rating', 'review_count',
+            'rating_histogram', 'in_stock'
         ]
-    
-    def get_average_rating(self, obj):
-        reviews = obj.reviews.all()
-        if reviews:
-            return sum(review.rating for review in reviews) / len(reviews)
-        return 0
\ No newline at end of file
+        read_only_fields = ['review_count', 'rating_histogram']
\ No newline at end of file
@@ -0,0 +1,73 @@
+from django.core.signals import request_started
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Product, Category, ProductReview
+from .ratings import review_contribution, apply_review_change, rebuild_rating_stats
+from .search import get_search_backend
+from . import autocomplete
+
+@receiver(post_save, sender=ProductReview)
+def update_rating_stats_on_review_save(sender, instance, created, **kwargs):
+    """Apply a created, edited or approved review to the product's rating aggregates"""
+    new_state = review_contribution(instance.product_id, instance.rating, instance.is_approved)
+    
+    if created:
+        apply_review_change((None, None), new_state)
+    elif hasattr(instance, '_rating_state'):
+        apply_review_change(instance._rating_state, new_state)
+    else:
+        # The previous state is unknown (e.g. deferred fields), so recompute
+        rebuild_rating_stats(Product.objects.filter(pk=instance.product_id))
+    
+    instance._rating_state = new_state
+
+@receiver(post_delete, sender=ProductReview)
+def update_rating_stats_on_review_delete(sender, instance, **kwargs):
+    """Remove a deleted review from the product's rating aggregates"""
+    old_state = getattr(
+        instance,
+        '_rating_state',
+        review_contribution(instance.product_id, instance.rating, instance.is_approved)
+    )
+    apply_review_change(old_state, (None, None))
+
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, **kwargs):
+    """Keep the product search index up to date"""
+    get_search_backend().index_product(instance)
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_index(sender, instance, **kwargs):
+    """Drop deleted products from the search index"""
+    get_search_backend().remove_product(instance.pk)
+
+@receiver(post_save, sender=Category)
+def reindex_category_products(sender, instance, created, **kwargs):
+    """Category names are indexed with each product, so refresh them on rename"""
+    if created:
+        return
+    backend = get_search_backend()
+    for product in instance.products.select_related('category'):
+        backend.index_product(product)
+
+@receiver(post_save, sender=Product)
+def update_autocomplete_product(sender, instance, **kwargs):
+    autocomplete.update_product(instance)
+
+@receiver(post_delete, sender=Product)
+def remove_autocomplete_product(sender, instance, **kwargs):
+    autocomplete.remove_product(instance.pk)
+
+@receiver(post_save, sender=Category)
+def update_autocomplete_category(sender, instance, **kwargs):
+    autocomplete.update_category(instance)
+
+@receiver(post_delete, sender=Category)
+def remove_autocomplete_category(sender, instance, **kwargs):
+    autocomplete.remove_category(instance.pk)
+
+@receiver(request_started)
+def warm_autocomplete_index(sender, **kwargs):
+    """Build the autocomplete index off the request path when a process starts serving"""
+    request_started.disconnect(warm_autocomplete_index)
+    autocomplete.warm_up()
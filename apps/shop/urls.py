@@ -17,4 +17,7 @@ urlpatterns = router.urls + [
     path('manage/products/<int:product_id>/edit/', views.product_edit, name='product_edit'),
     path('manage/reviews/', views.review_management, name='review_management'),
     path('submit-review/<int:product_id>/', views.submit_review, name='submit_review'),  # Add this line
+    
+    # API endpoints
+    path('autocomplete/', api_views.autocomplete, name='autocomplete'),
 ]
\ No newline at end of file
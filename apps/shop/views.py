@@ -2,9 +2,11 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.http import JsonResponse
 from django.utils.text import slugify
 from .models import Product, Category, ProductReview, ProductVariant, ProductImage
+from .ratings import RATING_VALUES
 from apps.users.models import User
 from django.utils import timezone
 from typing import TYPE_CHECKING
@@ -257,28 +259,41 @@ def submit_review(request, product_id):
             rating = data.get('rating')
             comment = data.get('comment')
             
-            product = get_object_or_404(Product, id=product_id)
+            try:
+                rating = int(rating)
+            except (TypeError, ValueError):
+                rating = None
+            if rating not in RATING_VALUES:
+                return JsonResponse({
+                    'success': False,
+                    'message': 'Please choose a rating between 1 and 5 stars.'
+                })
             
-            # Check if user has already reviewed this product
-            review, created = ProductReview.objects.get_or_create(
-                product=product,
-                user=request.user,
-                defaults={
-                    'rating': rating,
-                    'comment': comment,
-                    'is_verified': False,  # Could be set to True if user purchased the product
-                    'is_approved': False   # Admin needs to approve reviews
-                }
-            )
+            product = get_object_or_404(Product, id=product_id)
             
-            if not created:
-                # Update existing review
-                review.rating = rating
-                review.comment = comment
-                review.save()
-                message = 'Your review has been updated successfully!'
-            else:
-                message = 'Your review has been submitted successfully! It will be visible after approval.'
+            # The rating aggregates are updated by the post_save signal, so
+            # they are saved or rolled back together with the review
+            with transaction.atomic():
+                # Check if user has already reviewed this product
+                review, created = ProductReview.objects.get_or_create(
+                    product=product,
+                    user=request.user,
+                    defaults={
+                        'rating': rating,
+                        'comment': comment,
+                        'is_verified': False,  # Could be set to True if user purchased the product
+                        'is_approved': False   # Admin needs to approve reviews
+                    }
+                )
+                
+                if not created:
+                    # Update existing review
+                    review.rating = rating
+                    review.comment = comment
+                    review.save()
+                    message = 'Your review has been updated successfully!'
+                else:
+                    message = 'Your review has been submitted successfully! It will be visible after approval.'
             
             return JsonResponse({
                 'success': True,
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:52
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_name_tokens(apps, schema_editor):
+    """Index the names of existing users for customer search"""
+    User = apps.get_model('users', 'User')
+    UserNameToken = apps.get_model('users', 'UserNameToken')
+    batch = []
+    for user_id, full_name in User.objects.values_list('id', 'full_name').iterator(chunk_size=1000):
+        batch.extend(
+            UserNameToken(user_id=user_id, token=word[:100])
+            for word in set(re.findall(r'\w+', (full_name or '').lower()))
+        )
+        if len(batch) >= 1000:
+            UserNameToken.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    UserNameToken.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserNameToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=100)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='name_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('token', 'user')},
+            },
+        ),
+        migrations.RunPython(create_name_tokens, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
+from .permissions import get_role_permissions
 
 class Role(models.Model):
     ROLE_CHOICES = [
@@ -49,34 +50,57 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
     
+    def get_role_permissions(self):
+        """Permissions of the user's role, loaded once per request"""
+        if self.role_id is None:
+            return None
+        cached = getattr(self, '_role_permissions', None)
+        if cached is None or cached[0] != self.role_id:
+            cached = (self.role_id, get_role_permissions(self.role_id))
+            self._role_permissions = cached
+        return cached[1]
+    
     def has_permission(self, module, permission_type):
         """Check if user has specific permission for a module"""
-        if not self.role:
+        permissions = self.get_role_permissions()
+        if permissions is None:
             return False
             
-        if self.role.name == 'admin':
+        if permissions.name == 'admin':
             return True
         
-        try:
-            perm = Permission.objects.get(role=self.role, module=module)
-            return getattr(perm, f'can_{permission_type}', False)
-        except Permission.DoesNotExist:
-            return False
+        return permission_type in permissions.modules.get(module, ())
+    
+    def has_role(self, name):
+        permissions = self.get_role_permissions()
+        return permissions is not None and permissions.name == name
     
     @property
     def is_admin(self):
         """Check if user is an administrator"""
-        return self.role and self.role.name == 'admin'
+        return self.has_role('admin')
     
     @property
     def is_employee(self):
         """Check if user is an employee"""
-        return self.role and self.role.name == 'employee'
+        return self.has_role('employee')
     
     @property
     def is_customer(self):
         """Check if user is a customer"""
-        return self.role and self.role.name == 'customer'
+        return self.has_role('customer')
+
+class UserNameToken(models.Model):
+    """A lowercased word of a user's full name, for indexed name search"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='name_tokens')
+    token = models.CharField(max_length=100)
+    
+    class Meta:
+        # Leading with token lets prefix searches use the unique index
+        unique_together = ['token', 'user']
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.token}"
 
 class Employee(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
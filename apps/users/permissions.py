@@ -0,0 +1,64 @@
+"""Cached role permissions
+
+A role's permissions are loaded once into a frozen module -> flags map
+that is kept both in the shared cache and in each process. A version
+number in the shared cache is bumped whenever a Role or Permission is
+saved or deleted (see apps.users.signals), which makes every process
+reload on its next check. A User keeps the map it loaded for the rest of
+the request, so repeated checks are plain dict lookups.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.core.caching import get_cache_version, bump_cache_version
+
+PERMISSIONS_VERSION_KEY = 'permissions:version'
+PERMISSION_FLAGS = ('add', 'edit', 'delete', 'view')
+# Entries are invalidated by the version; the timeout only lets entries of
+# old versions expire from the shared cache
+ROLE_PERMISSIONS_CACHE_TIMEOUT = getattr(settings, 'ROLE_PERMISSIONS_CACHE_TIMEOUT', 60 * 60 * 24)
+
+RolePermissions = namedtuple('RolePermissions', ['name', 'modules'])
+
+# role_id -> (version, RolePermissions)
+_role_permissions = {}
+
+
+def invalidate_permissions():
+    bump_cache_version(PERMISSIONS_VERSION_KEY)
+
+
+def load_role_permissions(role_id):
+    from .models import Role, Permission
+
+    name = Role.objects.filter(pk=role_id).values_list('name', flat=True).first()
+    modules = {
+        permission['module']: frozenset(
+            flag for flag in PERMISSION_FLAGS if permission[f'can_{flag}']
+        )
+        for permission in Permission.objects.filter(role_id=role_id).values(
+            'module', *[f'can_{flag}' for flag in PERMISSION_FLAGS]
+        )
+    }
+    return {'name': name, 'modules': modules}
+
+
+def get_role_permissions(role_id):
+    """Return the RolePermissions of a role"""
+    version = get_cache_version(PERMISSIONS_VERSION_KEY)
+    cached_version, permissions = _role_permissions.get(role_id, (None, None))
+    if cached_version == version:
+        return permissions
+
+    cache_key = f'permissions:{version}:role:{role_id}'
+    data = cache.get(cache_key)
+    if data is None:
+        data = load_role_permissions(role_id)
+        cache.set(cache_key, data, ROLE_PERMISSIONS_CACHE_TIMEOUT)
+
+    permissions = RolePermissions(data['name'], MappingProxyType(data['modules']))
+    _role_permissions[role_id] = (version, permissions)
+    return permissions
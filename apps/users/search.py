@@ -0,0 +1,53 @@
+"""Customer name search
+
+Matching names with icontains needs a leading wildcard, which no index
+can serve, so every search scans the whole user table. Instead each word
+of a user's full name is stored lowercased in UserNameToken, kept in step
+by the signals in apps.users.signals, and a search matches users who have
+a token starting with each word of the query. A prefix is matched as the
+range [word, word + U+10FFFF) rather than with startswith: LIKE only uses
+an index on SQLite or under a non-C PostgreSQL collation when it is
+declared with pattern ops, while a range comparison can always seek on
+the token index.
+"""
+import re
+
+from .models import UserNameToken
+
+WORD_RE = re.compile(r'\w+')
+# Sorts after any character that can follow a prefix
+PREFIX_END = '\U0010ffff'
+
+
+def name_tokens(name):
+    return {word[:100] for word in WORD_RE.findall((name or '').lower())}
+
+
+def update_name_tokens(user):
+    """Bring a user's tokens in line with their full name"""
+    tokens = name_tokens(user.full_name)
+    existing = set(UserNameToken.objects.filter(user=user).values_list('token', flat=True))
+    if existing - tokens:
+        UserNameToken.objects.filter(user=user, token__in=existing - tokens).delete()
+    if tokens - existing:
+        UserNameToken.objects.bulk_create(
+            [UserNameToken(user=user, token=token) for token in tokens - existing],
+            ignore_conflicts=True
+        )
+
+
+def filter_by_name(queryset, query, user_field='pk'):
+    """Restrict queryset to users, or rows pointing at users, matching a name query
+
+    Every word of the query must be the start of a word in the name.
+    """
+    words = name_tokens(query)
+    if not words:
+        return queryset.none()
+    for word in words:
+        queryset = queryset.filter(**{
+            f'{user_field}__in': UserNameToken.objects.filter(
+                token__gte=word, token__lt=word + PREFIX_END
+            ).values('user_id')
+        })
+    return queryset
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Role, Permission, User
+from .permissions import invalidate_permissions
+from .search import update_name_tokens
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_role_permissions(sender, instance, **kwargs):
+    """Make every process reload role permissions after a change"""
+    invalidate_permissions()
+
+@receiver(post_save, sender=User)
+def update_user_name_tokens(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Keep the name search tokens in step with the user's full name"""
+    if raw or (update_fields is not None and 'full_name' not in update_fields):
+        return
+    update_name_tokens(instance)
@@ -35,6 +35,8 @@ LOCAL_APPS = [
     'apps.notifications',
     'apps.blog',
     'apps.marketing',
+    'apps.jobs',
+    'apps.metrics',
     'payments',
 ]
 
@@ -86,6 +88,14 @@ DATABASES = {
     }
 }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # Take the write lock when a transaction starts, so concurrent checkouts
+    # wait for each other instead of failing with "database is locked"
+    DATABASES['default']['OPTIONS'] = {
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': 20,
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -149,6 +159,24 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('EMAIL_HOST_USER', default='webmaster@localhost')
 
+# Absolute links in emails sent outside a request (e.g. low-stock digests)
+SITE_URL = config('SITE_URL', default='http://localhost:8000')
+LOW_STOCK_THRESHOLD = config('LOW_STOCK_THRESHOLD', default=10, cast=int)
+
+# Background jobs (see apps.jobs.queue) are only queued; `manage.py run_jobs`
+# must be kept running to execute them. JOB_QUEUE_SYNC=True runs each job in
+# the request right after it commits instead, for tests and local development
+# without a worker. Finished jobs are deleted after JOB_RETENTION_DAYS.
+JOB_QUEUE_SYNC = config('JOB_QUEUE_SYNC', default=False, cast=bool)
+JOB_RETENTION_DAYS = config('JOB_RETENTION_DAYS', default=7, cast=int)
+
+# Notification event stream (see apps.notifications.pubsub). The stream
+# needs an ASGI server; with more than one worker process use
+# apps.notifications.pubsub.RedisBroker.
+ASGI_APPLICATION = 'nutriharvest.asgi.application'
+NOTIFICATION_PUBSUB_BACKEND = config('NOTIFICATION_PUBSUB_BACKEND', default='apps.notifications.pubsub.InProcessBroker')
+NOTIFICATION_PUBSUB_REDIS_URL = config('REDIS_URL', default='redis://127.0.0.1:6379/1')
+
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
 
@@ -14,6 +14,7 @@ function initializeApp() {
         initializeScrollAnimations();
         initializeSystemNotifications();
         initializeNotificationBell();
+        initializeNotificationStream();
         initializeWishlist();
     } catch (error) {
         console.error('Error initializing app:', error);
@@ -243,17 +244,18 @@ function initializeProductFilters() {
     const priceFilter = document.querySelector('#price-filter');
     const sortSelect = document.querySelector('#sort-select');
     
-    // Search functionality with debounce
+    // Search submits on Enter; typing only fetches suggestions
     if (searchInput) {
-        let searchTimeout;
-        searchInput.addEventListener('input', function() {
-            clearTimeout(searchTimeout);
-            searchTimeout = setTimeout(() => {
+        searchInput.addEventListener('keydown', function(event) {
+            if (event.key === 'Enter') {
+                event.preventDefault();
                 filterProducts();
-            }, 300);
+            }
         });
     }
     
+    document.querySelectorAll('#product-search, input[data-autocomplete]').forEach(initializeSearchAutocomplete);
+    
     // Filter change handlers
     [categoryFilter, priceFilter, sortSelect].forEach(element => {
         if (element) {
@@ -277,6 +279,53 @@ function filterProducts() {
     window.location.href = `/shop/?${params.toString()}`;
 }
 
+// Search-as-you-type suggestions from /api/shop/autocomplete/
+function initializeSearchAutocomplete(input) {
+    const list = document.createElement('div');
+    list.className = 'list-group position-absolute w-100 shadow-sm d-none';
+    list.style.zIndex = 1050;
+    const container = input.closest('.input-group')?.parentNode || input.parentNode;
+    container.style.position = 'relative';
+    container.appendChild(list);
+    input.setAttribute('autocomplete', 'off');
+    
+    let lastQuery = '';
+    const fetchSuggestions = debounce(function() {
+        const query = input.value.trim();
+        if (query === lastQuery) return;
+        lastQuery = query;
+        
+        if (!query) {
+            list.classList.add('d-none');
+            return;
+        }
+        
+        fetch(`/api/shop/autocomplete/?q=${encodeURIComponent(query)}`)
+        .then(response => response.json())
+        .then(data => {
+            if (query !== lastQuery) return;
+            list.innerHTML = '';
+            data.suggestions.forEach(suggestion => {
+                const item = document.createElement('a');
+                item.className = 'list-group-item list-group-item-action d-flex justify-content-between';
+                item.href = suggestion.url;
+                item.textContent = suggestion.label;
+                
+                const badge = document.createElement('small');
+                badge.className = 'text-muted';
+                badge.textContent = suggestion.type;
+                item.appendChild(badge);
+                list.appendChild(item);
+            });
+            list.classList.toggle('d-none', data.suggestions.length === 0);
+        })
+        .catch(error => console.error('Error fetching suggestions:', error));
+    }, 150);
+    
+    input.addEventListener('input', fetchSuggestions);
+    input.addEventListener('blur', () => setTimeout(() => list.classList.add('d-none'), 200));
+}
+
 // Form validation
 function initializeFormValidation() {
     const forms = document.querySelectorAll('.needs-validation');
@@ -367,15 +416,42 @@ function initializeSystemNotifications() {
     // Fetch and display system notifications
     fetchSystemNotifications();
     
-    // Check for new notifications every 5 minutes
-    setInterval(fetchSystemNotifications, 5 * 60 * 1000);
+    // Check for new notifications every 5 minutes, unless they are pushed
+    setInterval(function() {
+        if (!notificationStreamOpen) fetchSystemNotifications();
+    }, 5 * 60 * 1000);
+}
+
+// ETags of the last responses from the notification polling endpoints
+const notificationETags = {};
+
+function fetchIfChanged(url) {
+    // Resolves to the JSON body, or null if it has not changed since the last poll
+    const headers = {};
+    if (notificationETags[url]) {
+        headers['If-None-Match'] = notificationETags[url];
+    }
+    
+    return fetch(url, { headers: headers })
+        .then(response => {
+            if (response.status === 304) {
+                return null;
+            }
+            const etag = response.headers.get('ETag');
+            return response.json().then(data => {
+                // Only remember the ETag once the body has been used
+                if (etag && data.success) {
+                    notificationETags[url] = etag;
+                }
+                return data;
+            });
+        });
 }
 
 function fetchSystemNotifications() {
-    fetch('/api/notifications/system-notifications/')
-        .then(response => response.json())
+    fetchIfChanged('/api/notifications/system-notifications/active/')
         .then(data => {
-            if (data.success && data.notifications.length > 0) {
+            if (data && data.success && data.notifications.length > 0) {
                 // Display each notification
                 data.notifications.forEach(notification => {
                     showSystemNotification(notification);
@@ -452,19 +528,53 @@ function initializeNotificationBell() {
     // Fetch user notifications
     fetchUserNotifications();
     
-    // Update notification count periodically
-    setInterval(fetchUserNotifications, 60 * 1000); // Every minute
+    // Update notification count periodically, unless changes are pushed
+    setInterval(function() {
+        if (!notificationStreamOpen) fetchUserNotifications();
+    }, 60 * 1000); // Every minute
+}
+
+// Notification event stream; polling above is the fallback while it is closed
+let notificationStreamOpen = false;
+
+function initializeNotificationStream() {
+    if (!window.EventSource) return;
+    
+    const source = new EventSource('/api/notifications/stream/');
+    
+    source.addEventListener('open', function() {
+        notificationStreamOpen = true;
+        // Catch up on anything sent while the stream was closed
+        fetchSystemNotifications();
+        fetchUserNotifications();
+    });
+    
+    source.addEventListener('error', function() {
+        // The browser reconnects by itself unless the server refused the
+        // stream, in which case readyState is CLOSED and polling takes over
+        notificationStreamOpen = false;
+    });
+    
+    source.addEventListener('system_notification', function(e) {
+        showSystemNotification(JSON.parse(e.data));
+        fetchUserNotifications();
+    });
+    
+    source.addEventListener('notification', fetchUserNotifications);
+    source.addEventListener('changed', function() {
+        fetchSystemNotifications();
+        fetchUserNotifications();
+    });
 }
 
 function fetchUserNotifications() {
     // Only fetch if user is authenticated
     if (!isAuthenticated()) return;
     
-    fetch('/api/notifications/user-notifications/')
-        .then(response => response.json())
+    fetchIfChanged('/api/notifications/user-notifications/')
         .then(data => {
-            if (data.success) {
-                updateNotificationBell(data.notifications);
+            if (data && data.success) {
+                updateNotificationBell(data);
             }
         })
         .catch(error => {
@@ -472,15 +582,16 @@ function fetchUserNotifications() {
         });
 }
 
-function updateNotificationBell(notifications) {
+function updateNotificationBell(data) {
+    const notifications = data.notifications;
     const countElement = document.querySelector('.notification-count');
     const dropdownMenu = document.getElementById('notificationDropdown');
     const noNotificationsElement = document.getElementById('noNotifications');
     
     if (!countElement || !dropdownMenu) return;
     
-    // Count unread notifications
-    const unreadCount = notifications.filter(n => !n.is_read).length;
+    // The server counts unread notifications beyond the ones listed here
+    const unreadCount = data.unread_count;
     
     // Update count badge
     countElement.textContent = unreadCount;